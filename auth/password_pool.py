@@ -0,0 +1,110 @@
+"""Process pool for PBKDF2 password hashing
+
+Each hash costs PASSWORD_ITERATIONS rounds of HMAC-SHA256. Running it in
+worker processes keeps it off the Qt thread, and lets several logins or a
+bulk import hash in parallel without contending for the GIL.
+"""
+import os
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from auth import passwords
+
+def _workers_from_env():
+    try:
+        return max(int(os.environ.get("AUTH_WORKERS", 0)), 0) or min(os.cpu_count() or 1, 4)
+    except ValueError:
+        return min(os.cpu_count() or 1, 4)
+
+# Worker processes; set AUTH_WORKERS in .env to override
+AUTH_WORKERS = _workers_from_env()
+
+class PasswordPool:
+    """Hashes and verifies passwords in worker processes
+
+    hash_password() and verify_password() return concurrent.futures.Future
+    objects. Call .result() from a worker thread, or use add_done_callback();
+    callbacks run on a pool thread, not the Qt thread. hash() and verify()
+    wait for the result. If the worker processes can't be started or have
+    crashed, the work runs inline instead.
+
+    Workers are started with "spawn" rather than fork, because forking a
+    process that already runs Qt and database threads can deadlock. They
+    start on demand, up to `workers` processes.
+    """
+
+    def __init__(self, workers=AUTH_WORKERS, iterations=None):
+        self.workers = workers
+        self.iterations = iterations or passwords.PASSWORD_ITERATIONS
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _reset(self, error):
+        # A crashed worker breaks the whole pool; start a fresh one next time
+        print(f"Password pool unavailable, hashing inline: {error}")
+        with self._lock:
+            self._executor = None
+
+    def _submit(self, function, *args):
+        try:
+            return self._get_executor().submit(function, *args)
+        except (BrokenProcessPool, OSError, RuntimeError) as e:
+            self._reset(e)
+            future = Future()
+            try:
+                future.set_result(function(*args))
+            except Exception as error:
+                future.set_exception(error)
+            return future
+
+    def _call(self, function, *args):
+        try:
+            return self._submit(function, *args).result()
+        except BrokenProcessPool as e:
+            self._reset(e)
+            return function(*args)
+
+    def hash_password(self, password, iterations=None):
+        """Return a Future for passwords.hash_password(password)"""
+        return self._submit(passwords.hash_password, password, None, iterations or self.iterations)
+
+    def verify_password(self, stored_password, provided_password):
+        """Return a Future for passwords.verify_password(stored_password, provided_password)"""
+        return self._submit(passwords.verify_password, bytes(stored_password), provided_password)
+
+    def hash(self, password, iterations=None):
+        """Hash a password in a worker and wait for the result"""
+        return self._call(passwords.hash_password, password, None, iterations or self.iterations)
+
+    def verify(self, stored_password, provided_password):
+        """Verify a password in a worker and wait for the result"""
+        return self._call(passwords.verify_password, bytes(stored_password), provided_password)
+
+    def warm_up(self):
+        """Start a worker process now so the first login doesn't wait for one"""
+        self._submit(passwords.password_scheme, b"")
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_password_pool():
+    """Return the shared PasswordPool"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PasswordPool()
+        return _pool
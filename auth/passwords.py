@@ -0,0 +1,116 @@
+"""Password hashing primitives
+
+Kept free of database and Qt imports so auth.password_pool's worker
+processes can load them cheaply.
+"""
+import base64
+import hashlib
+import hmac
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Current password hash format; see hash_password()
+PASSWORD_SCHEME = "pbkdf2_sha256"
+
+# Never hash with fewer iterations than the app has always used
+MIN_PASSWORD_ITERATIONS = 100000
+
+def _iterations_from_env():
+    try:
+        return max(int(os.environ.get("PASSWORD_ITERATIONS", MIN_PASSWORD_ITERATIONS)), MIN_PASSWORD_ITERATIONS)
+    except ValueError:
+        return MIN_PASSWORD_ITERATIONS
+
+# PBKDF2 cost for new hashes. Set PASSWORD_ITERATIONS in .env to the value
+# `python -m benchmarks.bench_password` recommends for the server's CPU;
+# existing hashes are upgraded on their next login.
+PASSWORD_ITERATIONS = _iterations_from_env()
+
+PASSWORD_SALT_BYTES = 16
+
+def hash_password(password, salt=None, iterations=None):
+    """Hash a password for storing.
+
+    Returns bytes in the self-describing form
+    pbkdf2_sha256$<iterations>$<base64 salt>$<base64 hash>, so the
+    iteration count can be raised later without breaking stored hashes.
+    """
+    if salt is None:
+        salt = os.urandom(PASSWORD_SALT_BYTES)
+    if iterations is None:
+        iterations = PASSWORD_ITERATIONS
+
+    password_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+
+    return "$".join([
+        PASSWORD_SCHEME,
+        str(iterations),
+        base64.b64encode(salt).decode('ascii'),
+        base64.b64encode(password_hash).decode('ascii')
+    ]).encode('ascii')
+
+def password_scheme(stored_password):
+    """Identify how a stored password hash was made.
+
+    Returns:
+        tuple: (scheme, iterations) where scheme is 'pbkdf2_sha256' (current
+        format), 'pbkdf2_raw' (32-byte salt + hash, 100000 iterations),
+        'sha256_hex' or 'sha256_raw' (unsalted, from older registrations)
+    """
+    if isinstance(stored_password, str):
+        stored_password = stored_password.encode('utf-8')
+    stored_password = bytes(stored_password)
+    if stored_password.startswith(PASSWORD_SCHEME.encode('ascii') + b"$"):
+        try:
+            return PASSWORD_SCHEME, int(stored_password.split(b"$")[1])
+        except (IndexError, ValueError):
+            return None, 0
+    if len(stored_password) == 64 and all(c in b"0123456789abcdefABCDEF" for c in stored_password):
+        return 'sha256_hex', 0
+    if len(stored_password) == 64:
+        return 'pbkdf2_raw', 100000
+    if len(stored_password) == 32:
+        return 'sha256_raw', 0
+    return None, 0
+
+def verify_password(stored_password, provided_password):
+    """Verify a stored password against a provided password.
+
+    Accepts every format this app has stored (see password_scheme()).
+    """
+    if isinstance(stored_password, str):
+        stored_password = stored_password.encode('utf-8')
+    stored_password = bytes(stored_password)
+    scheme, iterations = password_scheme(stored_password)
+    password = provided_password.encode('utf-8')
+
+    if scheme == PASSWORD_SCHEME:
+        try:
+            _, _, salt, expected = stored_password.split(b"$")
+            salt = base64.b64decode(salt)
+            expected = base64.b64decode(expected)
+        except ValueError:
+            return False
+        new_hash = hashlib.pbkdf2_hmac('sha256', password, salt, iterations)
+    elif scheme == 'pbkdf2_raw':
+        # First 32 bytes are salt
+        salt, expected = stored_password[:32], stored_password[32:]
+        new_hash = hashlib.pbkdf2_hmac('sha256', password, salt, iterations)
+    elif scheme == 'sha256_hex':
+        expected = stored_password.lower()
+        new_hash = hashlib.sha256(password).hexdigest().encode('ascii')
+    elif scheme == 'sha256_raw':
+        expected = stored_password
+        new_hash = hashlib.sha256(password).digest()
+    else:
+        return False
+
+    # Constant-time comparison so response times don't leak matching prefixes
+    return hmac.compare_digest(new_hash, expected)
+
+def needs_rehash(stored_password):
+    """Check whether a stored hash is in an old format or below the current iteration count."""
+    scheme, iterations = password_scheme(stored_password)
+    return scheme != PASSWORD_SCHEME or iterations < PASSWORD_ITERATIONS
@@ -1,7 +1,7 @@
-import hashlib
-import os
 from enum import Enum, auto
 from db_utils import execute_query
+from auth import passwords
+from auth.password_pool import get_password_pool
 
 class UserRole(Enum):
     CUSTOMER = "customer"
@@ -15,38 +15,22 @@ class User:
         self.username = username
         self.role = role
         self.is_authenticated = user_id is not None
+        self._profile = None  # Cached role profile, see get_profile()
     
     @staticmethod
-    def hash_password(password, salt=None):
-        """Hash a password for storing."""
-        if salt is None:
-            salt = os.urandom(32)  # 32 bytes salt
-        
-        password_hash = hashlib.pbkdf2_hmac(
-            'sha256',  # Hash algorithm
-            password.encode('utf-8'),  # Convert password to bytes
-            salt,  # Salt
-            100000  # Number of iterations
-        )
-        
-        return salt + password_hash  # Concatenate salt and hash
+    def hash_password(password, salt=None, iterations=None):
+        """Hash a password for storing (see auth.passwords.hash_password)."""
+        return passwords.hash_password(password, salt, iterations)
     
     @staticmethod
     def verify_password(stored_password, provided_password):
         """Verify a stored password against a provided password."""
-        salt = stored_password[:32]  # First 32 bytes are salt
-        stored_password_hash = stored_password[32:]
-        
-        # Hash the provided password with the stored salt
-        new_hash = hashlib.pbkdf2_hmac(
-            'sha256',
-            provided_password.encode('utf-8'),
-            salt,
-            100000
-        )
-        
-        # Compare the calculated hash with the stored hash
-        return new_hash == stored_password_hash
+        return passwords.verify_password(stored_password, provided_password)
+    
+    @staticmethod
+    def needs_rehash(stored_password):
+        """Check whether a stored hash is in an old format or below the current iteration count."""
+        return passwords.needs_rehash(stored_password)
     
     @staticmethod
     def register(username, email, password, role, phone="", address=""):
@@ -61,7 +45,7 @@ class User:
             return False, "Username or email already exists"
         
         # Hash the password
-        hashed_password = hashlib.sha256(password.encode()).hexdigest()
+        hashed_password = get_password_pool().hash(password)
         
         # Insert the new user
         result = execute_query(
@@ -129,50 +113,57 @@ class User:
     
     @staticmethod
     def login(username_or_email, password):
-        """Authenticate a user with the given credentials."""
-        # First try getting the user to see the password format
-        debug_data = execute_query(
-            "SELECT * FROM users WHERE username = %s OR email = %s",
-            (username_or_email, username_or_email)
-        )
-        
-        if debug_data:
-            print(f"Debug user data: {debug_data[0]}")
-            
-        # Hash the password
-        hashed_password = hashlib.sha256(password.encode()).hexdigest()
-        print(f"Generated hash: {hashed_password}")
+        """Authenticate a user with the given credentials.
         
-        # Try both formats - hex string and binary
-        user_data = execute_query(
-            "SELECT * FROM users WHERE (username = %s OR email = %s) AND password_hash = %s",
-            (username_or_email, username_or_email, hashed_password)
+        One round trip fetches the account by username or email, as a UNION
+        of two unique-index lookups (an OR across the two columns can't use
+        both indexes well). The password is verified in the password worker
+        pool, and hashes in an old format are upgraded to the current one on a
+        successful login. This waits for the hash, so call it off the Qt thread.
+        """
+        candidates = execute_query(
+            """
+            SELECT user_id, username, role, email, is_active, password_hash FROM users WHERE username = %s
+            UNION ALL
+            SELECT user_id, username, role, email, is_active, password_hash FROM users WHERE email = %s AND username <> %s
+            """,
+            (username_or_email, username_or_email, username_or_email)
         )
         
-        if not user_data:
-            # Try alternate format
-            try:
-                binary_hash = bytes.fromhex(hashed_password)
-                user_data = execute_query(
-                    "SELECT * FROM users WHERE (username = %s OR email = %s) AND password_hash = %s",
-                    (username_or_email, username_or_email, binary_hash)
-                )
-            except Exception as e:
-                print(f"Binary conversion error: {e}")
+        # A username match comes first; another account may use the same text as its email
+        pool = get_password_pool()
+        user_data = next(
+            (row for row in candidates or [] if pool.verify(row['password_hash'], password)),
+            None
+        )
         
         if not user_data:
             return None, "Invalid username or password"
         
-        user_data = user_data[0]
+        if User.needs_rehash(user_data['password_hash']):
+            User._rehash(user_data['user_id'], user_data['password_hash'], password)
         
-        user = User(
+        user = Session(
             user_id=user_data['user_id'],
             username=user_data['username'],
-            role=UserRole(user_data['role'])
+            role=UserRole(user_data['role']),
+            email=user_data['email'],
+            is_active=user_data['is_active']
         )
         user.is_authenticated = True
         return user, "Login successful"
     
+    @staticmethod
+    def _rehash(user_id, old_hash, password):
+        """Store a password in the current format, unless it changed since it was read."""
+        result = execute_query(
+            "UPDATE users SET password_hash = %s WHERE user_id = %s AND password_hash = %s",
+            (get_password_pool().hash(password), user_id, old_hash),
+            fetch=False
+        )
+        if result is not None:
+            print(f"Upgraded password hash for user {user_id}")
+    
     @staticmethod
     def get_by_id(user_id):
         """Retrieve a user by their ID."""
@@ -191,8 +182,15 @@ class User:
             role=UserRole(user_data['role'])
         )
     
-    def get_profile(self):
-        """Get the user's profile data based on their role."""
+    def get_profile(self, refresh=False):
+        """Get the user's profile data based on their role.
+
+        The profile is cached on the user object after the first lookup;
+        pass refresh=True or call invalidate_profile() after changing it.
+        """
+        if self._profile is not None and not refresh:
+            return self._profile
+        
         if self.role == UserRole.CUSTOMER:
             profile_data = execute_query(
                 "SELECT * FROM customers WHERE user_id = %s",
@@ -210,12 +208,18 @@ class User:
             )
         else:
             # Admins don't have separate profiles
-            return {'user_id': self.user_id, 'username': self.username}
+            self._profile = {'user_id': self.user_id, 'username': self.username}
+            return self._profile
         
         if not profile_data:
             return None
         
-        return profile_data[0]
+        self._profile = profile_data[0]
+        return self._profile
+    
+    def invalidate_profile(self):
+        """Drop the cached profile so the next get_profile() re-reads it."""
+        self._profile = None
     
     def update_password(self, current_password, new_password):
         """Update the user's password."""
@@ -230,11 +234,12 @@ class User:
         
         stored_password = user_data[0]['password_hash']
         
-        if not User.verify_password(stored_password, current_password):
+        pool = get_password_pool()
+        if not pool.verify(stored_password, current_password):
             return False, "Current password is incorrect"
         
         # Hash the new password
-        new_password_hash = User.hash_password(new_password)
+        new_password_hash = pool.hash(new_password)
         
         # Update the password
         result = execute_query(
@@ -246,4 +251,67 @@ class User:
         if result is not None:
             return True, "Password updated successfully"
         else:
-            return False, "Failed to update password" 
\ No newline at end of file
+            return False, "Failed to update password"
+
+class Session(User):
+    """The logged-in user, with their account details and role profile cached
+    
+    User.login returns a Session. Dashboards read customer_id, restaurant_id,
+    delivery_person_id and email from it instead of querying for them each
+    time. Call invalidate() after saving the account or profile.
+    """
+    
+    def __init__(self, user_id=None, username=None, role=None, email=None, is_active=None):
+        super().__init__(user_id, username, role)
+        self._account = None
+        if email is not None:
+            self._account = {'email': email, 'is_active': is_active}
+    
+    @classmethod
+    def from_user(cls, user):
+        """Wrap a plain User in a Session"""
+        if isinstance(user, Session):
+            return user
+        session = cls(user.user_id, user.username, user.role)
+        session.is_authenticated = user.is_authenticated
+        return session
+    
+    def _get_account(self):
+        if self._account is None:
+            account = execute_query(
+                "SELECT email, is_active FROM users WHERE user_id = %s",
+                (self.user_id,)
+            )
+            if not account:
+                return {'email': None, 'is_active': None}
+            self._account = account[0]
+        return self._account
+    
+    @property
+    def email(self):
+        return self._get_account()['email']
+    
+    @property
+    def is_active(self):
+        return self._get_account()['is_active']
+    
+    def _profile_value(self, key):
+        profile = self.get_profile()
+        return profile.get(key) if profile else None
+    
+    @property
+    def customer_id(self):
+        return self._profile_value('customer_id')
+    
+    @property
+    def restaurant_id(self):
+        return self._profile_value('restaurant_id')
+    
+    @property
+    def delivery_person_id(self):
+        return self._profile_value('delivery_person_id')
+    
+    def invalidate(self):
+        """Drop the cached account details and profile so they are re-read on next use."""
+        self._account = None
+        self.invalidate_profile()
@@ -0,0 +1,2 @@
+# Benchmarks module
+# Standalone scripts that measure the performance of the core engines
\ No newline at end of file
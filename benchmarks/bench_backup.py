@@ -0,0 +1,132 @@
+"""Benchmark the streaming database backup and restore
+
+Seeds a scratch table with synthetic orders, then runs a full backup (or
+restores one with --restore) and reports throughput and peak memory. Run the seed step once; it is slow on
+purpose-sized datasets and only needs repeating to change the row count.
+
+Usage:
+    python -m benchmarks.bench_backup --seed 2000000
+    python -m benchmarks.bench_backup --insert-rows 500 --fetch-rows 1000
+    python -m benchmarks.bench_backup --compress --workers 4
+    python -m benchmarks.bench_backup --restore backups/food_delivery_backup_20250101_000000.sql.gz
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from db_utils import get_db_connection
+from services.backup import backup_database
+from services.restore import restore_backup
+
+BENCH_TABLE = "bench_backup_orders"
+
+# Rows per INSERT while seeding
+SEED_BATCH_ROWS = 5000
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB, or None"""
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+def seed(row_count):
+    connection = get_db_connection()
+    if not connection:
+        print("Could not connect to database.")
+        return
+
+    cursor = connection.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS `{BENCH_TABLE}`")
+    cursor.execute(f"""
+        CREATE TABLE `{BENCH_TABLE}` (
+            order_id INT AUTO_INCREMENT PRIMARY KEY,
+            customer_id INT NOT NULL,
+            restaurant_id INT NOT NULL,
+            order_date DATETIME NOT NULL,
+            total_amount DECIMAL(10, 2) NOT NULL,
+            delivery_address TEXT,
+            special_instructions TEXT
+        )
+    """)
+
+    rng = random.Random(42)
+    started = time.perf_counter()
+    for start in range(0, row_count, SEED_BATCH_ROWS):
+        batch = []
+        for _ in range(min(SEED_BATCH_ROWS, row_count - start)):
+            batch.append((
+                rng.randint(1, 50000),
+                rng.randint(1, 500),
+                f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00",
+                round(rng.uniform(15, 400), 2),
+                f"Villa {rng.randint(1, 999)}, Street {rng.randint(1, 99)}, Dubai",
+                rng.choice([None, "Leave at the door", "Call on arrival", "No 'spicy' please"])
+            ))
+        cursor.executemany(f"""
+            INSERT INTO `{BENCH_TABLE}`
+                (customer_id, restaurant_id, order_date, total_amount, delivery_address, special_instructions)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, batch)
+        connection.commit()
+        print(f"\rSeeded {start + len(batch):,}/{row_count:,} rows", end="")
+    print(f"\nSeeding took {time.perf_counter() - started:.1f} seconds")
+
+    cursor.close()
+    connection.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming database backup")
+    parser.add_argument("--seed", type=int, metavar="ROWS", help=f"(Re)create {BENCH_TABLE} with this many rows and exit")
+    parser.add_argument("--insert-rows", type=int, default=500, help="Rows per INSERT statement")
+    parser.add_argument("--fetch-rows", type=int, default=1000, help="Rows fetched from the server at a time")
+    parser.add_argument("--workers", type=int, default=1, help="Tables dumped (or restored) in parallel")
+    parser.add_argument("--compress", action="store_true", help="Write a compressed, checksummed backup")
+    parser.add_argument("--keep", action="store_true", help="Keep the backup file")
+    parser.add_argument("--restore", metavar="FILE", help="Restore this backup instead of taking one")
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.seed)
+        return
+
+    if args.restore:
+        result = restore_backup(args.restore, workers=args.workers)
+        size_mb = result['bytes'] / 1024 / 1024
+        peak = peak_rss_mb()
+        print(f"Statements:  {result['statements']:,} ({result['skipped']} skipped, {result['commits']} commits)")
+        print(f"SQL size:    {size_mb:8.1f} MB")
+        print(f"Time:        {result['seconds']:8.1f} s")
+        print(f"Throughput:  {size_mb / result['seconds']:8.1f} MB/s, {result['rows'] / result['seconds']:,.0f} rows/s")
+        print(f"Peak RSS:    {peak:8.1f} MB" if peak is not None else "Peak RSS:    n/a")
+        return
+
+    backup_dir = tempfile.mkdtemp(prefix="bench_backup_")
+    result = backup_database(backup_dir, insert_rows=args.insert_rows, fetch_rows=args.fetch_rows,
+                             compress=args.compress, workers=args.workers)
+
+    size_mb = result['bytes'] / 1024 / 1024
+    peak = peak_rss_mb()
+    print(f"Tables: {result['tables']}, rows: {result['rows']:,}")
+    print(f"Insert rows: {args.insert_rows}, fetch rows: {args.fetch_rows}, workers: {args.workers}")
+    print(f"Backup size: {size_mb:8.1f} MB" + (f" in {result['chunks']} compressed chunks" if args.compress else ""))
+    print(f"Time:        {result['seconds']:8.1f} s")
+    print(f"Throughput:  {size_mb / result['seconds']:8.1f} MB/s, {result['rows'] / result['seconds']:,.0f} rows/s")
+    print(f"Peak RSS:    {peak:8.1f} MB" if peak is not None else "Peak RSS:    n/a")
+
+    if args.keep:
+        print(f"Backup kept at {result['path']}")
+    else:
+        os.remove(result['path'])
+        if result['manifest']:
+            os.remove(result['manifest'])
+        os.rmdir(backup_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Benchmark analytics chart refreshes
+
+Compares the old way of refreshing the reports charts, which built a new
+Figure and canvas, called tight_layout and drew everything, with the
+persistent PieChart and TrendChart from ui/charts.py. Those update artists
+in place, blit when the axes stay the same, and skip unchanged data. No
+database is needed.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_charts --refreshes 50
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from PySide6.QtWidgets import QApplication, QFrame, QVBoxLayout
+from ui.charts import chart_backend, palette, rotate_date_labels, PieChart, TrendChart
+
+STATUSES = ["Pending", "Preparing", "Ready", "Picked Up", "Delivered", "Cancelled"]
+
+def status_counts():
+    return STATUSES, [random.randint(1, 200) for _ in STATUSES]
+
+def revenue_trend(days=30):
+    start = date.today() - timedelta(days=days)
+    return [start + timedelta(days=day) for day in range(days)], [random.uniform(500, 5000) for _ in range(days)]
+
+def rebuild_pie(container, labels, sizes):
+    """The previous refresh: replace the canvas with a freshly drawn one"""
+    Figure, FigureCanvas = chart_backend()
+    layout = container.layout()
+    while layout.count():
+        layout.takeAt(0).widget().setParent(None)
+    figure = Figure(figsize=(5, 4), dpi=100)
+    canvas = FigureCanvas(figure)
+    ax = figure.add_subplot(111)
+    ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=palette(len(labels)))
+    ax.axis('equal')
+    layout.addWidget(canvas)
+    figure.tight_layout()
+    canvas.draw()
+
+def rebuild_trend(container, dates, values):
+    Figure, FigureCanvas = chart_backend()
+    layout = container.layout()
+    while layout.count():
+        layout.takeAt(0).widget().setParent(None)
+    figure = Figure(figsize=(5, 4), dpi=100)
+    canvas = FigureCanvas(figure)
+    ax = figure.add_subplot(111)
+    ax.plot(dates, values, 'o-', color='#3498db', linewidth=2)
+    ax.set_title('Revenue Trend')
+    ax.set_ylabel('Revenue (AED)')
+    ax.grid(True, linestyle='--', alpha=0.7)
+    rotate_date_labels(ax)
+    layout.addWidget(canvas)
+    figure.tight_layout()
+    canvas.draw()
+
+def container():
+    frame = QFrame()
+    QVBoxLayout(frame)
+    frame.resize(500, 400)
+    frame.show()
+    return frame
+
+def time_refreshes(app, refresh, data, refreshes):
+    timings = []
+    for _ in range(refreshes):
+        args = data()
+        started = time.perf_counter()
+        refresh(*args)
+        app.processEvents()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analytics chart refreshes")
+    parser.add_argument("--refreshes", type=int, default=50, help="Refreshes per measurement; the median is reported")
+    args = parser.parse_args()
+    app = QApplication.instance() or QApplication([])
+
+    pie_labels, pie_sizes = status_counts()
+    dates, values = revenue_trend()
+    # Keep every frame referenced, or Qt deletes it along with its canvas
+    frames = [container() for _ in range(4)]
+    pie_frame, trend_frame = frames[:2]
+    pie = PieChart(frames[2])
+    pie.update(pie_labels, pie_sizes)
+    trend = TrendChart(frames[3], 'Revenue Trend', 'Revenue (AED)')
+    trend.update(dates, values)
+    app.processEvents()
+
+    rows = [
+        ("Pie: new figure each refresh", lambda *data: rebuild_pie(pie_frame, *data), status_counts),
+        ("Pie: wedges updated in place", pie.update, status_counts),
+        ("Pie: data unchanged", pie.update, lambda: (pie_labels, pie_sizes)),
+        ("Trend: new figure each refresh", lambda *data: rebuild_trend(trend_frame, *data), revenue_trend),
+        # Values inside the current y range are blitted; the rest redraw the axes
+        ("Trend: values within y range", trend.update,
+         lambda: (dates, [value * random.uniform(0.5, 1) for value in values])),
+        ("Trend: new dates or y range", trend.update, lambda: revenue_trend(random.randint(20, 40))),
+        ("Trend: data unchanged", trend.update, lambda: (dates, values)),
+    ]
+
+    print(f"{'Refresh':<32} {'Median ms':>10}")
+    for label, refresh, data in rows:
+        print(f"{label:<32} {time_refreshes(app, refresh, data, args.refreshes):10.2f}")
+    for name, chart in (("Pie", pie), ("Trend", trend)):
+        print(f"\n{name}: {chart.full_draws} full draws, {chart.blits} blits, {chart.skipped} skipped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark the auto-dispatch matcher without a database
+
+Simulates a city-sized fleet of couriers and a minute's worth of ready orders,
+then times index construction and matching. A brute-force scan over every
+courier is timed on a sample of orders for comparison.
+
+Usage:
+    python -m benchmarks.bench_dispatch --couriers 10000 --orders 1000
+"""
+import argparse
+import random
+import time
+from services.dispatch import match_orders
+from services.geo import GeoGrid, haversine_km
+
+# Roughly the Dubai metro area
+CITY_BOUNDS = (24.95, 25.35, 55.05, 55.55)
+
+def random_point(rng):
+    min_lat, max_lat, min_lng, max_lng = CITY_BOUNDS
+    return rng.uniform(min_lat, max_lat), rng.uniform(min_lng, max_lng)
+
+def brute_force_nearest(order, couriers, radius_km):
+    best = None
+    for courier_id, (lat, lng) in couriers.items():
+        distance = haversine_km(order['latitude'], order['longitude'], lat, lng)
+        if distance <= radius_km and (best is None or distance < best[1]):
+            best = (courier_id, distance)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark nearest-courier dispatch")
+    parser.add_argument("--couriers", type=int, default=10000)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--radius", type=float, default=10.0, help="Delivery radius in km")
+    parser.add_argument("--cell", type=float, default=0.01, help="Grid cell size in degrees")
+    parser.add_argument("--ticks", type=int, default=12, help="Dispatch ticks per minute")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    courier_points = {courier_id: random_point(rng) for courier_id in range(1, args.couriers + 1)}
+    orders = []
+    for order_id in range(1, args.orders + 1):
+        lat, lng = random_point(rng)
+        orders.append({'order_id': order_id, 'latitude': lat, 'longitude': lng})
+
+    started = time.perf_counter()
+    grid = GeoGrid(args.cell)
+    for courier_id, (lat, lng) in courier_points.items():
+        grid.insert(courier_id, lat, lng)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    # Orders arrive spread over the minute and are matched in per-tick batches
+    per_tick = max(1, len(orders) // args.ticks)
+    started = time.perf_counter()
+    assignments = []
+    for start in range(0, len(orders), per_tick):
+        assigned = {courier_id for _, courier_id, _ in assignments}
+        assignments.extend(match_orders(
+            orders[start:start + per_tick], grid, args.radius,
+            is_free=lambda courier_id, data: courier_id not in assigned
+        ))
+    match_ms = (time.perf_counter() - started) * 1000
+
+    sample = orders[:min(50, len(orders))]
+    started = time.perf_counter()
+    for order in sample:
+        brute_force_nearest(order, courier_points, args.radius)
+    brute_ms = (time.perf_counter() - started) * 1000 / len(sample) * len(orders)
+
+    avg_km = sum(distance for _, _, distance in assignments) / len(assignments) if assignments else 0
+    print(f"Couriers: {args.couriers}, orders: {args.orders}, radius: {args.radius} km, cell: {args.cell} deg")
+    print(f"Index build:        {build_ms:8.1f} ms")
+    print(f"Matching ({args.ticks} ticks): {match_ms:8.1f} ms total, {match_ms / args.ticks:.1f} ms per tick")
+    print(f"Brute force (est.): {brute_ms:8.1f} ms")
+    print(f"Assigned {len(assignments)}/{len(orders)} orders, mean pickup distance {avg_km:.2f} km")
+    print(f"Throughput: {len(orders) / (match_ms / 1000):,.0f} orders/s")
+
+if __name__ == "__main__":
+    main()
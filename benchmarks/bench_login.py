@@ -0,0 +1,101 @@
+"""Benchmark User.login
+
+Creates scratch users whose passwords are stored in each format the app has
+used, logs each in once (upgrading its hash) and then repeatedly, and times
+the old three-query lookup against the current single UNION lookup.
+The scratch users are removed afterwards.
+
+Usage:
+    python -m benchmarks.bench_login --runs 20
+"""
+import argparse
+import hashlib
+import os
+import statistics
+import time
+from auth.user import User, UserRole
+from db_utils import execute_query
+
+BENCH_PASSWORD = "bench-password"
+
+# Stored password formats, oldest first
+LEGACY_HASHES = {
+    "sha256_hex": lambda: hashlib.sha256(BENCH_PASSWORD.encode()).hexdigest().encode('ascii'),
+    "sha256_raw": lambda: hashlib.sha256(BENCH_PASSWORD.encode()).digest(),
+    "pbkdf2_raw": lambda: (lambda salt: salt + hashlib.pbkdf2_hmac(
+        'sha256', BENCH_PASSWORD.encode('utf-8'), salt, 100000))(os.urandom(32)),
+    "pbkdf2_sha256": lambda: User.hash_password(BENCH_PASSWORD)
+}
+
+def bench_username(scheme):
+    return f"bench_login_{scheme}"
+
+def create_users():
+    for scheme, make_hash in LEGACY_HASHES.items():
+        username = bench_username(scheme)
+        execute_query("DELETE FROM users WHERE username = %s", (username,), fetch=False)
+        execute_query(
+            """
+            INSERT INTO users (username, email, password_hash, role, created_at)
+            VALUES (%s, %s, %s, %s, NOW())
+            """,
+            (username, f"{username}@example.com", make_hash(), UserRole.CUSTOMER.value),
+            fetch=False
+        )
+
+def remove_users():
+    for scheme in LEGACY_HASHES:
+        execute_query("DELETE FROM users WHERE username = %s", (bench_username(scheme),), fetch=False)
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+def old_lookup(username_or_email):
+    """The three round trips User.login used to make before verifying anything"""
+    execute_query("SELECT * FROM users WHERE username = %s OR email = %s", (username_or_email, username_or_email))
+    hashed_password = hashlib.sha256(BENCH_PASSWORD.encode()).hexdigest()
+    execute_query("SELECT * FROM users WHERE (username = %s OR email = %s) AND password_hash = %s",
+                  (username_or_email, username_or_email, hashed_password))
+    execute_query("SELECT * FROM users WHERE (username = %s OR email = %s) AND password_hash = %s",
+                  (username_or_email, username_or_email, bytes.fromhex(hashed_password)))
+
+def new_lookup(username_or_email):
+    execute_query(
+        """
+        SELECT user_id, username, role, password_hash FROM users WHERE username = %s
+        UNION ALL
+        SELECT user_id, username, role, password_hash FROM users WHERE email = %s AND username <> %s
+        """,
+        (username_or_email, username_or_email, username_or_email)
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark User.login")
+    parser.add_argument("--runs", type=int, default=20, help="Logins per measurement; the median is reported")
+    args = parser.parse_args()
+
+    create_users()
+    try:
+        print(f"{'Stored format':<16} {'First login ms':>15} {'Later logins ms':>16}")
+        for scheme in LEGACY_HASHES:
+            username = bench_username(scheme)
+            (user, _), first = timed(User.login, username, BENCH_PASSWORD)
+            if user is None:
+                print(f"{scheme:<16} login failed")
+                continue
+            later = statistics.median(timed(User.login, username, BENCH_PASSWORD)[1] for _ in range(args.runs))
+            print(f"{scheme:<16} {first:15.1f} {later:16.1f}")
+
+        username = bench_username("pbkdf2_sha256")
+        old = statistics.median(timed(old_lookup, username)[1] for _ in range(args.runs))
+        new = statistics.median(timed(new_lookup, username)[1] for _ in range(args.runs))
+        email = statistics.median(timed(new_lookup, f"{username}@example.com")[1] for _ in range(args.runs))
+        print(f"\nLookup only: old three queries {old:.1f} ms, "
+              f"UNION by username {new:.1f} ms, by email {email:.1f} ms")
+    finally:
+        remove_users()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Benchmark analytics queries on monthly-partitioned vs. unpartitioned orders
+
+Seeds two scratch copies of the orders columns the analytics queries use,
+one plain and one partitioned by month the way
+`python setup_database.py --partition-orders` partitions orders, then times
+the report queries from the admin dashboard on each. Run the seed step once.
+
+Usage:
+    python -m benchmarks.bench_partitions --seed 5000000 --months 36
+    python -m benchmarks.bench_partitions --runs 5
+"""
+import argparse
+import datetime
+import random
+import statistics
+import time
+from db_utils import get_db_connection
+from services.partitions import add_months, month_start, monthly_partitions_sql
+
+PLAIN_TABLE = "bench_orders_plain"
+PARTITIONED_TABLE = "bench_orders_partitioned"
+
+# Rows per INSERT while seeding
+SEED_BATCH_ROWS = 5000
+
+# The admin reports' queries; {table} is filled in per variant
+QUERIES = {
+    "metrics (1 month)": """
+        SELECT COUNT(*), SUM(total_amount), AVG(total_amount),
+               AVG(TIMESTAMPDIFF(MINUTE, order_time, actual_delivery_time))
+        FROM {table} WHERE order_time BETWEEN %s AND %s
+    """,
+    "status counts (1 month)": """
+        SELECT delivery_status, COUNT(*) FROM {table}
+        WHERE order_time BETWEEN %s AND %s GROUP BY delivery_status
+    """,
+    "daily revenue (1 month)": """
+        SELECT DATE(order_time) AS date, SUM(total_amount) FROM {table}
+        WHERE order_time BETWEEN %s AND %s GROUP BY DATE(order_time) ORDER BY date
+    """,
+    "today's order count": """
+        SELECT COUNT(*) FROM {table}
+        WHERE order_time >= %s AND order_time < %s
+    """
+}
+
+def create_table(cursor, table, primary_key, partition_sql=""):
+    # Like orders, neither variant has an index on order_time
+    cursor.execute(f"DROP TABLE IF EXISTS `{table}`")
+    cursor.execute(f"""
+        CREATE TABLE `{table}` (
+            order_id INT AUTO_INCREMENT,
+            restaurant_id INT NOT NULL,
+            delivery_status ENUM('Pending', 'Confirmed', 'Preparing', 'On Delivery', 'Delivered', 'Cancelled') NOT NULL,
+            order_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            actual_delivery_time TIMESTAMP NULL,
+            total_amount DECIMAL(10, 2) NOT NULL,
+            PRIMARY KEY ({primary_key})
+        ) {partition_sql}
+    """)
+
+def seed(row_count, months):
+    connection = get_db_connection()
+    if not connection:
+        print("Could not connect to database.")
+        return
+
+    cursor = connection.cursor()
+    this_month = month_start(datetime.date.today())
+    first_month = add_months(this_month, -(months - 1))
+    create_table(cursor, PLAIN_TABLE, "order_id")
+    create_table(cursor, PARTITIONED_TABLE, "order_id, order_time",
+                 monthly_partitions_sql(first_month, add_months(this_month, 1)))
+
+    rng = random.Random(42)
+    first_day = datetime.datetime.combine(first_month, datetime.time())
+    span_seconds = int((datetime.datetime.now() - first_day).total_seconds())
+    statuses = ['Delivered'] * 8 + ['Cancelled', 'Pending']
+    started = time.perf_counter()
+    for start in range(0, row_count, SEED_BATCH_ROWS):
+        batch = []
+        for _ in range(min(SEED_BATCH_ROWS, row_count - start)):
+            ordered = first_day + datetime.timedelta(seconds=rng.randrange(span_seconds))
+            batch.append((
+                rng.randint(1, 500),
+                rng.choice(statuses),
+                ordered,
+                ordered + datetime.timedelta(minutes=rng.randint(20, 90)),
+                round(rng.uniform(15, 400), 2)
+            ))
+        for table in (PLAIN_TABLE, PARTITIONED_TABLE):
+            cursor.executemany(f"""
+                INSERT INTO `{table}` (restaurant_id, delivery_status, order_time, actual_delivery_time, total_amount)
+                VALUES (%s, %s, %s, %s, %s)
+            """, batch)
+        connection.commit()
+        print(f"\rSeeded {start + len(batch):,}/{row_count:,} rows", end="")
+    print(f"\nSeeding took {time.perf_counter() - started:.1f} seconds")
+
+    for table in (PLAIN_TABLE, PARTITIONED_TABLE):
+        cursor.execute(f"ANALYZE TABLE `{table}`")
+        cursor.fetchall()
+    cursor.close()
+    connection.close()
+
+def time_query(cursor, sql, params, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def explain_partitions(cursor, sql, params):
+    """Return the partitions EXPLAIN says a query reads"""
+    cursor.execute("EXPLAIN " + sql, params)
+    columns = [column[0] for column in cursor.description]
+    row = cursor.fetchone()
+    cursor.fetchall()
+    partitions = row[columns.index("partitions")] if "partitions" in columns else None
+    return partitions.count(",") + 1 if partitions else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analytics queries on partitioned vs. unpartitioned orders")
+    parser.add_argument("--seed", type=int, metavar="ROWS", help="(Re)create both scratch tables with this many rows and exit")
+    parser.add_argument("--months", type=int, default=24, help="Months of order history to seed")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per query; the median is reported")
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.seed, args.months)
+        return
+
+    connection = get_db_connection()
+    if not connection:
+        print("Could not connect to database.")
+        return
+    cursor = connection.cursor()
+
+    today = datetime.date.today()
+    month_ago = datetime.datetime.combine(today - datetime.timedelta(days=30), datetime.time())
+    params = {
+        "today's order count": (today, today + datetime.timedelta(days=1))
+    }
+    default_params = (month_ago, datetime.datetime.now())
+
+    print(f"{'Query':<26} {'Plain ms':>10} {'Partitioned ms':>15} {'Speedup':>8} {'Partitions read':>16}")
+    for name, sql in QUERIES.items():
+        query_params = params.get(name, default_params)
+        plain = time_query(cursor, sql.format(table=PLAIN_TABLE), query_params, args.runs)
+        partitioned_sql = sql.format(table=PARTITIONED_TABLE)
+        partitioned = time_query(cursor, partitioned_sql, query_params, args.runs)
+        read = explain_partitions(cursor, partitioned_sql, query_params)
+        print(f"{name:<26} {plain:10.1f} {partitioned:15.1f} {plain / partitioned:7.1f}x {read:16}")
+
+    cursor.close()
+    connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Calibrate password hashing cost for this machine
+
+Times one PBKDF2-SHA256 hash at increasing iteration counts, picks the
+largest count that stays within the target time per hash, then measures
+how many hashes per second the auth worker pool manages with 1..N workers.
+Prints the PASSWORD_ITERATIONS and AUTH_WORKERS values to put in .env.
+
+Usage:
+    python -m benchmarks.bench_password --target-ms 250 --max-workers 8
+"""
+import argparse
+import os
+import statistics
+import time
+from auth import passwords
+from auth.password_pool import PasswordPool
+
+BENCH_PASSWORD = "bench-password"
+
+# Iteration counts tried while calibrating
+CALIBRATION_ITERATIONS = [100000, 150000, 200000, 300000, 400000, 600000, 800000, 1200000]
+
+def time_hash(iterations, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        passwords.hash_password(BENCH_PASSWORD, iterations=iterations)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def calibrate(target_ms, runs):
+    """Return the largest iteration count whose hash takes at most target_ms"""
+    chosen = passwords.MIN_PASSWORD_ITERATIONS
+    print(f"{'Iterations':>10} {'Hash ms':>9}")
+    for iterations in CALIBRATION_ITERATIONS:
+        elapsed = time_hash(iterations, runs)
+        print(f"{iterations:10,} {elapsed:9.1f}")
+        if elapsed > target_ms:
+            break
+        chosen = iterations
+    return chosen
+
+def pool_throughput(workers, iterations, hashes):
+    """Return hashes per second through a PasswordPool with this many workers"""
+    pool = PasswordPool(workers, iterations)
+    try:
+        # Start every worker before timing
+        for future in [pool.hash_password(BENCH_PASSWORD) for _ in range(workers)]:
+            future.result()
+        started = time.perf_counter()
+        for future in [pool.hash_password(BENCH_PASSWORD) for _ in range(hashes)]:
+            future.result()
+        return hashes / (time.perf_counter() - started)
+    finally:
+        pool.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate password hashing cost for this machine")
+    parser.add_argument("--target-ms", type=float, default=250, help="Longest acceptable time for one hash")
+    parser.add_argument("--runs", type=int, default=3, help="Hashes per iteration count; the median is reported")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1, help="Largest pool size measured")
+    parser.add_argument("--hashes", type=int, default=32, help="Hashes per pool measurement")
+    args = parser.parse_args()
+
+    iterations = calibrate(args.target_ms, args.runs)
+
+    print(f"\n{'Workers':>7} {'Hashes/sec':>11}")
+    best_workers, best_rate = 1, 0
+    for workers in range(1, args.max_workers + 1):
+        rate = pool_throughput(workers, iterations, args.hashes)
+        print(f"{workers:7} {rate:11.1f}")
+        # Only count a worker as worth having if it adds at least 10% throughput
+        if rate > best_rate * 1.1:
+            best_workers, best_rate = workers, rate
+
+    print(f"\nRecommended .env settings for a {args.target_ms:.0f} ms hash:")
+    print(f"PASSWORD_ITERATIONS={iterations}")
+    print(f"AUTH_WORKERS={best_workers}")
+
+if __name__ == "__main__":
+    main()
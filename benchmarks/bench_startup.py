@@ -0,0 +1,86 @@
+"""Benchmark application startup
+
+Runs `python -X importtime -c "import ui.main_window"` and lists the slowest imports
+by cumulative time. Then it times how long a fresh process takes to show
+the login window, and how long each role's dashboard module takes to import
+on first login. Each measurement runs in a new interpreter so nothing is
+already imported. No database is needed.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 5
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_startup
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from auth.user import UserRole
+
+# Shows the login window the way main.py does, then reports the seconds
+# since the interpreter started and whether matplotlib got imported
+LOGIN_WINDOW_SCRIPT = """
+import sys, time
+from PySide6.QtWidgets import QApplication
+app = QApplication(sys.argv)
+from ui.main_window import MainApplication
+window = MainApplication()
+window.show()
+app.processEvents()
+print(time.time() - float(sys.argv[1]), 'matplotlib' in sys.modules)
+"""
+
+# Imports one role's dashboard after the main window, as the first login does
+DASHBOARD_SCRIPT = """
+import sys, time
+from ui.main_window import load_dashboard_class, UserRole
+started = time.perf_counter()
+load_dashboard_class(UserRole(sys.argv[1]))
+print(time.perf_counter() - started, 'matplotlib' in sys.modules)
+"""
+
+def import_times(top):
+    """Return the top slowest imports of the main window as (cumulative ms, self ms, module)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import ui.main_window"],
+                            capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us) / 1000, int(self_us) / 1000, module.rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+def run_script(script, *args):
+    result = subprocess.run([sys.executable, "-c", script, *args], capture_output=True, text=True, check=True)
+    seconds, matplotlib_loaded = result.stdout.split()[-2:]
+    return float(seconds) * 1000, matplotlib_loaded == "True"
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark application startup")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per measurement; the median is reported")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports listed")
+    args = parser.parse_args()
+
+    print("Slowest imports of ui.main_window (python -X importtime):")
+    print(f"{'Cumulative ms':>14} {'Self ms':>9}  Module")
+    for cumulative, own, module in import_times(args.top):
+        print(f"{cumulative:14.1f} {own:9.1f}  {module}")
+
+    # The child gets the launch time on its command line, so the measurement
+    # includes interpreter startup and every import
+    timings = []
+    for _ in range(args.runs):
+        timings.append(run_script(LOGIN_WINDOW_SCRIPT, str(time.time())))
+    print(f"\nTime to login window: {statistics.median(ms for ms, _ in timings):.0f} ms "
+          f"(matplotlib imported: {'yes' if timings[-1][1] else 'no'})")
+
+    print(f"\n{'First login as':<16} {'Dashboard import ms':>20} {'matplotlib':>11}")
+    for role in UserRole:
+        runs = [run_script(DASHBOARD_SCRIPT, role.value) for _ in range(args.runs)]
+        print(f"{role.value:<16} {statistics.median(ms for ms, _ in runs):20.0f} "
+              f"{'yes' if runs[-1][1] else 'no':>11}")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
 import mysql.connector
 from dotenv import load_dotenv
 import os
+import re
+import sys
+import json
+import time
+import atexit
+import datetime
 import platform
+import threading
+from collections import Counter
 
 # Load environment variables from .env file first
 load_dotenv()
@@ -19,6 +27,22 @@ if 'DB_NAME' not in os.environ:
 # Flag to track if we've shown debug information in the current session
 _debug_shown = False
 
+# execute_query calls slower than this (milliseconds) are written to the slow-query log
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+
+# One JSON line per slow query
+SLOW_QUERY_LOG_FILE = os.path.join("settings", "slow_queries.jsonl")
+
+# Upper bounds (milliseconds) of the latency histogram buckets; one more
+# bucket holds everything slower
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+# Set QUERY_REPORT=1 to print the busiest queries when the application exits
+QUERY_REPORT_AT_EXIT = os.environ.get('QUERY_REPORT', '') not in ('', '0')
+
+# Queries listed in a report
+QUERY_REPORT_TOP = 20
+
 def reset_debug_state():
     """Reset the debug state - call this at the start of a new session"""
     global _debug_shown
@@ -117,15 +141,159 @@ def get_db_connection():
         print(f"ERROR - Unexpected error during connection: {e}")
         return None
 
+# String and number literals, lists of placeholders, and the row groups of a
+# multi-row INSERT, which query_fingerprint() collapses
+_QUERY_LITERALS = re.compile(r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|\b\d+(?:\.\d+)?\b""")
+_PLACEHOLDER_LISTS = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))+\s*\)")
+_REPEATED_LISTS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+
+def query_fingerprint(query):
+    """Normalize a query so calls differing only in values, spacing or list lengths match"""
+    fingerprint = _QUERY_LITERALS.sub("?", query)
+    fingerprint = " ".join(fingerprint.split())
+    fingerprint = _PLACEHOLDER_LISTS.sub("(...)", fingerprint)
+    return _REPEATED_LISTS.sub("(...)", fingerprint)
+
+def query_caller():
+    """Return 'path:line function' of the code that called into db_utils"""
+    frame = sys._getframe(1)
+    while frame and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+    if not frame:
+        return "unknown"
+    try:
+        path = os.path.relpath(frame.f_code.co_filename, os.path.dirname(os.path.abspath(__file__)))
+    except ValueError:  # Different drive on Windows
+        path = frame.f_code.co_filename
+    return f"{path}:{frame.f_lineno} {frame.f_code.co_name}"
+
+class QueryStats:
+    """Timings of every execute_query call in this process, grouped by query fingerprint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()  # Running totals for the calling thread, see thread_totals()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.queries = {}
+            self.connections = 0
+            self.connect_ms = 0.0
+            self.since = datetime.datetime.now()
+
+    def record_connect(self, elapsed_ms):
+        self.local.ms = getattr(self.local, 'ms', 0.0) + elapsed_ms
+        with self.lock:
+            self.connections += 1
+            self.connect_ms += elapsed_ms
+
+    def record(self, query, elapsed_ms, rows, caller, error=None):
+        """Add one call, and log it if it was slow or failed"""
+        fingerprint = query_fingerprint(query)
+        self.local.calls = getattr(self.local, 'calls', 0) + 1
+        self.local.ms = getattr(self.local, 'ms', 0.0) + elapsed_ms
+        bucket = next((index for index, bound in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= bound),
+                      len(LATENCY_BUCKETS_MS))
+        with self.lock:
+            entry = self.queries.get(fingerprint)
+            if entry is None:
+                entry = self.queries[fingerprint] = {
+                    'fingerprint': fingerprint, 'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0,
+                    'errors': 0, 'histogram': [0] * (len(LATENCY_BUCKETS_MS) + 1), 'callers': Counter()
+                }
+            entry['calls'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['rows'] += rows or 0
+            entry['errors'] += 1 if error else 0
+            entry['histogram'][bucket] += 1
+            entry['callers'][caller] += 1
+
+        if elapsed_ms >= SLOW_QUERY_MS:
+            self.log_slow_query(fingerprint, elapsed_ms, rows, caller, error)
+
+    def thread_totals(self):
+        """Return (queries, milliseconds including connecting) run on the calling thread so far
+
+        Unaffected by reset(); callers take the difference between two readings.
+        """
+        return getattr(self.local, 'calls', 0), getattr(self.local, 'ms', 0.0)
+
+    def log_slow_query(self, fingerprint, elapsed_ms, rows, caller, error):
+        # Parameters aren't logged; they can hold password hashes and personal details
+        try:
+            os.makedirs(os.path.dirname(SLOW_QUERY_LOG_FILE), exist_ok=True)
+            with open(SLOW_QUERY_LOG_FILE, "a") as f:
+                f.write(json.dumps({
+                    'time': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    'ms': round(elapsed_ms, 1), 'rows': rows, 'caller': caller,
+                    'query': fingerprint, 'error': error
+                }) + "\n")
+        except OSError as e:
+            print(f"Could not write slow query log: {e}")
+
+    def percentile_ms(self, entry, percentile):
+        """Return the histogram bucket bound that percentile of calls finished within"""
+        needed = entry['calls'] * percentile / 100
+        seen = 0
+        for index, count in enumerate(entry['histogram']):
+            seen += count
+            if seen >= needed:
+                return min(LATENCY_BUCKETS_MS[index], entry['max_ms']) if index < len(LATENCY_BUCKETS_MS) else entry['max_ms']
+        return entry['max_ms']
+
+    def top(self, count=QUERY_REPORT_TOP, sort='total_ms'):
+        """Return copies of the count busiest entries, ordered by sort (total_ms, calls, max_ms, rows)"""
+        with self.lock:
+            entries = [dict(entry, callers=Counter(entry['callers'])) for entry in self.queries.values()]
+        entries.sort(key=lambda entry: entry[sort], reverse=True)
+        return entries[:count]
+
+    def report(self, count=QUERY_REPORT_TOP, sort='total_ms'):
+        """Return a text table of the busiest queries"""
+        entries = self.top(count, sort)
+        with self.lock:
+            connections, connect_ms = self.connections, self.connect_ms
+            total_calls = sum(entry['calls'] for entry in self.queries.values())
+        lines = [
+            f"Query statistics since {self.since.strftime('%Y-%m-%d %H:%M:%S')}: {total_calls} queries, "
+            f"{len(self.queries)} distinct, {connections} connections "
+            f"(avg {connect_ms / connections if connections else 0:.1f} ms to connect)",
+            f"{'Calls':>7} {'Total ms':>10} {'Avg ms':>8} {'p95 ms':>8} {'Max ms':>8} {'Rows/call':>9} {'Errors':>6}  Query / top caller"
+        ]
+        for entry in entries:
+            caller, caller_calls = entry['callers'].most_common(1)[0]
+            lines.append(
+                f"{entry['calls']:7} {entry['total_ms']:10.1f} {entry['total_ms'] / entry['calls']:8.1f} "
+                f"{self.percentile_ms(entry, 95):8.0f} {entry['max_ms']:8.1f} {entry['rows'] / entry['calls']:9.1f} "
+                f"{entry['errors']:6}  {entry['fingerprint'][:100]}")
+            lines.append(f"{'':>62}  {caller} ({caller_calls} of {entry['calls']} calls, "
+                         f"{len(entry['callers'])} call sites)")
+        return "\n".join(lines)
+
+query_stats = QueryStats()
+
+def print_query_report(count=QUERY_REPORT_TOP, sort='total_ms'):
+    """Print the busiest queries since startup (or the last query_stats.reset())"""
+    print(query_stats.report(count, sort))
+
+if QUERY_REPORT_AT_EXIT:
+    atexit.register(print_query_report)
+
 def execute_query(query, params=None, fetch=True):
+    caller = query_caller()
     try:
+        started = time.perf_counter()
         connection = get_db_connection()
         if not connection:
             print("Database connection failed. Check your database settings or server status.")
             return None
+        query_stats.record_connect((time.perf_counter() - started) * 1000)
         
         try:
             cursor = connection.cursor(dictionary=True)
+            started = time.perf_counter()
             
             if params:
                 cursor.execute(query, params)
@@ -134,13 +302,17 @@ def execute_query(query, params=None, fetch=True):
                 
             if fetch:
                 result = cursor.fetchall()
+                rows = len(result)
             else:
                 connection.commit()
                 result = cursor.lastrowid
-                
+                rows = cursor.rowcount
+            
+            query_stats.record(query, (time.perf_counter() - started) * 1000, rows, caller)
             return result
         except mysql.connector.Error as err:
-            error_msg = f"Error executing query: {err}"
+            query_stats.record(query, (time.perf_counter() - started) * 1000, 0, caller, str(err))
+            error_msg = f"Error executing query: {err} ({caller})"
             print(error_msg)
             
             connection.rollback()
@@ -249,15 +421,21 @@ def search_menu_items(search_term=None, restaurant_id=None, category=None,
 
 def search_orders(customer_id=None, restaurant_id=None, status=None, 
                  start_date=None, end_date=None, customer_name=None, order_id=None, order_number=None):
-    """Search orders with various filters including customer name, order date, status, and order number"""
+    """Search orders with various filters including customer name, order date, status, and order number
+    
+    Old delivered and cancelled orders live in orders_archive (services/archive.py);
+    it is only searched when the date range and status could match archived orders.
+    Each result has is_archived set to 0 or 1.
+    """
     try:
-        # Basic query with JOIN statements
+        # Basic query with JOIN statements; {orders} and {is_archived} are filled in below
         query = """
         SELECT o.*, 
+               {is_archived} as is_archived,
                c.name as customer_name, 
                r.name as restaurant_name,
                dp.name as delivery_person_name
-        FROM orders o
+        FROM {orders} o
         JOIN customers c ON o.customer_id = c.customer_id
         JOIN restaurants r ON o.restaurant_id = r.restaurant_id
         LEFT JOIN delivery_personnel dp ON o.delivery_person_id = dp.delivery_person_id
@@ -278,12 +456,13 @@ def search_orders(customer_id=None, restaurant_id=None, status=None,
             query += " AND o.delivery_status = %s"
             params.append(status)
             
+        # Compare order_date directly (not DATE(order_date)) so its index can be used
         if start_date:
-            query += " AND DATE(o.order_date) >= %s"
+            query += " AND o.order_date >= %s"
             params.append(start_date)
             
         if end_date:
-            query += " AND DATE(o.order_date) <= %s"
+            query += " AND o.order_date < DATE_ADD(%s, INTERVAL 1 DAY)"
             params.append(end_date)
         
         # Search for customer name or order number/ID
@@ -308,8 +487,11 @@ def search_orders(customer_id=None, restaurant_id=None, status=None,
             
             params.extend([name_pattern, id_val, search_term, order_pattern])
         
+        from services.archive import with_archive
+        query, params = with_archive(query, params, start_date, status)
+        
         # Order by most recent first
-        query += " ORDER BY o.order_date DESC"
+        query += " ORDER BY order_date DESC"
         
         return execute_query(query, params)
     except Exception as e:
@@ -0,0 +1,2 @@
+# Services module
+# This module contains background engines that run alongside the dashboards
\ No newline at end of file
@@ -0,0 +1,290 @@
+import time
+import argparse
+import datetime
+from db_utils import get_db_connection, execute_query
+
+# Hot table -> archive table. Archived orders keep their order_id, so the
+# archive tables hold the same rows the hot tables did.
+ARCHIVE_TABLES = {
+    "orders": "orders_archive",
+    "order_items": "order_items_archive",
+    "ratings": "ratings_archive"
+}
+
+# Only orders in these states are archived; they are never modified again
+ARCHIVE_STATUSES = ('Delivered', 'Cancelled')
+
+# Orders placed longer ago than this are archived
+ARCHIVE_AFTER_DAYS = 90
+
+# Orders moved per transaction, so locks stay short
+ARCHIVE_BATCH_ROWS = 1000
+
+# How long search_orders trusts its cached archive boundary
+ARCHIVE_BOUNDARY_CACHE_SECONDS = 60
+
+# Results of archive_query() kept at once; the cache is emptied when it fills
+ARCHIVE_QUERY_CACHE_ENTRIES = 1000
+
+_boundary_cache = {'value': None, 'version': None, 'read_at': None}
+_hot_columns = {}
+_archive_results = {}  # (query, params) -> (archive version, rows)
+
+def order_table(table, archived=False):
+    """Return the hot table name, or its archive table for archived orders"""
+    return ARCHIVE_TABLES[table] if archived else table
+
+def read_boundary():
+    """Refresh the cached archive boundary if it is older than ARCHIVE_BOUNDARY_CACHE_SECONDS"""
+    now = time.monotonic()
+    if _boundary_cache['read_at'] is None or now - _boundary_cache['read_at'] > ARCHIVE_BOUNDARY_CACHE_SECONDS:
+        # Both columns are indexed, so this reads two index ends
+        result = execute_query("SELECT MAX(order_date) AS newest, MAX(info_update_time) AS version FROM orders_archive")
+        _boundary_cache['value'] = result[0]['newest'] if result else None
+        _boundary_cache['version'] = result[0]['version'] if result else None
+        _boundary_cache['read_at'] = now
+
+def archived_through():
+    """Return the newest order_date in the archive, or None if nothing is archived
+
+    Cached for ARCHIVE_BOUNDARY_CACHE_SECONDS; archive_orders() refreshes it.
+    """
+    read_boundary()
+    return _boundary_cache['value']
+
+def archive_version():
+    """Return when orders were last archived (a value that changes with every batch), or None"""
+    read_boundary()
+    return _boundary_cache['version']
+
+def archive_query(query, params=()):
+    """Run a query that reads only archive tables, cached until more orders are archived
+
+    Archived rows never change, so all-time totals and per-customer lists
+    over the archive are read once instead of on every refresh.
+
+    Returns:
+        list: Copies of the result rows; empty when nothing is archived or the query fails
+    """
+    version = archive_version()
+    if version is None:
+        return []
+    key = (query, tuple(params))
+    cached = _archive_results.get(key)
+    if cached is None or cached[0] != version:
+        rows = execute_query(query, params)
+        if rows is None:
+            return []
+        if len(_archive_results) >= ARCHIVE_QUERY_CACHE_ENTRIES:
+            _archive_results.clear()
+        cached = _archive_results[key] = (version, rows)
+    return [dict(row) for row in cached[1]]
+
+def archive_total(query, params=()):
+    """Return the single value an archive aggregate (SUM, COUNT) selects, or 0"""
+    rows = archive_query(query, params)
+    value = next(iter(rows[0].values()), None) if rows else None
+    return value or 0
+
+def average_rating(column, key_column, key):
+    """Return (average, count) of a ratings column over ratings and ratings_archive
+
+    key_column is restaurant_id or delivery_person_id. The archive side comes
+    from archive_query(), so this is one indexed query on ratings.
+    """
+    aggregate = (f"SELECT SUM({column}) AS total, COUNT({column}) AS count "
+                 f"FROM {{table}} WHERE {key_column} = %s")
+    total = 0.0
+    count = 0
+    for rows in (execute_query(aggregate.format(table="ratings"), (key,)),
+                 archive_query(aggregate.format(table="ratings_archive"), (key,))):
+        if rows and rows[0]['count']:
+            total += float(rows[0]['total'])
+            count += rows[0]['count']
+    return (total / count if count else None), count
+
+def archive_needed(start_date=None, status=None):
+    """Check whether an order search could match archived orders
+
+    Args:
+        start_date (str): Earliest order date searched (yyyy-mm-dd), or None for all time
+        status (str): Status filter, or None for any status
+    """
+    if status and status != "All" and status not in ARCHIVE_STATUSES:
+        return False
+    newest = archived_through()
+    if newest is None:
+        return False
+    if start_date is None:
+        return True
+    if isinstance(start_date, str):
+        try:
+            start_date = datetime.date.fromisoformat(start_date[:10])
+        except ValueError:
+            # Let the database decide what a typed-in date matches
+            return True
+    elif isinstance(start_date, datetime.datetime):
+        start_date = start_date.date()
+    return start_date <= newest.date()
+
+def with_archive(query, params, start_date=None, status=None):
+    """Extend an order listing to archived orders when they could match
+
+    query selects from {orders} and sets {is_archived}. It is filled in for
+    orders and, if archive_needed(start_date, status), UNIONed with the same
+    query over orders_archive. An ORDER BY or LIMIT appended afterwards
+    applies to the combined rows, so it must use output column names
+    (order_time, not o.order_time).
+
+    Returns:
+        tuple: (query, params)
+    """
+    hot_query = query.replace("{orders}", "orders").replace("{is_archived}", "0")
+    if not archive_needed(start_date, status):
+        return hot_query, list(params)
+    archive_query = query.replace("{orders}", "orders_archive").replace("{is_archived}", "1")
+    return f"({hot_query}) UNION ALL ({archive_query})", list(params) * 2
+
+def hot_columns(table):
+    """Return the quoted column list of a hot table, or None if it can't be read"""
+    if table not in _hot_columns:
+        columns = execute_query("""
+            SELECT COLUMN_NAME
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            ORDER BY ORDINAL_POSITION
+        """, (table,))
+        if not columns:
+            return None
+        _hot_columns[table] = ", ".join(f"`{row['COLUMN_NAME']}`" for row in columns)
+    return _hot_columns[table]
+
+def all_rows(table, alias=None, start_date=None):
+    """Return a FROM source covering a table's hot and archived rows
+
+    For date-ranged reports over orders, order_items or ratings. While
+    archive_needed(start_date) is False this is just the hot table, so its
+    indexes are used as before. Otherwise it is the two tables UNIONed over
+    the hot table's columns, named alias (or the table's own name, so
+    unqualified column references keep working). All-time totals should add
+    an archive_total() instead of UNIONing the whole archive.
+    """
+    source = table
+    if archive_needed(start_date):
+        columns = hot_columns(table)
+        if columns:
+            source = (f"(SELECT {columns} FROM {table} "
+                      f"UNION ALL SELECT {columns} FROM {ARCHIVE_TABLES[table]})")
+            alias = alias or table
+    return f"{source} {alias}" if alias else source
+
+def archive_columns(cursor, table):
+    """Return the columns copied from a hot table to its archive table
+
+    These are the columns the two tables share, except the change-tracking
+    column. That column is left to default to the archive time, so
+    incremental backups pick up newly archived rows.
+    """
+    cursor.execute("""
+        SELECT COLUMN_NAME
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY ORDINAL_POSITION
+    """, (ARCHIVE_TABLES[table],))
+    archived = [row[0] for row in cursor.fetchall()]
+    cursor.execute("""
+        SELECT COLUMN_NAME
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    hot = {row[0] for row in cursor.fetchall()}
+    return [column for column in archived if column in hot and column != "info_update_time"]
+
+def archive_orders(older_than_days=ARCHIVE_AFTER_DAYS, batch_rows=ARCHIVE_BATCH_ROWS, progress=None):
+    """Move old delivered/cancelled orders, with their items and ratings, to the archive tables
+
+    Walks orders by primary key in batches of batch_rows. Each batch copies
+    its orders, order_items and ratings to the archive and deletes them from
+    the hot tables in one transaction.
+
+    Args:
+        progress (callable): Called as progress(orders_archived) after each batch;
+            returning False stops after the current batch
+
+    Returns:
+        dict: orders, items, ratings archived and seconds taken
+    """
+    connection = get_db_connection()
+    if not connection:
+        raise ConnectionError("Could not connect to database.")
+
+    started = time.perf_counter()
+    counts = {'orders': 0, 'items': 0, 'ratings': 0}
+    cursor = connection.cursor()
+    try:
+        columns = {table: ", ".join(f"`{column}`" for column in archive_columns(cursor, table))
+                   for table in ARCHIVE_TABLES}
+        cutoff = datetime.datetime.now() - datetime.timedelta(days=older_than_days)
+
+        # The walk stops at the newest order that is old enough
+        cursor.execute("SELECT MAX(order_id) FROM orders WHERE order_date < %s", (cutoff,))
+        last_id = cursor.fetchone()[0]
+        connection.commit()
+
+        next_id = 0
+        while last_id is not None and next_id <= last_id:
+            cursor.execute("""
+                SELECT order_id FROM orders
+                WHERE order_id >= %s AND order_id <= %s
+                  AND delivery_status IN (%s, %s) AND order_date < %s
+                ORDER BY order_id
+                LIMIT %s
+                FOR UPDATE
+            """, (next_id, last_id, *ARCHIVE_STATUSES, cutoff, batch_rows))
+            order_ids = [row[0] for row in cursor.fetchall()]
+            if not order_ids:
+                connection.commit()
+                break
+
+            placeholders = ", ".join(["%s"] * len(order_ids))
+            try:
+                for table, count_key in (("orders", 'orders'), ("order_items", 'items'), ("ratings", 'ratings')):
+                    cursor.execute(f"""
+                        INSERT INTO {ARCHIVE_TABLES[table]} ({columns[table]})
+                        SELECT {columns[table]} FROM {table} WHERE order_id IN ({placeholders})
+                    """, order_ids)
+                    if table != "orders":
+                        counts[count_key] += cursor.rowcount
+                # Children first so this doesn't depend on ON DELETE CASCADE
+                cursor.execute(f"DELETE FROM ratings WHERE order_id IN ({placeholders})", order_ids)
+                cursor.execute(f"DELETE FROM order_items WHERE order_id IN ({placeholders})", order_ids)
+                cursor.execute(f"DELETE FROM orders WHERE order_id IN ({placeholders})", order_ids)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+            counts['orders'] += len(order_ids)
+            next_id = order_ids[-1] + 1
+            print(f"Archived {counts['orders']} orders (through order #{order_ids[-1]})")
+            if progress and progress(counts['orders']) is False:
+                break
+    finally:
+        cursor.close()
+        if connection.is_connected():
+            connection.close()
+        # Let searches see the new boundary straight away
+        _boundary_cache['read_at'] = None
+
+    counts['seconds'] = time.perf_counter() - started
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old delivered and cancelled orders to the archive tables")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="Archive orders older than this many days")
+    parser.add_argument("--batch-rows", type=int, default=ARCHIVE_BATCH_ROWS, help="Orders moved per transaction")
+    args = parser.parse_args()
+
+    result = archive_orders(args.days, args.batch_rows)
+    print(f"Archived {result['orders']} orders, {result['items']} order items and "
+          f"{result['ratings']} ratings in {result['seconds']:.1f} seconds")
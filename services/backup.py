@@ -0,0 +1,1035 @@
+import os
+import gzip
+import json
+import time
+import queue
+import shutil
+import hashlib
+import datetime
+import threading
+from decimal import Decimal
+from pathlib import Path
+from db_utils import get_db_connection
+
+# Rows per multi-row INSERT statement written to the backup
+BACKUP_INSERT_ROWS = 500
+
+# Rows pulled from the server per fetchmany() call
+BACKUP_FETCH_ROWS = 1000
+
+# Size of the file write buffer
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+# Compressed backups are written as <name>.sql.gz with a <name>.sql.gz.manifest.json beside them
+COMPRESSED_SUFFIX = ".sql.gz"
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_FORMAT = 1
+
+# Uncompressed SQL per compressed chunk; a corrupt chunk loses at most this much
+BACKUP_CHUNK_BYTES = 4 * 1024 * 1024
+
+# gzip level 6 is zlib's default speed/size tradeoff
+BACKUP_COMPRESS_LEVEL = 6
+
+# Tables dumped at once, each on its own connection
+BACKUP_WORKERS = 4
+
+# Seconds to wait for every worker to open its snapshot
+SNAPSHOT_TIMEOUT = 60
+
+# High-water marks and primary key ranges of the latest backup chain, kept in the backup directory
+CHAIN_STATE_FILE = "backup_chain.json"
+
+# Held by whichever backup or restore is running against a backup directory
+BACKUP_LOCK_FILE = "backup.lock"
+
+# Columns bumped whenever a row changes. The app only ever inserts into or
+# deletes from the other tables, so their new rows are found by primary key.
+# Archive tables take rows with old primary keys, so they are tracked by archive time.
+CHANGE_COLUMNS = {
+    "users": "info_update_time",
+    "restaurants": "info_update_time",
+    "customers": "info_update_time",
+    "menus": "info_update_time",
+    "delivery_personnel": "info_update_time",
+    "orders": "info_update_time",
+    "cart": "updated_at",
+    "orders_archive": "info_update_time",
+    "order_items_archive": "archived_at",
+    "ratings_archive": "archived_at"
+}
+
+# Incremental backups re-read rows changed this long before the previous
+# high-water mark, so transactions still open during that backup are not missed
+INCREMENTAL_OVERLAP_SECONDS = 300
+
+# Characters that must be escaped inside a MySQL string literal
+_ESCAPES = str.maketrans({
+    "\\": "\\\\",
+    "'": "\\'",
+    "\0": "\\0",
+    "\n": "\\n",
+    "\r": "\\r",
+    "\x1a": "\\Z"
+})
+
+class BackupCancelled(Exception):
+    """Raised when a progress callback asks to stop a backup"""
+
+class BackupBusy(Exception):
+    """Raised when another backup or restore holds the backup directory's lock"""
+
+class BackupLock:
+    """Exclusive lock on a backup directory, across threads and processes
+
+    Manual and scheduled backups and restores hold it while they run, so
+    they never dump tables or rewrite backup_chain.json at the same time.
+    It is an OS lock on BACKUP_LOCK_FILE, so it is released if its holder
+    dies. Use it as a context manager; acquiring raises BackupBusy rather
+    than waiting.
+    """
+
+    def __init__(self, backup_dir):
+        self.backup_dir = backup_dir
+        self._file = None
+
+    def acquire(self):
+        os.makedirs(self.backup_dir or ".", exist_ok=True)
+        lock_file = open(os.path.join(self.backup_dir, BACKUP_LOCK_FILE), 'a+')
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise BackupBusy("Another backup or restore is in progress; try again when it finishes.")
+        self._file = lock_file
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+def manifest_path(backup_file):
+    """Return the manifest path for a compressed backup file"""
+    return f"{backup_file}{MANIFEST_SUFFIX}"
+
+def is_compressed_backup(backup_file):
+    return str(backup_file).endswith(COMPRESSED_SUFFIX)
+
+class PlainBackupWriter:
+    """Writes a backup as a single .sql text file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.chunks = []
+        self._file = open(path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_BYTES)
+
+    def begin_table(self, table):
+        pass
+
+    def end_schema(self):
+        pass
+
+    def write(self, sql):
+        self._file.write(sql)
+
+    def append_part(self, part):
+        """Append a finished part file written by another PlainBackupWriter"""
+        with open(part.path, 'r', encoding='utf-8') as f:
+            shutil.copyfileobj(f, self._file, WRITE_BUFFER_BYTES)
+
+    def close(self):
+        self._file.close()
+
+    def abort(self):
+        """Close and remove the partial backup"""
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class CompressedBackupWriter:
+    """Writes a backup as checksummed gzip chunks plus a JSON manifest
+
+    Each chunk is an independent gzip member holding whole statements for a
+    single table, so the file still decompresses with plain gunzip while a
+    restore can verify every chunk against its SHA-256 in the manifest and
+    skip only the ones that fail. A table's DROP/CREATE statements always get
+    a chunk of their own. write() must only be given complete statements.
+    """
+
+    def __init__(self, path, metadata=None, chunk_bytes=BACKUP_CHUNK_BYTES, level=BACKUP_COMPRESS_LEVEL,
+                 write_manifest=True):
+        self.path = path
+        self.metadata = metadata or {}
+        self.write_manifest = write_manifest
+        self.chunk_bytes = chunk_bytes
+        self.level = level
+        self.chunks = []
+        self._file = open(path, 'wb', buffering=WRITE_BUFFER_BYTES)
+        self._offset = 0
+        self._table = None
+        self._kind = "header"
+        self._pending = []
+        self._pending_bytes = 0
+
+    def begin_table(self, table):
+        self.flush()
+        self._table = table
+        self._kind = "schema"
+
+    def end_schema(self):
+        self.flush()
+        self._kind = "rows"
+
+    def write(self, sql):
+        data = sql.encode('utf-8')
+        self._pending.append(data)
+        self._pending_bytes += len(data)
+        if self._pending_bytes >= self.chunk_bytes:
+            self.flush()
+
+    def flush(self):
+        """Compress the pending statements into a new chunk"""
+        if not self._pending:
+            return
+        raw = b"".join(self._pending)
+        data = gzip.compress(raw, compresslevel=self.level, mtime=0)
+        self._file.write(data)
+        self.chunks.append({
+            'table': self._table,
+            'kind': self._kind,
+            'offset': self._offset,
+            'length': len(data),
+            'raw_bytes': len(raw),
+            'sha256': hashlib.sha256(data).hexdigest()
+        })
+        self._offset += len(data)
+        self._pending = []
+        self._pending_bytes = 0
+
+    def append_part(self, part):
+        """Append a finished part file written by another CompressedBackupWriter
+
+        The part's gzip members are copied as-is and its chunk offsets are
+        rebased onto this file.
+        """
+        self.flush()
+        with open(part.path, 'rb') as f:
+            shutil.copyfileobj(f, self._file, WRITE_BUFFER_BYTES)
+        for chunk in part.chunks:
+            self.chunks.append(dict(chunk, offset=chunk['offset'] + self._offset))
+        self._offset += part._offset
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        if not self.write_manifest:
+            return
+        manifest = dict(self.metadata)
+        manifest.update({
+            'format': MANIFEST_FORMAT,
+            'compression': 'gzip',
+            'file': os.path.basename(self.path),
+            'bytes': self._offset,
+            'chunks': self.chunks
+        })
+        with open(manifest_path(self.path), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+
+    def abort(self):
+        """Close and remove the partial backup and manifest"""
+        self._file.close()
+        for path in (self.path, manifest_path(self.path)):
+            if os.path.exists(path):
+                os.remove(path)
+
+def sql_literal(value):
+    """Render a Python value returned by mysql-connector as a SQL literal"""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float, Decimal)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return f"0x{bytes(value).hex()}" if value else "''"
+    if isinstance(value, datetime.timedelta):
+        # TIME columns come back as timedelta
+        seconds = int(value.total_seconds())
+        sign = "-" if seconds < 0 else ""
+        seconds = abs(seconds)
+        return f"'{sign}{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}'"
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return f"'{value.isoformat(sep=' ') if isinstance(value, datetime.datetime) else value.isoformat()}'"
+    if isinstance(value, set):
+        value = ",".join(sorted(value))
+    return f"'{str(value).translate(_ESCAPES)}'"
+
+def close_cursor(cursor):
+    """Close a cursor that may still have unread rows (e.g. after a cancel)"""
+    try:
+        cursor.close()
+    except Exception:
+        # The connection is discarded by the caller, so unread rows don't matter
+        pass
+
+def list_tables(connection):
+    """Return the base tables of the current database"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SHOW FULL TABLES WHERE Table_type = 'BASE TABLE'")
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def write_table_schema(connection, table, out):
+    """Write DROP/CREATE statements for a table"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SHOW CREATE TABLE `{table}`")
+        create_table_sql = cursor.fetchone()[1]
+    finally:
+        cursor.close()
+    out.write(f"DROP TABLE IF EXISTS `{table}`;\n")
+    out.write(f"{create_table_sql};\n\n")
+
+def write_table_rows(connection, table, out, insert_rows=BACKUP_INSERT_ROWS,
+                     fetch_rows=BACKUP_FETCH_ROWS, on_rows=None, where=None, params=None, verb="INSERT"):
+    """Stream a table's rows into multi-row INSERT statements
+
+    Uses an unbuffered cursor so the server streams the result and only
+    fetch_rows rows are held in memory at a time.
+
+    Args:
+        on_rows (callable): Called as on_rows(rows_written) after each fetch;
+            may raise BackupCancelled
+        where (str): Optional filter for the rows to write, with %s placeholders for params
+        verb (str): INSERT, or REPLACE for rows that may already exist when restored
+
+    Returns:
+        int: Number of rows written
+    """
+    cursor = connection.cursor(buffered=False)
+    total = 0
+    try:
+        query = f"SELECT * FROM `{table}`"
+        if where:
+            query += f" WHERE {where}"
+        cursor.execute(query, params)
+        column_list = ", ".join(f"`{column}`" for column in cursor.column_names)
+        insert_prefix = f"{verb} INTO `{table}` ({column_list}) VALUES\n"
+
+        pending = []
+        while True:
+            rows = cursor.fetchmany(fetch_rows)
+            if not rows:
+                break
+            for row in rows:
+                pending.append(f"({', '.join(sql_literal(value) for value in row)})")
+                if len(pending) >= insert_rows:
+                    out.write(insert_prefix + ",\n".join(pending) + ";\n\n")
+                    pending = []
+            total += len(rows)
+            if on_rows:
+                on_rows(total)
+
+        if pending:
+            out.write(insert_prefix + ",\n".join(pending) + ";\n\n")
+        return total
+    finally:
+        close_cursor(cursor)
+
+def list_tables_by_size(connection):
+    """Return the base tables of the current database, largest first
+
+    Dumping the biggest tables first keeps parallel workers evenly loaded.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT TABLE_NAME
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+            ORDER BY DATA_LENGTH DESC, TABLE_NAME
+        """)
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def begin_snapshot(connection):
+    """Start a read-only repeatable-read transaction pinned to the current state"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+    finally:
+        cursor.close()
+
+def lock_for_snapshot(connection):
+    """Block writes while workers open their snapshots
+
+    Needs the RELOAD privilege; without it the workers still open their
+    snapshots back to back, which is consistent unless a write lands in
+    between.
+
+    Returns:
+        bool: True if the global read lock was taken
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("FLUSH TABLES WITH READ LOCK")
+        return True
+    except Exception as e:
+        print(f"Could not lock tables for a coordinated snapshot ({e}); continuing without the lock")
+        return False
+    finally:
+        cursor.close()
+
+def unlock_tables(connection):
+    cursor = connection.cursor()
+    try:
+        cursor.execute("UNLOCK TABLES")
+    finally:
+        cursor.close()
+
+def dump_table(connection, table, writer, insert_rows, fetch_rows, on_rows):
+    """Write one table's schema and rows; returns the number of rows written"""
+    writer.begin_table(table)
+    write_table_schema(connection, table, writer)
+    writer.end_schema()
+    return write_table_rows(connection, table, writer, insert_rows, fetch_rows, on_rows)
+
+def new_writer(path, compress, metadata=None, write_manifest=True):
+    if compress:
+        return CompressedBackupWriter(path, metadata, write_manifest=write_manifest)
+    return PlainBackupWriter(path)
+
+class ParallelTableDump:
+    """Dumps tables on several connections that share one point-in-time view
+
+    Every worker thread opens its own connection and a consistent snapshot
+    while the coordinator holds a global read lock, so all tables are read
+    as of the same moment. Workers then take tables from a shared queue and
+    write each one to its own part file, which the caller stitches into the
+    final backup in table order.
+    """
+
+    def __init__(self, coordinator, tables, parts_dir, compress, workers, insert_rows, fetch_rows, progress,
+                 previous_states=None):
+        self.coordinator = coordinator
+        self.tables = tables
+        self.parts_dir = parts_dir
+        self.compress = compress
+        self.workers = max(1, min(workers, len(tables)))
+        self.insert_rows = insert_rows
+        self.fetch_rows = fetch_rows
+        self.progress = progress
+        self.previous_states = previous_states or {}
+        self.parts = {}
+        self.states = {}
+        self.rows = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._errors = []
+        self._snapshot_barrier = threading.Barrier(self.workers + 1)
+
+    def _report(self, table, rows):
+        if self._cancel.is_set():
+            raise BackupCancelled()
+        if self.progress is None:
+            return
+        with self._lock:
+            done = len(self.rows)
+            if self.progress(table, done, len(self.tables), rows) is False:
+                self._cancel.set()
+        if self._cancel.is_set():
+            raise BackupCancelled()
+
+    def _worker(self):
+        connection = None
+        try:
+            try:
+                connection = get_db_connection()
+                if not connection:
+                    raise ConnectionError("Could not connect to database for backup.")
+                begin_snapshot(connection)
+            finally:
+                # Always arrive so the coordinator can release the lock
+                self._snapshot_barrier.wait(SNAPSHOT_TIMEOUT)
+
+            while not self._cancel.is_set():
+                try:
+                    index, table = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                suffix = COMPRESSED_SUFFIX if self.compress else ".sql"
+                part = new_writer(os.path.join(self.parts_dir, f"{index:04d}{suffix}"), self.compress,
+                                  write_manifest=False)
+                try:
+                    self._report(table, 0)
+                    rows = dump_table(connection, table, part, self.insert_rows, self.fetch_rows,
+                                      lambda rows, table=table: self._report(table, rows))
+                    state = table_state(connection, table, self.fetch_rows, self.previous_states.get(table))
+                    part.close()
+                except BaseException:
+                    part.abort()
+                    raise
+                with self._lock:
+                    self.parts[table] = part
+                    self.states[table] = state
+                    self.rows[table] = rows
+                print(f"Backed up table '{table}': {rows} rows")
+        except BaseException as e:
+            with self._lock:
+                self._errors.append(e)
+            self._cancel.set()
+        finally:
+            if connection is not None:
+                close_connection(connection)
+
+    def run(self):
+        """Dump every table; raises the first worker error or BackupCancelled"""
+        for index, table in enumerate(self.tables):
+            self._queue.put((index, table))
+
+        locked = lock_for_snapshot(self.coordinator)
+        threads = [threading.Thread(target=self._worker, name=f"backup-worker-{n}", daemon=True)
+                   for n in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            self._snapshot_barrier.wait(SNAPSHOT_TIMEOUT)
+        except threading.BrokenBarrierError:
+            self._cancel.set()
+        finally:
+            if locked:
+                unlock_tables(self.coordinator)
+
+        for thread in threads:
+            thread.join()
+
+        cancelled = [e for e in self._errors if isinstance(e, BackupCancelled)]
+        failures = [e for e in self._errors if not isinstance(e, (BackupCancelled, threading.BrokenBarrierError))]
+        if failures:
+            raise failures[0]
+        if cancelled or self._cancel.is_set():
+            raise BackupCancelled()
+        if self._errors:
+            raise TimeoutError("Backup workers could not open their snapshots in time.")
+
+def server_now(connection):
+    """Return the database server's current time"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT NOW()")
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+def primary_key_column(connection, table):
+    """Return a table's integer key column, else None
+
+    That is its primary key if it is a single integer column, or the
+    auto-increment first column of a composite primary key (as on a
+    partitioned orders table, keyed by (order_id, order_time)).
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT k.COLUMN_NAME, c.DATA_TYPE, c.EXTRA
+            FROM information_schema.KEY_COLUMN_USAGE k
+            JOIN information_schema.COLUMNS c
+                ON c.TABLE_SCHEMA = k.TABLE_SCHEMA AND c.TABLE_NAME = k.TABLE_NAME AND c.COLUMN_NAME = k.COLUMN_NAME
+            WHERE k.TABLE_SCHEMA = DATABASE() AND k.TABLE_NAME = %s AND k.CONSTRAINT_NAME = 'PRIMARY'
+            ORDER BY k.ORDINAL_POSITION
+        """, (table,))
+        columns = cursor.fetchall()
+    finally:
+        cursor.close()
+    if not columns or columns[0][1] not in ("tinyint", "smallint", "mediumint", "int", "bigint"):
+        return None
+    if len(columns) == 1 or "auto_increment" in (columns[0][2] or "").lower():
+        return columns[0][0]
+    return None
+
+def scan_key_ranges(connection, table, pk, fetch_rows=BACKUP_FETCH_ROWS):
+    """Return a table's primary keys as sorted [first, last] runs
+
+    Auto-increment keys with few deletes collapse into a handful of runs, so
+    the key set of a large table stays small enough to keep between backups.
+    """
+    cursor = connection.cursor(buffered=False)
+    ranges = []
+    try:
+        cursor.execute(f"SELECT `{pk}` FROM `{table}` ORDER BY `{pk}`")
+        while True:
+            rows = cursor.fetchmany(fetch_rows)
+            if not rows:
+                break
+            for (key,) in rows:
+                if ranges and key == ranges[-1][1] + 1:
+                    ranges[-1][1] = key
+                else:
+                    ranges.append([key, key])
+        return ranges
+    finally:
+        close_cursor(cursor)
+
+def subtract_ranges(old, new):
+    """Return the keys of old that are not in new, as runs (both sorted and disjoint)"""
+    missing = []
+    j = 0
+    for start, end in old:
+        while j < len(new) and new[j][1] < start:
+            j += 1
+        current = start
+        k = j
+        while k < len(new) and new[k][0] <= end:
+            if new[k][0] > current:
+                missing.append([current, new[k][0] - 1])
+            current = max(current, new[k][1] + 1)
+            k += 1
+        if current <= end:
+            missing.append([current, end])
+    return missing
+
+def key_summary(connection, table, pk):
+    """Return a table's row count and highest key"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*), MAX(`{pk}`) FROM `{table}`")
+        rows, max_pk = cursor.fetchone()
+        return int(rows), max_pk or 0
+    finally:
+        cursor.close()
+
+def table_state(connection, table, fetch_rows=BACKUP_FETCH_ROWS, previous=None):
+    """Capture what the next incremental backup needs to know about a table
+
+    The key runs are only rescanned when the row count or highest key
+    differs from previous, the table's entry in the last chain state;
+    otherwise its runs are reused.
+    """
+    pk = primary_key_column(connection, table)
+    if not pk:
+        return {'pk': None, 'rows': None, 'max_pk': 0, 'ranges': []}
+    rows, max_pk = key_summary(connection, table, pk)
+    if (previous and previous.get('pk') == pk and previous.get('rows') == rows
+            and previous.get('max_pk') == max_pk):
+        ranges = previous['ranges']
+    else:
+        ranges = scan_key_ranges(connection, table, pk, fetch_rows)
+    return {
+        'pk': pk,
+        'rows': rows,
+        'max_pk': max_pk,
+        'ranges': ranges
+    }
+
+def write_tombstones(table, pk, ranges, out, batch=BACKUP_INSERT_ROWS):
+    """Write DELETE statements for rows removed since the previous backup"""
+    for i in range(0, len(ranges), batch):
+        conditions = [f"`{pk}` = {start}" if start == end else f"`{pk}` BETWEEN {start} AND {end}"
+                      for start, end in ranges[i:i + batch]]
+        out.write(f"DELETE FROM `{table}` WHERE {' OR '.join(conditions)};\n\n")
+
+def load_chain_state(backup_dir):
+    """Load the state of the latest backup chain in a directory, or None"""
+    path = os.path.join(backup_dir, CHAIN_STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not read backup chain state: {e}")
+        return None
+
+def save_chain_state(backup_dir, state):
+    path = os.path.join(backup_dir, CHAIN_STATE_FILE)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(temp_path, path)
+
+def close_connection(connection):
+    """Close a connection whose transaction may still be open"""
+    try:
+        if connection.is_connected():
+            connection.close()
+    except Exception:
+        pass
+
+def backup_database(backup_dir, insert_rows=BACKUP_INSERT_ROWS, fetch_rows=BACKUP_FETCH_ROWS,
+                    progress=None, compress=False, workers=1):
+    """Write a full SQL backup of the database
+
+    All tables are read from one consistent snapshot. With workers > 1 the
+    tables are dumped in parallel on separate connections into part files
+    that are joined into the same single-file format afterwards.
+
+    Args:
+        backup_dir (str): Directory for the backup file
+        insert_rows (int): Rows per INSERT statement
+        fetch_rows (int): Rows fetched from the server at a time
+        progress (callable): Called as progress(table, tables_done, table_count, rows)
+            for each table and fetched batch; return False to cancel. With
+            workers > 1 it is called from the worker threads.
+        compress (bool): Write checksummed gzip chunks and a manifest instead of plain SQL
+        workers (int): Number of tables dumped at once
+
+    Returns:
+        dict: path, manifest, tables, rows, chunks, bytes and seconds of the finished backup
+
+    Raises:
+        BackupCancelled: If the progress callback cancelled the backup
+    """
+    start_time = time.perf_counter()
+    backup_dir = Path(backup_dir)
+    os.makedirs(backup_dir, exist_ok=True)
+
+    now = datetime.datetime.now()
+    suffix = COMPRESSED_SUFFIX if compress else ".sql"
+    backup_name = f"food_delivery_backup_{now.strftime('%Y%m%d_%H%M%S')}"
+    backup_file = str(backup_dir / f"{backup_name}{suffix}")
+    parts_dir = str(backup_dir / f"{backup_name}.parts")
+    db_name = os.environ.get('DB_NAME', 'food_delivery')
+
+    connection = get_db_connection()
+    if not connection:
+        raise ConnectionError("Could not connect to database for backup.")
+
+    total_rows = 0
+    writer = None
+    try:
+        tables = list_tables_by_size(connection) if workers > 1 else list_tables(connection)
+        print(f"Backing up {len(tables)} tables to {backup_file}")
+
+        # Read before any snapshot opens, so the mark never runs ahead of the data
+        taken_at = server_now(connection)
+
+        # Key runs of unchanged tables are carried over from the previous chain
+        previous_states = (load_chain_state(backup_dir) or {}).get('tables', {})
+
+        writer = new_writer(backup_file, compress, {
+            'database': db_name,
+            'created': now.isoformat(sep=' ', timespec='seconds'),
+            'type': 'full',
+            'tables': tables
+        })
+        writer.write(f"-- Food Delivery System Database Backup\n")
+        writer.write(f"-- Date: {now.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        writer.write(f"-- Database: {db_name}\n")
+        writer.write("-- Type: full\n\n")
+
+        if workers > 1 and len(tables) > 1:
+            os.makedirs(parts_dir, exist_ok=True)
+            dump = ParallelTableDump(connection, tables, parts_dir, compress, workers,
+                                     insert_rows, fetch_rows, progress, previous_states)
+            dump.run()
+            for table in tables:
+                writer.append_part(dump.parts[table])
+            total_rows = sum(dump.rows.values())
+            states = dump.states
+        else:
+            begin_snapshot(connection)
+            states = {}
+            for i, table in enumerate(tables):
+                def on_rows(rows, table=table, i=i):
+                    if progress and progress(table, i, len(tables), rows) is False:
+                        raise BackupCancelled()
+
+                on_rows(0)
+                rows = dump_table(connection, table, writer, insert_rows, fetch_rows, on_rows)
+                states[table] = table_state(connection, table, fetch_rows, previous_states.get(table))
+                total_rows += rows
+                print(f"Backed up table '{table}': {rows} rows")
+
+        writer.close()
+
+        # Start a new incremental chain from this backup
+        save_chain_state(backup_dir, {
+            'base': os.path.basename(backup_file),
+            'last': os.path.basename(backup_file),
+            'sequence': 0,
+            'taken_at': taken_at.isoformat(sep=' '),
+            'tables': states
+        })
+    except BaseException:
+        # Never leave a partial backup behind
+        if writer:
+            writer.abort()
+        raise
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+        close_connection(connection)
+
+    return {
+        'path': backup_file,
+        'manifest': manifest_path(backup_file) if compress else None,
+        'tables': len(tables),
+        'rows': total_rows,
+        'chunks': len(writer.chunks),
+        'bytes': os.path.getsize(backup_file),
+        'seconds': time.perf_counter() - start_time
+    }
+
+def incremental_backup(backup_dir, insert_rows=BACKUP_INSERT_ROWS, fetch_rows=BACKUP_FETCH_ROWS,
+                       progress=None, compress=False):
+    """Write only what changed since the latest backup in backup_dir
+
+    Rows whose change column moved past the previous high-water mark (or
+    whose primary key is above the previous maximum) are written as REPLACE
+    statements. Deleted rows are found by comparing each table's primary key
+    runs with the ones recorded last time and written as DELETE tombstones;
+    this also catches rows removed by ON DELETE CASCADE, which triggers
+    would miss. Tables created since the last backup are dumped whole.
+
+    Restoring an incremental backup replays its chain: the full backup it
+    is based on, then every incremental up to it (see resolve_backup_chain).
+    Falls back to a full backup when the directory has no chain to extend.
+
+    Returns:
+        dict: Same as backup_database, plus type ('full' or 'incremental')
+    """
+    state = load_chain_state(backup_dir)
+    if not state or not os.path.exists(os.path.join(backup_dir, state['last'])):
+        print("No backup chain to extend; taking a full backup")
+        result = backup_database(backup_dir, insert_rows, fetch_rows, progress, compress)
+        result['type'] = 'full'
+        return result
+
+    start_time = time.perf_counter()
+    now = datetime.datetime.now()
+    suffix = COMPRESSED_SUFFIX if compress else ".sql"
+    backup_file = os.path.join(backup_dir, f"food_delivery_incremental_{now.strftime('%Y%m%d_%H%M%S')}{suffix}")
+    db_name = os.environ.get('DB_NAME', 'food_delivery')
+    sequence = state['sequence'] + 1
+    since = datetime.datetime.fromisoformat(state['taken_at']) - datetime.timedelta(seconds=INCREMENTAL_OVERLAP_SECONDS)
+
+    connection = get_db_connection()
+    if not connection:
+        raise ConnectionError("Could not connect to database for backup.")
+
+    total_rows = 0
+    writer = None
+    try:
+        tables = list_tables(connection)
+        print(f"Backing up changes since {state['taken_at']} to {backup_file}")
+
+        taken_at = server_now(connection)
+        begin_snapshot(connection)
+
+        writer = new_writer(backup_file, compress, {
+            'database': db_name,
+            'created': now.isoformat(sep=' ', timespec='seconds'),
+            'type': 'incremental',
+            'base': state['base'],
+            'previous': state['last'],
+            'sequence': sequence,
+            'tables': tables
+        })
+        writer.write("-- Food Delivery System Incremental Backup\n")
+        writer.write(f"-- Date: {now.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        writer.write(f"-- Database: {db_name}\n")
+        writer.write("-- Type: incremental\n")
+        writer.write(f"-- Base: {state['base']}\n")
+        writer.write(f"-- Previous: {state['last']}\n\n")
+
+        states = {}
+        for i, table in enumerate(tables):
+            def on_rows(rows, table=table, i=i):
+                if progress and progress(table, i, len(tables), rows) is False:
+                    raise BackupCancelled()
+
+            on_rows(0)
+            previous = state['tables'].get(table)
+            if previous is None:
+                # New since the last backup
+                rows = dump_table(connection, table, writer, insert_rows, fetch_rows, on_rows)
+                states[table] = table_state(connection, table, fetch_rows)
+            else:
+                writer.begin_table(table)
+                current = table_state(connection, table, fetch_rows, previous)
+                pk = current['pk']
+                if pk is None or pk != previous['pk']:
+                    # No usable key to track; replace the whole table
+                    writer.write(f"DELETE FROM `{table}`;\n\n")
+                    writer.end_schema()
+                    rows = write_table_rows(connection, table, writer, insert_rows, fetch_rows, on_rows)
+                else:
+                    write_tombstones(table, pk, subtract_ranges(previous['ranges'], current['ranges']), writer, insert_rows)
+                    writer.end_schema()
+                    change_column = CHANGE_COLUMNS.get(table)
+                    if change_column:
+                        where = f"`{change_column}` >= %s OR `{pk}` > %s"
+                        params = (since, previous['max_pk'])
+                    else:
+                        where = f"`{pk}` > %s"
+                        params = (previous['max_pk'],)
+                    rows = write_table_rows(connection, table, writer, insert_rows, fetch_rows, on_rows,
+                                            where=where, params=params, verb="REPLACE")
+                states[table] = current
+            total_rows += rows
+            print(f"Backed up changes to table '{table}': {rows} rows")
+
+        for table in state['tables']:
+            if table not in states:
+                writer.begin_table(table)
+                writer.write(f"DROP TABLE IF EXISTS `{table}`;\n\n")
+
+        writer.close()
+
+        save_chain_state(backup_dir, {
+            'base': state['base'],
+            'last': os.path.basename(backup_file),
+            'sequence': sequence,
+            'taken_at': taken_at.isoformat(sep=' '),
+            'tables': states
+        })
+    except BaseException:
+        if writer:
+            writer.abort()
+        raise
+    finally:
+        close_connection(connection)
+
+    return {
+        'path': backup_file,
+        'manifest': manifest_path(backup_file) if compress else None,
+        'type': 'incremental',
+        'tables': len(tables),
+        'rows': total_rows,
+        'chunks': len(writer.chunks),
+        'bytes': os.path.getsize(backup_file),
+        'seconds': time.perf_counter() - start_time
+    }
+
+def read_backup_info(backup_file):
+    """Return the type, base and previous backup recorded in a backup's header"""
+    if is_compressed_backup(backup_file):
+        manifest = load_manifest(backup_file) or {}
+        return {key: manifest[key] for key in ('type', 'base', 'previous') if key in manifest}
+
+    info = {}
+    with open(backup_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.startswith("-- "):
+                break
+            key, _, value = line[3:].partition(":")
+            info[key.strip().lower()] = value.strip()
+    return info
+
+def resolve_backup_chain(backup_file):
+    """Return the backups to restore, oldest first, to get to backup_file
+
+    A full backup stands alone; an incremental one needs every backup back
+    to its base, which must all be in the same directory.
+    """
+    backup_dir = os.path.dirname(backup_file)
+    chain = [backup_file]
+    info = read_backup_info(backup_file)
+    while info.get('type') == 'incremental':
+        previous = os.path.join(backup_dir, info['previous'])
+        if not os.path.exists(previous) or previous in chain:
+            raise FileNotFoundError(f"Backup '{info['previous']}' needed to restore this incremental backup is missing.")
+        chain.insert(0, previous)
+        info = read_backup_info(previous)
+    return chain
+
+def load_manifest(backup_file):
+    """Load the manifest of a compressed backup, or None if it is missing or unreadable"""
+    try:
+        with open(manifest_path(backup_file), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not read backup manifest: {e}")
+        return None
+    if manifest.get('format') != MANIFEST_FORMAT:
+        print(f"Unsupported backup manifest format: {manifest.get('format')}")
+        return None
+    return manifest
+
+def iter_backup_chunks(backup_file, on_corrupt=None):
+    """Yield the SQL text of a backup one chunk at a time
+
+    Plain .sql backups are read in blocks that may end mid-statement, so
+    callers split statements with a streaming parser (see
+    services.restore.SqlStatementSplitter). Compressed backups are
+    verified chunk by chunk against the manifest; chunks whose checksum or
+    gzip data is bad are skipped and reported through on_corrupt. When a
+    table's schema chunk is bad its row chunks are skipped as well, since
+    they would be loaded into whatever table already exists.
+
+    Args:
+        backup_file (str): Path to a .sql or .sql.gz backup
+        on_corrupt (callable): Called as on_corrupt(chunk, reason) for each skipped chunk
+
+    Yields:
+        tuple: (table, sql) where table is None for the file header
+    """
+    if not is_compressed_backup(backup_file):
+        with open(backup_file, 'r', encoding='utf-8') as f:
+            while True:
+                block = f.read(WRITE_BUFFER_BYTES)
+                if not block:
+                    break
+                yield None, block
+        return
+
+    manifest = load_manifest(backup_file)
+    if manifest is None:
+        raise ValueError("The backup manifest is missing or invalid, so the backup cannot be verified.")
+
+    broken_tables = set()
+    with open(backup_file, 'rb') as f:
+        for chunk in manifest['chunks']:
+            table = chunk['table']
+            if table in broken_tables:
+                if on_corrupt:
+                    on_corrupt(chunk, "schema chunk for this table is corrupt")
+                continue
+
+            f.seek(chunk['offset'])
+            data = f.read(chunk['length'])
+            reason = None
+            if len(data) != chunk['length']:
+                reason = "backup file is truncated"
+            elif hashlib.sha256(data).hexdigest() != chunk['sha256']:
+                reason = "checksum mismatch"
+            else:
+                try:
+                    sql = gzip.decompress(data).decode('utf-8')
+                except (OSError, EOFError, UnicodeDecodeError) as e:
+                    reason = f"could not decompress: {e}"
+
+            if reason:
+                if chunk['kind'] == 'schema':
+                    broken_tables.add(table)
+                if on_corrupt:
+                    on_corrupt(chunk, reason)
+                continue
+            yield table, sql
@@ -0,0 +1,59 @@
+import json
+import os
+
+# Settings saved by the admin dashboard (AdminDashboard.save_settings)
+SETTINGS_FILE = os.path.join("settings", "app_settings.json")
+
+# Defaults mirror the values used by AdminDashboard.reset_settings
+DEFAULT_SETTINGS = {
+    "app_name": "Food Delivery System",
+    "currency": "AED",
+    "timezone": "UTC+4 (UAE)",
+    "delivery_fee": "10.00",
+    "tax_rate": "5.0",
+    "min_order": "25.00",
+    "service_fee": "2.0",
+    "auto_assign": True,
+    "prep_time": "30",
+    "delivery_radius": "10",
+    "cancel_threshold": "15",
+    "backup_path": "backups/",
+    "auto_backup": True,
+    "backup_frequency": "Daily",
+    "backup_compress": True,
+    "backup_retention": "3"
+}
+
+# Settings as last read, with the (modification time, size) of SETTINGS_FILE they came from
+_settings_cache = {'file': None, 'settings': None}
+
+def load_app_settings():
+    """Load saved application settings, falling back to defaults for missing keys
+
+    The file is only re-read after it changes on disk, so pages that check a
+    setting on every refresh cost one stat() call. Returns a copy callers may modify.
+    """
+    try:
+        stat = os.stat(SETTINGS_FILE)
+        file_version = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        file_version = None
+
+    if _settings_cache['settings'] is None or _settings_cache['file'] != file_version:
+        settings = dict(DEFAULT_SETTINGS)
+        try:
+            if file_version is not None:
+                with open(SETTINGS_FILE, "r") as f:
+                    settings.update(json.load(f))
+        except Exception as e:
+            print(f"Error loading settings: {e}")
+        _settings_cache['file'] = file_version
+        _settings_cache['settings'] = settings
+    return dict(_settings_cache['settings'])
+
+def get_float_setting(settings, key):
+    """Read a numeric setting (stored as text by the settings page) as a float"""
+    try:
+        return float(settings.get(key, DEFAULT_SETTINGS.get(key)))
+    except (TypeError, ValueError):
+        return float(DEFAULT_SETTINGS[key])
@@ -0,0 +1,282 @@
+import time
+import argparse
+from db_utils import execute_query, get_db_connection
+from services.config import load_app_settings, get_float_setting
+from services.geo import GeoGrid
+
+# Share of the delivery radius each vehicle class covers; light vehicles
+# (motorbikes, small cars) only get short-range pickups
+VEHICLE_RANGE_FACTORS = {
+    "Light Vehicle": 0.5,
+    "Heavy Vehicle": 1.0
+}
+
+# MySQL named lock (GET_LOCK) held for each dispatch round, so admin
+# dashboards and the command-line dispatcher never run rounds at once
+DISPATCH_LOCK_NAME = "food_delivery.auto_dispatch"
+
+def vehicle_radius_km(vehicle_type, radius_km):
+    """Return the pickup radius allowed for a courier's vehicle type"""
+    for vehicle_class, factor in VEHICLE_RANGE_FACTORS.items():
+        if vehicle_type and vehicle_type.startswith(vehicle_class):
+            return radius_km * factor
+    return radius_km
+
+def match_orders(orders, couriers, radius_km, is_free=None):
+    """Greedily match orders to their nearest free courier
+
+    Orders are handled in the given sequence (oldest first), and each courier
+    receives at most one order per call. Couriers indexed with a vehicle_type
+    only match orders within their vehicle's range.
+
+    Args:
+        orders (list): Dicts with order_id, latitude and longitude (pickup point)
+        couriers (GeoGrid): Index of available couriers
+        radius_km (float): Maximum pickup distance
+        is_free (callable): Optional filter called as is_free(courier_id, data)
+
+    Returns:
+        list: (order_id, delivery_person_id, distance_km) tuples
+    """
+    taken = set()
+
+    def accept(courier_id, data, distance):
+        if courier_id in taken:
+            return False
+        if data and distance > vehicle_radius_km(data.get('vehicle_type'), radius_km):
+            return False
+        return is_free is None or is_free(courier_id, data)
+
+    assignments = []
+    for order in orders:
+        if len(taken) >= len(couriers):
+            break
+        match = couriers.nearest(order['latitude'], order['longitude'], radius_km, accept=accept)
+        if match is None:
+            continue
+        courier_id, distance = match
+        taken.add(courier_id)
+        assignments.append((order['order_id'], courier_id, distance))
+    return assignments
+
+class AutoDispatcher:
+    """Assigns ready orders to the nearest available courier
+
+    Honours the auto_assign and delivery_radius settings from the admin
+    settings page. Courier positions are kept in a GeoGrid that is refreshed
+    incrementally from delivery_personnel.info_update_time, and every tick
+    writes its assignments in a single UPDATE.
+    """
+
+    def __init__(self, batch_size=500, cell_deg=0.01, full_refresh_every=60):
+        self.batch_size = batch_size
+        self.full_refresh_every = full_refresh_every
+        self.couriers = GeoGrid(cell_deg)
+        self._cell_deg = cell_deg
+        self._last_update = None
+        self._ticks = 0
+
+    def refresh_couriers(self):
+        """Sync the courier index with delivery_personnel
+
+        A full reload happens periodically; in between only rows whose
+        info_update_time moved (location or status changes) are re-read.
+        """
+        full = self._last_update is None or self._ticks % self.full_refresh_every == 0
+        query = """
+            SELECT delivery_person_id, latitude, longitude, status, vehicle_type, info_update_time
+            FROM delivery_personnel
+        """
+        params = None
+        if full:
+            query += " WHERE status = 'Available' AND latitude IS NOT NULL AND longitude IS NOT NULL"
+        else:
+            query += " WHERE info_update_time >= %s"
+            params = (self._last_update,)
+
+        rows = execute_query(query, params)
+        if rows is None:
+            return False
+
+        if full:
+            self.couriers = GeoGrid(self._cell_deg)
+
+        for row in rows:
+            courier_id = row['delivery_person_id']
+            if row['status'] == 'Available' and row['latitude'] is not None and row['longitude'] is not None:
+                self.couriers.insert(courier_id, row['latitude'], row['longitude'],
+                                     {'vehicle_type': row['vehicle_type']})
+            else:
+                self.couriers.remove(courier_id)
+            if self._last_update is None or row['info_update_time'] > self._last_update:
+                self._last_update = row['info_update_time']
+
+        if full and self._last_update is None:
+            # Nothing indexed yet; fall back to the server clock for the next delta
+            now = execute_query("SELECT NOW() as now")
+            if now:
+                self._last_update = now[0]['now']
+        return True
+
+    def load_busy_couriers(self):
+        """Return the ids of couriers that already have a delivery in progress"""
+        rows = execute_query("""
+            SELECT DISTINCT delivery_person_id
+            FROM orders
+            WHERE delivery_status = 'On Delivery' AND delivery_person_id IS NOT NULL
+        """)
+        return {row['delivery_person_id'] for row in rows or []}
+
+    def load_ready_orders(self):
+        """Load unassigned orders waiting for pickup, oldest first"""
+        return execute_query("""
+            SELECT o.order_id, o.order_date, r.latitude, r.longitude
+            FROM orders o
+            JOIN restaurants r ON o.restaurant_id = r.restaurant_id
+            WHERE o.delivery_status = 'On Delivery'
+            AND o.delivery_person_id IS NULL
+            AND r.latitude IS NOT NULL AND r.longitude IS NOT NULL
+            ORDER BY o.order_date ASC
+            LIMIT %s
+        """, (self.batch_size,)) or []
+
+    def assign(self, assignments):
+        """Write a batch of assignments in one statement
+
+        The delivery_person_id IS NULL guard leaves orders alone if a courier
+        accepted them manually since they were read, and the NOT EXISTS check
+        skips couriers who picked up another delivery in the meantime.
+
+        Returns:
+            list: The assignments actually written, or None if the update failed
+        """
+        if not assignments:
+            return []
+        case_sql = " ".join(["WHEN %s THEN %s"] * len(assignments))
+        placeholders = ", ".join(["%s"] * len(assignments))
+        case_params = []
+        for order_id, courier_id, _ in assignments:
+            case_params.extend([order_id, courier_id])
+        order_ids = [order_id for order_id, _, _ in assignments]
+        courier_ids = [courier_id for _, courier_id, _ in assignments]
+        # MySQL can't read the table being updated in a subquery, so busy
+        # couriers are collected in a derived table (DISTINCT keeps it materialized)
+        query = f"""
+            UPDATE orders
+            SET delivery_person_id = CASE order_id {case_sql} END,
+                assigned_time = NOW()
+            WHERE order_id IN ({placeholders})
+            AND delivery_person_id IS NULL
+            AND delivery_status = 'On Delivery'
+            AND NOT EXISTS (
+                SELECT 1 FROM (
+                    SELECT DISTINCT delivery_person_id
+                    FROM orders
+                    WHERE delivery_status = 'On Delivery'
+                    AND delivery_person_id IN ({placeholders})
+                ) busy
+                WHERE busy.delivery_person_id = CASE orders.order_id {case_sql} END
+            )
+        """
+        params = case_params + order_ids + courier_ids + case_params
+        if execute_query(query, params, fetch=False) is None:
+            return None
+
+        rows = execute_query(f"""
+            SELECT order_id, delivery_person_id FROM orders
+            WHERE order_id IN ({placeholders})
+        """, order_ids)
+        if rows is None:
+            return None
+        written = {row['order_id']: row['delivery_person_id'] for row in rows}
+        return [assignment for assignment in assignments
+                if written.get(assignment[0]) == assignment[1]]
+
+    def acquire_round_lock(self):
+        """Take the dispatch lock, returning its connection or None if another dispatcher holds it
+
+        The lock belongs to the connection, so it stays open until
+        release_round_lock(); it is also freed if this process dies.
+        """
+        connection = get_db_connection()
+        if not connection:
+            return None
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT GET_LOCK(%s, 0)", (DISPATCH_LOCK_NAME,))
+            acquired = cursor.fetchone()[0] == 1
+        except Exception as e:
+            print(f"Could not take the dispatch lock: {e}")
+            acquired = False
+        finally:
+            cursor.close()
+        if not acquired:
+            connection.close()
+            return None
+        return connection
+
+    def release_round_lock(self, connection):
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (DISPATCH_LOCK_NAME,))
+            cursor.fetchall()
+            cursor.close()
+        finally:
+            connection.close()
+
+    def tick(self, settings=None):
+        """Run one dispatch round
+
+        Skipped when another dashboard or the command-line dispatcher is
+        running a round.
+
+        Returns:
+            list: Assignments written this tick (empty when auto-assign is off)
+        """
+        settings = settings or load_app_settings()
+        if not settings.get("auto_assign"):
+            return []
+
+        lock = self.acquire_round_lock()
+        if lock is None:
+            return []
+        try:
+            return self.dispatch_round(get_float_setting(settings, "delivery_radius"))
+        finally:
+            self.release_round_lock(lock)
+
+    def dispatch_round(self, radius_km):
+        """Match ready orders to free couriers and write the assignments"""
+        self.refresh_couriers()
+        self._ticks += 1
+
+        orders = self.load_ready_orders()
+        if not orders or not len(self.couriers):
+            return []
+
+        busy = self.load_busy_couriers()
+        assignments = match_orders(
+            orders, self.couriers, radius_km,
+            is_free=lambda courier_id, data: courier_id not in busy
+        )
+
+        return self.assign(assignments) or []
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Automatically assign ready orders to nearby couriers")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between dispatch ticks")
+    parser.add_argument("--batch-size", type=int, default=500, help="Maximum orders matched per tick")
+    args = parser.parse_args()
+
+    dispatcher = AutoDispatcher(batch_size=args.batch_size)
+    print(f"Auto-dispatch running every {args.interval:.1f}s (Ctrl+C to stop)")
+    try:
+        while True:
+            started = time.perf_counter()
+            assigned = dispatcher.tick()
+            if assigned:
+                elapsed = (time.perf_counter() - started) * 1000
+                print(f"Assigned {len(assigned)} orders in {elapsed:.1f} ms")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("Auto-dispatch stopped")
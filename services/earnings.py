@@ -0,0 +1,126 @@
+from decimal import Decimal
+from db_utils import get_db_connection, execute_query
+
+# Couriers earn a share of each delivered order's total
+COURIER_COMMISSION_RATE = Decimal("0.10")
+
+# Rows shown per page of earnings history
+EARNINGS_PAGE_SIZE = 50
+
+def calculate_commission(order_total, rate=COURIER_COMMISSION_RATE):
+    """Return the courier's earning for an order total, rounded to fils"""
+    return (Decimal(str(order_total)) * rate).quantize(Decimal("0.01"))
+
+def mark_order_delivered(order_id, delivered_at=None):
+    """Mark an order as delivered and credit the courier's earnings ledger
+
+    The status change, the append to courier_earnings and the running totals
+    on delivery_personnel are committed together, so the ledger never drifts
+    from the orders table. Orders that are already delivered are left alone,
+    which keeps repeated clicks from crediting twice, and an order delivered
+    again after leaving Delivered keeps its original ledger row.
+
+    Args:
+        order_id (int): The order to complete
+        delivered_at (datetime): Delivery time, defaults to NOW()
+
+    Returns:
+        bool: True if the order is delivered after the call
+    """
+    connection = get_db_connection()
+    if not connection:
+        print("Database connection failed. Check your database settings or server status.")
+        return False
+
+    cursor = None
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT order_id, delivery_person_id, restaurant_id, total_amount, delivery_status
+            FROM orders
+            WHERE order_id = %s
+            FOR UPDATE
+        """, (order_id,))
+        order = cursor.fetchone()
+
+        if not order:
+            connection.rollback()
+            return False
+
+        if order['delivery_status'] == 'Delivered':
+            connection.rollback()
+            return True
+
+        cursor.execute("""
+            UPDATE orders
+            SET delivery_status = 'Delivered',
+                actual_delivery_time = COALESCE(%s, NOW()),
+                payment_status = 'Paid'
+            WHERE order_id = %s
+        """, (delivered_at, order_id))
+
+        # An order can go back from Delivered (e.g. a status correction) and be
+        # delivered again; it was credited the first time, and order_id is
+        # unique in the ledger, so it is only credited once
+        credited = False
+        if order['delivery_person_id']:
+            cursor.execute("SELECT earning_id FROM courier_earnings WHERE order_id = %s FOR UPDATE", (order_id,))
+            credited = cursor.fetchone() is not None
+
+        if order['delivery_person_id'] and not credited:
+            amount = calculate_commission(order['total_amount'])
+            cursor.execute("""
+                INSERT INTO courier_earnings
+                    (delivery_person_id, order_id, restaurant_id, order_total, commission_rate, amount, earned_at)
+                VALUES (%s, %s, %s, %s, %s, %s, COALESCE(%s, NOW()))
+            """, (order['delivery_person_id'], order_id, order['restaurant_id'],
+                  order['total_amount'], COURIER_COMMISSION_RATE, amount, delivered_at))
+            cursor.execute("""
+                UPDATE delivery_personnel
+                SET total_deliveries = total_deliveries + 1,
+                    total_earnings = total_earnings + %s
+                WHERE delivery_person_id = %s
+            """, (amount, order['delivery_person_id']))
+
+        connection.commit()
+        return True
+    except Exception as e:
+        print(f"Error completing delivery for order {order_id}: {e}")
+        connection.rollback()
+        return False
+    finally:
+        if cursor:
+            cursor.close()
+        if connection.is_connected():
+            connection.close()
+
+def get_earnings_summary(delivery_person_id):
+    """Return running totals for a courier (total_earnings, total_deliveries, avg_rating)"""
+    result = execute_query("""
+        SELECT total_earnings, total_deliveries, avg_rating
+        FROM delivery_personnel
+        WHERE delivery_person_id = %s
+    """, (delivery_person_id,))
+    return result[0] if result else None
+
+def get_earnings_page(delivery_person_id, before_earning_id=None, page_size=EARNINGS_PAGE_SIZE):
+    """Return one page of a courier's earnings, newest first
+
+    Pages are keyed on earning_id (the ledger is append-only), so each call
+    reads page_size rows from the (delivery_person_id, earning_id) index
+    no matter how long the history is. Pass the last earning_id of the
+    previous page as before_earning_id to continue.
+    """
+    query = """
+        SELECT ce.earning_id, ce.order_id, ce.earned_at, ce.amount, r.name as restaurant_name
+        FROM courier_earnings ce
+        LEFT JOIN restaurants r ON ce.restaurant_id = r.restaurant_id
+        WHERE ce.delivery_person_id = %s
+    """
+    params = [delivery_person_id]
+    if before_earning_id is not None:
+        query += " AND ce.earning_id < %s"
+        params.append(before_earning_id)
+    query += " ORDER BY ce.earning_id DESC LIMIT %s"
+    params.append(page_size)
+    return execute_query(query, params)
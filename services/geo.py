@@ -0,0 +1,156 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two coordinates in kilometres"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+    d_lat = lat2 - lat1
+    d_lng = lng2 - lng1
+    a = math.sin(d_lat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(d_lng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def bounding_box(lat, lng, radius_km):
+    """Return (min_lat, max_lat, min_lng, max_lng) enclosing a circle of radius_km
+
+    Used as a cheap prefilter before the exact haversine check.
+    """
+    lat = float(lat)
+    lng = float(lng)
+    d_lat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(min(89.0, abs(lat) + d_lat)))
+    d_lng = radius_km / (KM_PER_DEGREE_LAT * max(cos_lat, 0.01))
+    return lat - d_lat, lat + d_lat, lng - d_lng, lng + d_lng
+
+def haversine_sql(lat_column, lng_column, lat, lng):
+    """Return (expression, params) for haversine_km from a point to a row's columns in MySQL
+
+    Lets a radius check run in the WHERE/HAVING clause, before any LIMIT.
+    """
+    expression = (f"2 * %s * ASIN(LEAST(1, SQRT("
+                  f"POW(SIN(RADIANS({lat_column} - %s) / 2), 2) + "
+                  f"COS(RADIANS(%s)) * COS(RADIANS({lat_column})) * POW(SIN(RADIANS({lng_column} - %s) / 2), 2))))")
+    return expression, [EARTH_RADIUS_KM, float(lat), float(lat), float(lng)]
+
+class GeoGrid:
+    """Spatial index of points bucketed into a fixed lat/lng grid
+
+    Each key (e.g. a delivery_person_id) lives in exactly one cell. Nearest
+    lookups search rings of cells outward from the query point and stop as
+    soon as no unsearched cell can hold a closer point.
+    """
+
+    def __init__(self, cell_deg=0.01):
+        self.cell_deg = cell_deg
+        self._cells = {}
+        self._points = {}
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, key):
+        return key in self._points
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def insert(self, key, lat, lng, data=None):
+        """Add a point or move an existing one"""
+        if key in self._points:
+            self.remove(key)
+        lat = float(lat)
+        lng = float(lng)
+        cell = self._cell(lat, lng)
+        self._cells.setdefault(cell, set()).add(key)
+        self._points[key] = (lat, lng, data)
+
+    def remove(self, key):
+        """Remove a point if present"""
+        point = self._points.pop(key, None)
+        if point is None:
+            return
+        cell = self._cell(point[0], point[1])
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(key)
+            if not members:
+                del self._cells[cell]
+
+    def get(self, key):
+        """Return (lat, lng, data) for a key, or None"""
+        return self._points.get(key)
+
+    def _ring(self, row, col, ring):
+        if ring == 0:
+            yield row, col
+            return
+        for c in range(col - ring, col + ring + 1):
+            yield row - ring, c
+            yield row + ring, c
+        for r in range(row - ring + 1, row + ring):
+            yield r, col - ring
+            yield r, col + ring
+
+    def _ring_limits(self, lat, radius_km):
+        # The narrowest cell edge inside the search area bounds how far each ring is
+        d_lat = radius_km / KM_PER_DEGREE_LAT
+        cos_lat = math.cos(math.radians(min(89.0, abs(lat) + d_lat)))
+        cell_km = self.cell_deg * KM_PER_DEGREE_LAT * max(cos_lat, 0.01)
+        max_ring = int(math.ceil(radius_km / cell_km)) + 1
+        return cell_km, max_ring
+
+    def nearest(self, lat, lng, radius_km, accept=None):
+        """Find the closest point within radius_km
+
+        Args:
+            accept (callable): Optional filter called as accept(key, data, distance_km)
+
+        Returns:
+            tuple: (key, distance_km), or None if nothing qualifies
+        """
+        lat = float(lat)
+        lng = float(lng)
+        row, col = self._cell(lat, lng)
+        cell_km, max_ring = self._ring_limits(lat, radius_km)
+
+        best_key = None
+        best_distance = None
+        for ring in range(max_ring + 1):
+            # Every point in this ring is at least (ring - 1) cells away
+            if best_distance is not None and (ring - 1) * cell_km > best_distance:
+                break
+            for cell in self._ring(row, col, ring):
+                for key in self._cells.get(cell, ()):
+                    p_lat, p_lng, data = self._points[key]
+                    distance = haversine_km(lat, lng, p_lat, p_lng)
+                    if distance > radius_km:
+                        continue
+                    if best_distance is not None and distance >= best_distance:
+                        continue
+                    if accept is not None and not accept(key, data, distance):
+                        continue
+                    best_key = key
+                    best_distance = distance
+
+        if best_key is None:
+            return None
+        return best_key, best_distance
+
+    def within(self, lat, lng, radius_km):
+        """Return [(key, distance_km)] for all points within radius_km, closest first"""
+        lat = float(lat)
+        lng = float(lng)
+        row, col = self._cell(lat, lng)
+        _, max_ring = self._ring_limits(lat, radius_km)
+
+        matches = []
+        for ring in range(max_ring + 1):
+            for cell in self._ring(row, col, ring):
+                for key in self._cells.get(cell, ()):
+                    p_lat, p_lng, _ = self._points[key]
+                    distance = haversine_km(lat, lng, p_lat, p_lng)
+                    if distance <= radius_km:
+                        matches.append((key, distance))
+        matches.sort(key=lambda match: match[1])
+        return matches
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import datetime
+from db_utils import get_db_connection
+from services.partitions import partition_jobs, maintain_order_partitions
+
+# One JSON line per maintenance run
+MAINTENANCE_LOG_FILE = os.path.join("settings", "maintenance_runs.jsonl")
+
+# OPTIMIZE (rebuild) a table once this share of its space is free pages...
+FRAGMENTATION_RATIO = 0.10
+
+# ...and the free space is at least this big; InnoDB keeps a few MB free in any tablespace
+FRAGMENTATION_MIN_BYTES = 8 * 1024 * 1024
+
+# ANALYZE a table once this share of its rows changed since its statistics were last
+# calculated. InnoDB recalculates on its own at 10%, so this catches tables between
+# automatic updates and tables with persistent statistics auto-recalc turned off.
+ANALYZE_CHANGE_RATIO = 0.05
+
+# Minimum changed rows before a table is worth analyzing
+ANALYZE_MIN_CHANGED_ROWS = 1000
+
+# Runs of the latency probe per table; the fastest is recorded
+LATENCY_PROBE_RUNS = 3
+
+# Rows the latency probe reads from the start of a table's primary key; enough
+# to span several pages without scanning big tables
+LATENCY_PROBE_ROWS = 1000
+
+class MaintenanceCancelled(Exception):
+    """Raised when a progress callback asks to stop a maintenance run"""
+
+def use_fresh_table_stats(connection):
+    """Make information_schema.TABLES report current sizes instead of cached ones (MySQL 8)"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SET SESSION information_schema_stats_expiry = 0")
+    except Exception:
+        # Older servers don't cache these statistics
+        pass
+    finally:
+        cursor.close()
+
+def table_sizes(connection, tables=None):
+    """Return {table: {rows, data_bytes, index_bytes, free_bytes}} from information_schema"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT TABLE_NAME, TABLE_ROWS, DATA_LENGTH, INDEX_LENGTH, DATA_FREE
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+        """)
+        sizes = {}
+        for name, rows, data_bytes, index_bytes, free_bytes in cursor.fetchall():
+            if tables is None or name in tables:
+                sizes[name] = {
+                    'rows': int(rows or 0),
+                    'data_bytes': int(data_bytes or 0),
+                    'index_bytes': int(index_bytes or 0),
+                    'free_bytes': int(free_bytes or 0)
+                }
+        return sizes
+    finally:
+        cursor.close()
+
+def modified_row_counts(connection):
+    """Return {table: rows changed since its statistics were last calculated}
+
+    Reads InnoDB's MODIFIED_COUNTER, which needs the PROCESS privilege.
+    Returns None when it is unavailable.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT NAME, MODIFIED_COUNTER
+            FROM information_schema.INNODB_TABLESTATS
+            WHERE NAME LIKE CONCAT(DATABASE(), '/%')
+        """)
+        return {name.split('/', 1)[1]: int(modified or 0) for name, modified in cursor.fetchall()}
+    except Exception as e:
+        print(f"Row change statistics unavailable: {e}")
+        return None
+    finally:
+        cursor.close()
+
+def plan_maintenance(connection, force=False):
+    """Choose the tables that need OPTIMIZE or ANALYZE, and any partitions to add
+
+    Args:
+        force (bool): Optimize every table, as the old "Optimize Database" button did
+
+    Returns:
+        list: Jobs as {table, action, reason}, biggest tables first, then partition jobs
+    """
+    use_fresh_table_stats(connection)
+    sizes = table_sizes(connection)
+    modified = modified_row_counts(connection)
+
+    jobs = []
+    for table, size in sorted(sizes.items(), key=lambda item: -(item[1]['data_bytes'] + item[1]['index_bytes'])):
+        used = size['data_bytes'] + size['index_bytes']
+        free = size['free_bytes']
+        if force:
+            jobs.append({'table': table, 'action': 'OPTIMIZE', 'reason': "requested"})
+        elif free >= FRAGMENTATION_MIN_BYTES and free >= used * FRAGMENTATION_RATIO:
+            jobs.append({
+                'table': table,
+                'action': 'OPTIMIZE',
+                'reason': f"{free / 1024 / 1024:.1f} MB free ({free / max(used, 1):.0%} of {used / 1024 / 1024:.1f} MB)"
+            })
+        elif modified is not None:
+            changed = modified.get(table, 0)
+            if changed >= ANALYZE_MIN_CHANGED_ROWS and changed >= size['rows'] * ANALYZE_CHANGE_RATIO:
+                jobs.append({
+                    'table': table,
+                    'action': 'ANALYZE',
+                    'reason': f"{changed} rows changed since last analyzed (~{size['rows']} rows)"
+                })
+    jobs.extend(partition_jobs(connection))
+    return jobs
+
+def probe_latency(connection, table, runs=LATENCY_PROBE_RUNS, rows=LATENCY_PROBE_ROWS):
+    """Return the fastest of several short primary-key range reads on a table, in milliseconds
+
+    Each read stops after rows rows, so probing stays cheap on large tables.
+    """
+    cursor = connection.cursor()
+    try:
+        best = None
+        for _ in range(runs):
+            started = time.perf_counter()
+            cursor.execute(f"SELECT * FROM `{table}` LIMIT %s", (rows,))
+            cursor.fetchall()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+    finally:
+        cursor.close()
+
+def run_table_command(connection, action, table):
+    """Run OPTIMIZE/ANALYZE TABLE and return the server's final status message"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"{action} TABLE `{table}`")
+        # Rows are (Table, Op, Msg_type, Msg_text); InnoDB OPTIMIZE adds a "recreate + analyze" note first
+        messages = cursor.fetchall()
+        errors = [row[3] for row in messages if row[2] == 'error']
+        if errors:
+            raise RuntimeError("; ".join(errors))
+        return messages[-1][3] if messages else "OK"
+    finally:
+        cursor.close()
+
+def append_maintenance_log(entry, log_file=MAINTENANCE_LOG_FILE):
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    with open(log_file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + "\n")
+
+def run_maintenance(jobs=None, progress=None, force=False, log_file=MAINTENANCE_LOG_FILE):
+    """Run maintenance jobs on one connection, recording size and latency before and after
+
+    Args:
+        jobs (list): Jobs from plan_maintenance; planned here when None
+        progress (callable): Called as progress(table, action, jobs_done, job_count);
+            returning False stops before the next job
+        force (bool): Passed to plan_maintenance when jobs is None
+
+    Returns:
+        dict: started, seconds and a result per job with before/after sizes and latency (ms)
+    """
+    connection = get_db_connection()
+    if not connection:
+        raise ConnectionError("Could not connect to database.")
+
+    started = datetime.datetime.now()
+    results = []
+    try:
+        # OPTIMIZE/ANALYZE commit implicitly; autocommit keeps the probes out of a long-lived snapshot
+        connection.autocommit = True
+        if jobs is None:
+            jobs = plan_maintenance(connection, force)
+        else:
+            use_fresh_table_stats(connection)
+
+        for i, job in enumerate(jobs):
+            table, action = job['table'], job['action']
+            if progress and progress(table, action, i, len(jobs)) is False:
+                raise MaintenanceCancelled()
+
+            result = dict(job)
+            result['before'] = table_sizes(connection, [table]).get(table)
+            result['latency_before_ms'] = round(probe_latency(connection, table), 2)
+            job_started = time.perf_counter()
+            try:
+                if action == 'PARTITION':
+                    cursor = connection.cursor()
+                    try:
+                        added = maintain_order_partitions(cursor)
+                    finally:
+                        cursor.close()
+                    result['message'] = f"Added {', '.join(added)}" if added else "OK"
+                else:
+                    result['message'] = run_table_command(connection, action, table)
+                result['status'] = 'ok'
+            except Exception as e:
+                result['message'] = str(e)
+                result['status'] = 'failed'
+            result['seconds'] = round(time.perf_counter() - job_started, 2)
+            result['after'] = table_sizes(connection, [table]).get(table)
+            result['latency_after_ms'] = round(probe_latency(connection, table), 2)
+            results.append(result)
+            print(f"{action} TABLE {table}: {result['message']} in {result['seconds']:.1f}s, "
+                  f"scan {result['latency_before_ms']:.1f} -> {result['latency_after_ms']:.1f} ms")
+
+        if progress:
+            progress("", "", len(jobs), len(jobs))
+    finally:
+        summary = {
+            'started': started.isoformat(sep=' ', timespec='seconds'),
+            'seconds': round((datetime.datetime.now() - started).total_seconds(), 2),
+            'jobs': results
+        }
+        if results:
+            append_maintenance_log(summary, log_file)
+        if connection.is_connected():
+            connection.close()
+    return summary
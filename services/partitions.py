@@ -0,0 +1,203 @@
+import datetime
+from db_utils import get_db_connection
+
+# Monthly RANGE partitions on orders.order_time. Opt-in: see
+# `python setup_database.py --partition-orders`.
+PARTITIONED_TABLE = "orders"
+PARTITION_COLUMN = "order_time"
+
+# Catch-all for orders past the newest monthly partition
+FUTURE_PARTITION = "p_future"
+
+# Monthly partitions kept ready beyond the current month
+PARTITION_MONTHS_AHEAD = 3
+
+def month_start(value):
+    return datetime.date(value.year, value.month, 1)
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+def partition_month(name):
+    """Return the month a pYYYYMM partition holds, or None for other partitions"""
+    try:
+        return datetime.datetime.strptime(name, "p%Y%m").date()
+    except ValueError:
+        return None
+
+def partition_definition(month):
+    # UNIX_TIMESTAMP() is the only function RANGE partitioning accepts on a TIMESTAMP column
+    return (f"PARTITION {partition_name(month)} "
+            f"VALUES LESS THAN (UNIX_TIMESTAMP('{add_months(month, 1):%Y-%m-%d} 00:00:00'))")
+
+def monthly_partitions_sql(first_month, last_month):
+    """Return the PARTITION BY clause for first_month..last_month plus the catch-all"""
+    definitions = []
+    month = first_month
+    while month <= last_month:
+        definitions.append(partition_definition(month))
+        month = add_months(month, 1)
+    definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+    return (f"PARTITION BY RANGE (UNIX_TIMESTAMP({PARTITION_COLUMN})) (\n    "
+            + ",\n    ".join(definitions) + "\n)")
+
+def list_partitions(cursor, table=PARTITIONED_TABLE):
+    """Return a table's partition names in order; empty if it is not partitioned"""
+    cursor.execute("""
+        SELECT PARTITION_NAME
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+def order_foreign_keys(cursor):
+    """Return (table, constraint) for every foreign key on or referencing orders"""
+    cursor.execute("""
+        SELECT DISTINCT TABLE_NAME, CONSTRAINT_NAME
+        FROM information_schema.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME IS NOT NULL
+          AND (TABLE_NAME = %s OR REFERENCED_TABLE_NAME = %s)
+    """, (PARTITIONED_TABLE, PARTITIONED_TABLE))
+    return cursor.fetchall()
+
+def order_indexes(cursor):
+    """Return {index name: (unique, [columns in order])} for the orders table"""
+    cursor.execute("""
+        SELECT INDEX_NAME, NON_UNIQUE, COLUMN_NAME
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    """, (PARTITIONED_TABLE,))
+    indexes = {}
+    for name, non_unique, column in cursor.fetchall():
+        indexes.setdefault(name, (not int(non_unique), []))[1].append(column)
+    return indexes
+
+def partition_column_nullable(cursor):
+    cursor.execute("""
+        SELECT IS_NULLABLE
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (PARTITIONED_TABLE, PARTITION_COLUMN))
+    row = cursor.fetchone()
+    return bool(row) and row[0] == 'YES'
+
+def partition_orders(cursor, months_ahead=PARTITION_MONTHS_AHEAD):
+    """Convert orders to monthly partitions on order_time; does nothing if already partitioned
+
+    MySQL does not allow foreign keys on or to a partitioned table, and
+    every unique key must include the partitioning column. So this drops the
+    foreign keys between orders and customers, restaurants,
+    delivery_personnel, order_items and ratings. The primary key becomes
+    (order_id, order_time), and order_number becomes a plain index. The app
+    already deletes order_items before their orders. Orders of a deleted
+    courier keep a dangling delivery_person_id where ON DELETE SET NULL used
+    to clear it.
+
+    DDL commits as it goes, so each step checks whether an earlier, failed
+    run already did it; a failed conversion can simply be run again.
+    """
+    if list_partitions(cursor):
+        print("orders is already partitioned")
+        return False
+
+    if partition_column_nullable(cursor):
+        cursor.execute(f"SELECT 1 FROM {PARTITIONED_TABLE} WHERE {PARTITION_COLUMN} IS NULL LIMIT 1")
+        if cursor.fetchall():
+            print(f"Some orders have no {PARTITION_COLUMN}; set it on every order before partitioning")
+            return False
+
+    for table, constraint in order_foreign_keys(cursor):
+        cursor.execute(f"ALTER TABLE `{table}` DROP FOREIGN KEY `{constraint}`")
+        print(f"Dropped foreign key {table}.{constraint}")
+
+    cursor.execute(f"SELECT MIN({PARTITION_COLUMN}) FROM {PARTITIONED_TABLE}")
+    oldest = cursor.fetchone()[0]
+    this_month = month_start(datetime.date.today())
+    first_month = month_start(oldest) if oldest else this_month
+
+    indexes = order_indexes(cursor)
+    changes = []
+    if partition_column_nullable(cursor):
+        changes.append(f"MODIFY {PARTITION_COLUMN} TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP")
+    if PARTITION_COLUMN not in indexes.get('PRIMARY', (True, []))[1]:
+        changes.append(f"DROP PRIMARY KEY, ADD PRIMARY KEY (order_id, {PARTITION_COLUMN})")
+    for name, (unique, columns) in indexes.items():
+        if unique and name != 'PRIMARY' and PARTITION_COLUMN not in columns:
+            changes.append(f"DROP INDEX `{name}`")
+    if 'idx_orders_order_number' not in indexes:
+        changes.append("ADD INDEX idx_orders_order_number (order_number)")
+    if changes:
+        cursor.execute(f"ALTER TABLE {PARTITIONED_TABLE} " + ", ".join(changes))
+
+    cursor.execute(f"ALTER TABLE {PARTITIONED_TABLE} "
+                   + monthly_partitions_sql(first_month, add_months(this_month, months_ahead)))
+    print(f"Partitioned {PARTITIONED_TABLE} by month from {first_month:%Y-%m}")
+    return True
+
+def maintain_order_partitions(cursor, months_ahead=PARTITION_MONTHS_AHEAD, today=None):
+    """Add the monthly partitions needed over the next months_ahead months
+
+    New months are split off the catch-all partition, which is normally empty,
+    so this is a quick metadata change.
+
+    Returns:
+        list: Names of the partitions added
+    """
+    partitions = list_partitions(cursor)
+    if not partitions:
+        return []
+    months = [month for month in map(partition_month, partitions) if month]
+    last_month = max(months) if months else add_months(month_start(today or datetime.date.today()), -1)
+    target = add_months(month_start(today or datetime.date.today()), months_ahead)
+
+    new_months = []
+    month = add_months(last_month, 1)
+    while month <= target:
+        new_months.append(month)
+        month = add_months(month, 1)
+    if not new_months:
+        return []
+
+    definitions = [partition_definition(month) for month in new_months]
+    definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+    cursor.execute(f"ALTER TABLE {PARTITIONED_TABLE} REORGANIZE PARTITION {FUTURE_PARTITION} INTO (\n    "
+                   + ",\n    ".join(definitions) + "\n)")
+    return [partition_name(month) for month in new_months]
+
+def partition_jobs(connection, months_ahead=PARTITION_MONTHS_AHEAD):
+    """Return a maintenance job for orders if it is partitioned and short of future partitions"""
+    cursor = connection.cursor()
+    try:
+        partitions = list_partitions(cursor)
+    finally:
+        cursor.close()
+    if not partitions:
+        return []
+    months = [month for month in map(partition_month, partitions) if month]
+    target = add_months(month_start(datetime.date.today()), months_ahead)
+    if months and max(months) >= target:
+        return []
+    return [{
+        'table': PARTITIONED_TABLE,
+        'action': 'PARTITION',
+        'reason': f"monthly partitions needed through {target:%Y-%m}"
+    }]
+
+if __name__ == "__main__":
+    connection = get_db_connection()
+    if not connection:
+        print("Could not connect to database.")
+    else:
+        cursor = connection.cursor()
+        try:
+            added = maintain_order_partitions(cursor)
+            print(f"Added partitions: {', '.join(added)}" if added else "Order partitions are up to date")
+        finally:
+            cursor.close()
+            connection.close()
@@ -0,0 +1,229 @@
+import os
+import csv
+import json
+import time
+import argparse
+from db_utils import get_db_connection
+from auth.user import UserRole
+from auth.password_pool import PasswordPool
+
+# Users inserted per transaction, as one multi-row INSERT per table
+PROVISION_BATCH_ROWS = 500
+
+# Columns each role's profile row is created with, and the values used when
+# a record leaves them out (the same ones User.register uses)
+PROFILE_TABLES = {
+    UserRole.CUSTOMER: ("customers", ["name", "phone", "address", "email"]),
+    UserRole.RESTAURANT: ("restaurants", ["name", "address", "contact_number", "cuisine_type", "rating",
+                                          "latitude", "longitude"]),
+    UserRole.DELIVERY: ("delivery_personnel", ["name", "phone", "status", "vehicle_type",
+                                               "latitude", "longitude"])
+}
+PROFILE_DEFAULTS = {
+    UserRole.CUSTOMER: {"phone": "", "address": ""},
+    UserRole.RESTAURANT: {"name": "Your Restaurant", "address": "", "contact_number": "",
+                          "cuisine_type": "Other", "rating": 0.0},
+    UserRole.DELIVERY: {"phone": "", "status": "Available", "vehicle_type": "Light Vehicle - Automatic"}
+}
+
+# Record fields that fill a differently named profile column
+PROFILE_ALIASES = {"contact_number": "phone"}
+
+def read_user_records(path):
+    """Read users to provision from a .csv file (with a header row) or a .jsonl file
+
+    Each record needs username, email, password and role (customer,
+    restaurant, delivery or admin). Optional fields fill the profile: name,
+    phone, address, and cuisine_type, vehicle_type, latitude, longitude where
+    the role has them. Empty CSV cells count as missing.
+
+    Returns:
+        list: (line number, record dict) pairs
+    """
+    records = []
+    with open(path, newline="", encoding="utf-8") as file:
+        if path.lower().endswith(".csv"):
+            reader = csv.DictReader(file)
+            for record in reader:
+                records.append((reader.line_num, {key.strip(): value.strip() for key, value in record.items()
+                                                  if key and value and value.strip()}))
+        else:
+            for line_number, line in enumerate(file, 1):
+                if line.strip():
+                    records.append((line_number, json.loads(line)))
+    return records
+
+def validate_records(records):
+    """Check required fields and roles, and drop usernames or emails repeated in the file
+
+    Repeats are found ignoring case, as the users table's unique indexes do.
+
+    Returns:
+        tuple: (valid records, list of (line number, problem))
+    """
+    valid, problems = [], []
+    seen_usernames, seen_emails = set(), set()
+    roles = {role.value: role for role in UserRole}
+    for line_number, record in records:
+        missing = [field for field in ("username", "email", "password", "role") if not record.get(field)]
+        if missing:
+            problems.append((line_number, f"missing {', '.join(missing)}"))
+        elif not all(isinstance(record[field], str) for field in ("username", "email", "password")):
+            problems.append((line_number, "username, email and password must be text"))
+        elif str(record["role"]).lower() not in roles:
+            problems.append((line_number, f"unknown role '{record['role']}'"))
+        elif record["username"].casefold() in seen_usernames or record["email"].casefold() in seen_emails:
+            problems.append((line_number, "username or email repeated in file"))
+        else:
+            seen_usernames.add(record["username"].casefold())
+            seen_emails.add(record["email"].casefold())
+            valid.append(dict(record, role=roles[str(record["role"]).lower()]))
+    return valid, problems
+
+def existing_accounts(cursor, records):
+    """Return the usernames and the emails among records that are already registered
+
+    Returned casefolded: MySQL compares them case-insensitively, so
+    'Bob@x.com' in the table also rules out 'bob@x.com' in the file.
+
+    Returns:
+        tuple: (set of taken usernames, set of taken emails)
+    """
+    if not records:
+        return set(), set()
+    usernames = [record["username"] for record in records]
+    emails = [record["email"] for record in records]
+    cursor.execute(f"""
+        SELECT username, email FROM users
+        WHERE username IN ({", ".join(["%s"] * len(usernames))})
+           OR email IN ({", ".join(["%s"] * len(emails))})
+    """, usernames + emails)
+    taken_usernames, taken_emails = set(), set()
+    for username, email in cursor.fetchall():
+        taken_usernames.add(username.casefold())
+        taken_emails.add(email.casefold())
+    return taken_usernames, taken_emails
+
+def profile_values(record, user_id):
+    """Return the profile row for a record, filling defaults like User.register does"""
+    role = record["role"]
+    table, columns = PROFILE_TABLES[role]
+    defaults = dict(PROFILE_DEFAULTS[role], name=PROFILE_DEFAULTS[role].get("name", record["username"]),
+                    email=record["email"])
+    values = [user_id]
+    for column in columns:
+        value = record.get(column, record.get(PROFILE_ALIASES.get(column, column)))
+        values.append(value if value not in (None, "") else defaults.get(column))
+    return values
+
+def insert_users(cursor, records):
+    """Insert users and their role profiles with one multi-row INSERT per table
+
+    Each record must already carry its password_hash. Runs on the caller's
+    cursor and does not commit.
+
+    Returns:
+        dict: username -> new user_id
+    """
+    if not records:
+        return {}
+    cursor.execute(f"""
+        INSERT INTO users (username, email, password_hash, role, created_at)
+        VALUES {", ".join(["(%s, %s, %s, %s, NOW())"] * len(records))}
+    """, [value for record in records
+          for value in (record["username"], record["email"], record["password_hash"], record["role"].value)])
+
+    # Auto-increment ids of a multi-row INSERT aren't guaranteed to be
+    # consecutive, so read them back by the unique username
+    usernames = [record["username"] for record in records]
+    cursor.execute(f"SELECT user_id, username FROM users WHERE username IN ({', '.join(['%s'] * len(usernames))})",
+                   usernames)
+    user_ids = {username: user_id for user_id, username in cursor.fetchall()}
+
+    for role, (table, columns) in PROFILE_TABLES.items():
+        rows = [profile_values(record, user_ids[record["username"]]) for record in records if record["role"] == role]
+        if not rows:
+            continue
+        placeholders = "(" + ", ".join(["%s"] * (len(columns) + 1)) + ")"
+        cursor.execute(f"""
+            INSERT INTO {table} (user_id, {", ".join(columns)})
+            VALUES {", ".join([placeholders] * len(rows))}
+        """, [value for row in rows for value in row])
+    return user_ids
+
+def provision_users(records, batch_rows=PROVISION_BATCH_ROWS, workers=None, progress=None):
+    """Create users and their role profiles in bulk
+
+    Passwords are hashed in a process pool. While one batch is inserted, the
+    next batch's passwords are already hashing. Each batch is one transaction,
+    and users whose username or email already exists are skipped, so a failed
+    run can simply be repeated.
+
+    Args:
+        records (list): Validated records, see validate_records()
+        workers (int): Hashing processes; defaults to the number of CPUs
+        progress (callable): Called as progress(users_created) after each batch
+
+    Returns:
+        dict: created, skipped and seconds taken
+    """
+    connection = get_db_connection()
+    if not connection:
+        raise ConnectionError("Could not connect to database.")
+
+    started = time.perf_counter()
+    counts = {'created': 0, 'skipped': 0}
+    pool = PasswordPool(workers or os.cpu_count() or 1)
+    cursor = connection.cursor()
+    batches = [records[start:start + batch_rows] for start in range(0, len(records), batch_rows)]
+
+    def prepare(batch):
+        # Skip existing accounts, then start hashing the rest
+        taken_usernames, taken_emails = existing_accounts(cursor, batch)
+        connection.commit()
+        new = [record for record in batch
+               if record["username"].casefold() not in taken_usernames
+               and record["email"].casefold() not in taken_emails]
+        counts['skipped'] += len(batch) - len(new)
+        return [(record, pool.hash_password(record["password"])) for record in new]
+
+    try:
+        pending = prepare(batches[0]) if batches else []
+        for index in range(len(batches)):
+            current = pending
+            pending = prepare(batches[index + 1]) if index + 1 < len(batches) else []
+            ready = [dict(record, password_hash=future.result()) for record, future in current]
+            try:
+                insert_users(cursor, ready)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            counts['created'] += len(ready)
+            if progress:
+                progress(counts['created'])
+    finally:
+        pool.shutdown(wait=False)
+        cursor.close()
+        if connection.is_connected():
+            connection.close()
+
+    counts['seconds'] = time.perf_counter() - started
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create users and their profiles in bulk from a CSV or JSONL file")
+    parser.add_argument("path", help="A .csv file with a header row, or a .jsonl file with one user per line")
+    parser.add_argument("--batch-rows", type=int, default=PROVISION_BATCH_ROWS, help="Users inserted per transaction")
+    parser.add_argument("--workers", type=int, help="Password hashing processes (default: number of CPUs)")
+    args = parser.parse_args()
+
+    records, problems = validate_records(read_user_records(args.path))
+    for line_number, problem in problems:
+        print(f"Line {line_number}: {problem}, skipped")
+
+    result = provision_users(records, args.batch_rows, args.workers,
+                             lambda created: print(f"Created {created}/{len(records)} users"))
+    rate = result['created'] / result['seconds'] if result['seconds'] else 0
+    print(f"Created {result['created']} users ({result['skipped']} already existed, {len(problems)} invalid) "
+          f"in {result['seconds']:.1f} seconds, {rate:.1f} users/sec")
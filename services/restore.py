@@ -0,0 +1,505 @@
+import os
+import re
+import time
+import queue
+import threading
+from db_utils import get_db_connection
+from services.backup import (iter_backup_chunks, resolve_backup_chain, load_manifest,
+                             is_compressed_backup, close_connection, close_cursor)
+
+# Statements executed per transaction while restoring
+RESTORE_COMMIT_STATEMENTS = 200
+
+# SQL text executed per transaction while restoring
+RESTORE_COMMIT_BYTES = 16 * 1024 * 1024
+
+# Characters of a failed statement shown in the log
+STATEMENT_PREVIEW_CHARS = 100
+
+# Tables loaded at once by a parallel restore, each on its own connection
+RESTORE_WORKERS = 4
+
+# Statements waiting per parallel restore worker; bounds memory while the reader runs ahead
+RESTORE_QUEUE_STATEMENTS = 32
+
+# Patterns for recognising backup statements and CREATE TABLE definitions
+_TABLE_STATEMENT = re.compile(
+    r"(?:DROP TABLE IF EXISTS|CREATE TABLE|INSERT INTO|REPLACE INTO|DELETE FROM|ALTER TABLE)\s+`([^`]+)`",
+    re.IGNORECASE
+)
+_ROW_STATEMENT = re.compile(r"(?:INSERT|REPLACE)\s", re.IGNORECASE)
+_CREATE_TABLE = re.compile(r"CREATE TABLE\s", re.IGNORECASE)
+_SECONDARY_INDEX = re.compile(r"(?:KEY|INDEX|FULLTEXT|SPATIAL)\s", re.IGNORECASE)
+_FOREIGN_KEY = re.compile(r"(?:CONSTRAINT\s+`[^`]*`\s+)?FOREIGN KEY", re.IGNORECASE)
+_INDEX_COLUMNS = re.compile(r"KEY\s*(?:`[^`]*`\s*)?\(([^)]*(?:\([^)]*\)[^)]*)*)\)", re.IGNORECASE)
+_QUOTED_NAME = re.compile(r"`([^`]+)`")
+
+class RestoreCancelled(Exception):
+    """Raised when a progress callback asks to stop a restore"""
+
+class SqlStatementSplitter:
+    """Incrementally splits SQL text into statements
+
+    Text can be fed in pieces of any size; each statement is returned as
+    soon as its terminating semicolon arrives. Semicolons inside quoted
+    strings, quoted identifiers and comments are ignored and backslash
+    escapes are honoured, so a row containing ';' followed by a newline
+    no longer cuts its INSERT in two. Line comments are dropped; block
+    comments are kept since MySQL gives /*! ... */ meaning.
+    """
+    _SPECIAL = re.compile(r"[;'\"`#/-]")
+    # A complete quoted string, written so matching stays linear
+    _STRING = {
+        "'": re.compile(r"'[^'\\]*(?:\\.[^'\\]*)*'", re.DOTALL),
+        '"': re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+    }
+    _QUOTE_END = {
+        "'": re.compile(r"['\\]"),
+        '"': re.compile(r'["\\]'),
+        "`": re.compile(r"`")
+    }
+    _BLOCK = "/*"
+    _LINE = "--"
+
+    def __init__(self):
+        self._parts = []
+        self._pending = ""
+        self._state = None
+
+    def _take_statement(self, statements):
+        statement = "".join(self._parts).strip()
+        self._parts = []
+        if statement:
+            statements.append(statement)
+
+    def feed(self, text):
+        """Add text and return the statements it completes"""
+        buf = self._pending + text
+        self._pending = ""
+        statements = []
+        pos = 0
+        end = len(buf)
+        # Text from start up to the scan position belongs to the current statement
+        start = 0
+        cut = end
+
+        while pos < end:
+            state = self._state
+            if state is None:
+                match = self._SPECIAL.search(buf, pos)
+                if match is None:
+                    break
+                i = match.start()
+                char = buf[i]
+                if char == ";":
+                    self._parts.append(buf[start:i])
+                    self._take_statement(statements)
+                    pos = start = i + 1
+                elif char == "'" or char == '"':
+                    string = self._STRING[char].match(buf, i)
+                    if string:
+                        pos = string.end()
+                    else:
+                        # The string continues in the next piece
+                        self._state = char
+                        pos = i + 1
+                elif char == "`":
+                    close = buf.find("`", i + 1)
+                    if close >= 0:
+                        pos = close + 1
+                    else:
+                        self._state = char
+                        pos = i + 1
+                elif char == "#":
+                    self._parts.append(buf[start:i])
+                    self._state = self._LINE
+                    pos = start = i + 1
+                else:
+                    # Need the following characters to tell comments from operators
+                    lookahead = 3 if char == "-" else 2
+                    if i + lookahead > end:
+                        self._pending = buf[i:]
+                        cut = i
+                        break
+                    if char == "-" and buf[i + 1] == "-" and buf[i + 2] in " \t\r\n":
+                        self._parts.append(buf[start:i])
+                        self._state = self._LINE
+                        pos = start = i + 2
+                    elif char == "/" and buf[i + 1] == "*":
+                        self._state = self._BLOCK
+                        pos = i + 2
+                    else:
+                        pos = i + 1
+            elif state == self._LINE:
+                i = buf.find("\n", pos)
+                if i < 0:
+                    pos = start = end
+                    break
+                # Keep the newline so the text around the comment stays separated
+                self._state = None
+                pos = start = i
+            elif state == self._BLOCK:
+                i = buf.find("*/", pos)
+                if i < 0:
+                    # Keep a trailing '*' back in case the next piece starts with '/'
+                    if buf.endswith("*"):
+                        self._pending = "*"
+                        cut = end - 1
+                    break
+                self._state = None
+                pos = i + 2
+            else:
+                match = self._QUOTE_END[state].search(buf, pos)
+                if match is None:
+                    break
+                i = match.start()
+                if buf[i] == "\\":
+                    if i + 1 >= end:
+                        self._pending = buf[i:]
+                        cut = i
+                        break
+                    pos = i + 2
+                else:
+                    self._state = None
+                    pos = i + 1
+
+        if start < cut:
+            self._parts.append(buf[start:cut])
+        return statements
+
+    def finish(self):
+        """Return the final statement if the text did not end with a semicolon"""
+        self._parts.append(self._pending)
+        self._pending = ""
+        self._state = None
+        statements = []
+        self._take_statement(statements)
+        return statements
+
+def backup_sql_size(backup_file):
+    """Return the uncompressed size of a backup's SQL text"""
+    if is_compressed_backup(backup_file):
+        manifest = load_manifest(backup_file) or {}
+        return sum(chunk['raw_bytes'] for chunk in manifest.get('chunks', []))
+    return os.path.getsize(backup_file)
+
+def statement_preview(statement):
+    if len(statement) > STATEMENT_PREVIEW_CHARS:
+        return statement[:STATEMENT_PREVIEW_CHARS - 3] + "..."
+    return statement
+
+def statement_table(statement):
+    """Return the table a backup statement writes to, or None"""
+    match = _TABLE_STATEMENT.match(statement)
+    return match.group(1) if match else None
+
+def count_rows(statement):
+    """Count the rows in a multi-row INSERT/REPLACE written by services.backup
+
+    Backups put every row on its own line, and newlines inside values are
+    escaped, so each row starts with a newline followed by '('.
+    """
+    if _ROW_STATEMENT.match(statement):
+        return statement.count("\n(") or 1
+    return 0
+
+def defer_secondary_indexes(create_sql):
+    """Strip secondary indexes from a CREATE TABLE so they can be built after loading
+
+    Indexes that a foreign key relies on, unique keys and the primary key are
+    left in place.
+
+    Returns:
+        tuple: (create_sql, index_definitions)
+    """
+    lines = create_sql.split("\n")
+    closing = next((i for i in range(len(lines) - 1, 0, -1) if lines[i].lstrip().startswith(")")), None)
+    if closing is None:
+        return create_sql, []
+
+    definitions = [line.strip().rstrip(",") for line in lines[1:closing]]
+    foreign_keys = [_index_columns(definition) for definition in definitions
+                    if _FOREIGN_KEY.match(definition)]
+
+    kept = []
+    deferred = []
+    for definition in definitions:
+        if _SECONDARY_INDEX.match(definition):
+            columns = _index_columns(definition)
+            if not any(columns[:len(fk_columns)] == fk_columns for fk_columns in foreign_keys):
+                deferred.append(definition)
+                continue
+        kept.append(definition)
+
+    if not deferred:
+        return create_sql, []
+    body = ",\n".join(f"  {definition}" for definition in kept)
+    return "\n".join([lines[0], body] + lines[closing:]), deferred
+
+def _index_columns(definition):
+    match = _INDEX_COLUMNS.search(definition)
+    if not match:
+        return []
+    return _QUOTED_NAME.findall(match.group(1))
+
+class StatementRunner:
+    """Executes restore statements on one connection with batched commits
+
+    Autocommit, foreign key checks and unique checks are off for the
+    session. A statement that fails is logged and skipped.
+    """
+
+    def __init__(self, connection, commit_statements=RESTORE_COMMIT_STATEMENTS, commit_bytes=RESTORE_COMMIT_BYTES):
+        self.connection = connection
+        self.commit_statements = commit_statements
+        self.commit_bytes = commit_bytes
+        self.executed = 0
+        self.skipped = 0
+        self.commits = 0
+        self.rows = 0
+        self._batch_statements = 0
+        self._batch_bytes = 0
+        connection.autocommit = False
+        self.cursor = connection.cursor()
+        self.cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        self.cursor.execute("SET UNIQUE_CHECKS = 0")
+
+    def execute(self, statement):
+        try:
+            self.cursor.execute(statement)
+            self.executed += 1
+            self.rows += count_rows(statement)
+        except Exception as e:
+            print(f"ERROR executing statement: {e}")
+            print(f"Failed statement: {statement_preview(statement)}")
+            self.skipped += 1
+        self._batch_statements += 1
+        self._batch_bytes += len(statement)
+        if self._batch_statements >= self.commit_statements or self._batch_bytes >= self.commit_bytes:
+            self.commit()
+
+    def commit(self):
+        self.connection.commit()
+        self.commits += 1
+        self._batch_statements = 0
+        self._batch_bytes = 0
+
+    def rollback(self):
+        self.connection.rollback()
+
+    def finish(self):
+        """Commit the last batch and turn the checks back on"""
+        self.commit()
+        self.cursor.execute("SET UNIQUE_CHECKS = 1")
+        self.cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+    def close(self):
+        close_cursor(self.cursor)
+        close_connection(self.connection)
+
+class ParallelTableLoader:
+    """Loads the tables of one backup file concurrently
+
+    The calling thread reads and splits the backup and routes each statement
+    to the worker that owns its table, so every table's statements still run
+    in order on one connection while different tables load side by side.
+    Secondary indexes are stripped from each CREATE TABLE and added back
+    with a single ALTER TABLE once the table's rows are in, which is much
+    cheaper than maintaining them row by row.
+    """
+
+    _END = object()
+
+    def __init__(self, workers, commit_statements, commit_bytes):
+        self.workers = workers
+        self.commit_statements = commit_statements
+        self.commit_bytes = commit_bytes
+        self.runners = []
+        self._queues = [queue.Queue(maxsize=RESTORE_QUEUE_STATEMENTS) for _ in range(workers)]
+        self._threads = []
+        self._owners = {}
+        self._deferred = [dict() for _ in range(workers)]
+        self._errors = []
+        self._cancel = threading.Event()
+
+    def start(self):
+        for n in range(self.workers):
+            connection = get_db_connection()
+            if not connection:
+                self.close()
+                raise ConnectionError("Could not connect to database for restore.")
+            self.runners.append(StatementRunner(connection, self.commit_statements, self.commit_bytes))
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._worker, args=(n,), name=f"restore-worker-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, statement):
+        """Queue a statement on the worker that owns its table"""
+        table = statement_table(statement)
+        if table not in self._owners:
+            self._owners[table] = len(self._owners) % self.workers
+        self._queues[self._owners[table]].put(statement)
+
+    def _worker(self, n):
+        runner = self.runners[n]
+        deferred = self._deferred[n]
+        while True:
+            statement = self._queues[n].get()
+            if statement is self._END:
+                break
+            if self._cancel.is_set():
+                # Keep draining so the reader never blocks on a full queue
+                continue
+            try:
+                if _CREATE_TABLE.match(statement):
+                    statement, indexes = defer_secondary_indexes(statement)
+                    if indexes:
+                        deferred[statement_table(statement)] = indexes
+                runner.execute(statement)
+            except BaseException as e:
+                self._errors.append(e)
+                self._cancel.set()
+
+        if self._cancel.is_set():
+            runner.rollback()
+            return
+        try:
+            runner.commit()
+            for table, indexes in deferred.items():
+                print(f"Building {len(indexes)} secondary indexes on '{table}'")
+                runner.execute(f"ALTER TABLE `{table}` " + ", ".join(f"ADD {index}" for index in indexes))
+            runner.finish()
+        except BaseException as e:
+            self._errors.append(e)
+
+    @property
+    def executed(self):
+        return sum(runner.executed for runner in self.runners)
+
+    @property
+    def rows(self):
+        return sum(runner.rows for runner in self.runners)
+
+    def finish(self, cancel=False):
+        """Wait for the workers; raises the first worker error"""
+        if cancel:
+            self._cancel.set()
+        for q in self._queues:
+            q.put(self._END)
+        for thread in self._threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+    def close(self):
+        for runner in self.runners:
+            runner.close()
+
+def _restore_file(path, submit, on_corrupt, report):
+    """Split one backup file and hand each statement to submit"""
+    print(f"Restoring {path}")
+    splitter = SqlStatementSplitter()
+    for _, text in iter_backup_chunks(path, on_corrupt=on_corrupt):
+        for statement in splitter.feed(text):
+            submit(statement)
+        report(len(text))
+    for statement in splitter.finish():
+        submit(statement)
+
+def restore_backup(backup_file, progress=None, on_corrupt=None, workers=1,
+                   commit_statements=RESTORE_COMMIT_STATEMENTS, commit_bytes=RESTORE_COMMIT_BYTES):
+    """Restore a backup, streaming it statement by statement
+
+    The backup (and, for incremental backups, the rest of its chain) is read
+    in pieces and split with SqlStatementSplitter, so memory use does not
+    grow with the dump size. Statements run with autocommit, foreign key
+    checks and unique checks off, and are committed every commit_statements
+    statements or commit_bytes of SQL. A statement that fails is logged and
+    skipped, as before.
+
+    With workers > 1 the full backup at the start of the chain is loaded by
+    ParallelTableLoader; incremental backups after it are replayed in order
+    on a single connection.
+
+    Args:
+        backup_file (str): Backup to restore (.sql or .sql.gz)
+        progress (callable): Called as progress(bytes_done, bytes_total, statements, rows)
+            after each piece of the backup is read; return False to cancel
+        on_corrupt (callable): Passed to iter_backup_chunks for skipped compressed chunks
+        workers (int): Tables loaded at once
+
+    Returns:
+        dict: files, statements, skipped, rows, commits, bytes and seconds of the restore
+
+    Raises:
+        RestoreCancelled: If the progress callback cancelled the restore
+    """
+    start_time = time.perf_counter()
+    chain = resolve_backup_chain(backup_file)
+    if len(chain) > 1:
+        print(f"Restoring backup chain: {', '.join(os.path.basename(path) for path in chain)}")
+    bytes_total = sum(backup_sql_size(path) for path in chain)
+
+    runners = []
+    done = {'bytes': 0}
+
+    def report(text_bytes, loader=None):
+        done['bytes'] += text_bytes
+        statements = sum(runner.executed for runner in runners)
+        rows = sum(runner.rows for runner in runners)
+        if loader is not None:
+            statements += loader.executed
+            rows += loader.rows
+        if progress and progress(done['bytes'], bytes_total, statements, rows) is False:
+            raise RestoreCancelled()
+
+    serial_files = chain
+    if workers > 1:
+        serial_files = chain[1:]
+        loader = ParallelTableLoader(workers, commit_statements, commit_bytes)
+        loader.start()
+        try:
+            try:
+                _restore_file(chain[0], loader.submit, on_corrupt,
+                              lambda text_bytes: report(text_bytes, loader))
+            except BaseException:
+                loader.finish(cancel=True)
+                raise
+            loader.finish()
+        finally:
+            loader.close()
+        runners.extend(loader.runners)
+
+    if serial_files:
+        connection = get_db_connection()
+        if not connection:
+            raise ConnectionError("Could not connect to database for restore.")
+        runner = StatementRunner(connection, commit_statements, commit_bytes)
+        runners.append(runner)
+        try:
+            for path in serial_files:
+                try:
+                    _restore_file(path, runner.execute, on_corrupt, report)
+                except RestoreCancelled:
+                    runner.rollback()
+                    raise
+            runner.finish()
+        finally:
+            runner.close()
+
+    seconds = time.perf_counter() - start_time
+    result = {
+        'files': chain,
+        'statements': sum(runner.executed for runner in runners),
+        'skipped': sum(runner.skipped for runner in runners),
+        'rows': sum(runner.rows for runner in runners),
+        'commits': sum(runner.commits for runner in runners),
+        'bytes': done['bytes'],
+        'seconds': seconds
+    }
+    elapsed = max(seconds, 1e-9)
+    print(f"Restored {result['statements']} statements ({result['skipped']} skipped) in {seconds:.2f} seconds: "
+          f"{result['bytes'] / 1024 / 1024 / elapsed:.1f} MB/s, {result['rows'] / elapsed:,.0f} rows/s, "
+          f"{result['commits']} commits")
+    return result
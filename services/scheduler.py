@@ -0,0 +1,293 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import datetime
+import threading
+from services.config import load_app_settings, DEFAULT_SETTINGS
+from services.backup import (backup_database, incremental_backup, read_backup_info, manifest_path,
+                             BackupCancelled, BackupBusy, BackupLock)
+
+# How often each backup_frequency setting runs, and how often a run is a
+# full backup rather than an incremental one on top of the last full backup
+BACKUP_SCHEDULES = {
+    "Hourly": (datetime.timedelta(hours=1), datetime.timedelta(days=1)),
+    "Daily": (datetime.timedelta(days=1), datetime.timedelta(days=7)),
+    "Weekly": (datetime.timedelta(days=7), datetime.timedelta(days=7)),
+    "Monthly": (datetime.timedelta(days=30), datetime.timedelta(days=30))
+}
+
+# One JSON line per scheduled run, kept in the backup directory
+RUN_LOG_FILE = "backup_runs.jsonl"
+
+# Seconds between schedule checks
+SCHEDULER_POLL_SECONDS = 60
+
+# Wait before retrying after a failed run
+FAILED_RETRY_SECONDS = 15 * 60
+
+# Scheduled backups are held to this many rows per second so they don't starve the app
+SCHEDULED_BACKUP_ROWS_PER_SECOND = 50000
+
+# Niceness of the scheduler thread (Linux schedules threads individually)
+SCHEDULED_BACKUP_NICENESS = 10
+
+# Backup files written by services.backup
+_BACKUP_FILE = re.compile(r"food_delivery_(backup|incremental)_\d{8}_\d{6}\.sql(\.gz)?$")
+
+def read_run_log(backup_dir):
+    """Return the scheduled runs recorded in backup_dir, oldest first"""
+    path = os.path.join(backup_dir, RUN_LOG_FILE)
+    runs = []
+    if not os.path.exists(path):
+        return runs
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                runs.append(json.loads(line))
+            except ValueError:
+                # Skip a line cut short by a crash
+                continue
+    return runs
+
+def append_run_log(backup_dir, entry):
+    os.makedirs(backup_dir, exist_ok=True)
+    with open(os.path.join(backup_dir, RUN_LOG_FILE), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + "\n")
+
+def scheduled_files(backup_dir):
+    """Return the names of the backup files the scheduler wrote, from its run log"""
+    return {run['file'] for run in read_run_log(backup_dir) if run.get('status') == 'ok' and run.get('file')}
+
+def list_backups(backup_dir):
+    """Return (full_backups, incremental_backups) file names in backup_dir, oldest first"""
+    full = []
+    incremental = []
+    if not os.path.isdir(backup_dir):
+        return full, incremental
+    for name in sorted(os.listdir(backup_dir)):
+        match = _BACKUP_FILE.match(name)
+        if match:
+            (full if match.group(1) == "backup" else incremental).append(name)
+    return full, incremental
+
+def prune_backups(backup_dir, keep_chains, owned):
+    """Delete all but the newest keep_chains scheduled full backups and their incrementals
+
+    Only files in owned (the scheduler's own backups) are considered, so
+    manual backups are never deleted. An incremental is deleted only when
+    its manifest names a full backup that is being deleted.
+
+    Returns:
+        list: Names of the deleted backup files
+    """
+    full, incremental = list_backups(backup_dir)
+    full = [name for name in full if name in owned]
+    kept = set(full[-keep_chains:]) if keep_chains > 0 else set(full)
+    doomed = [name for name in full if name not in kept]
+    for name in incremental:
+        if name in owned and read_backup_info(os.path.join(backup_dir, name)).get('base') in doomed:
+            doomed.append(name)
+
+    for name in doomed:
+        path = os.path.join(backup_dir, name)
+        for file_path in (path, manifest_path(path)):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        print(f"Pruned old backup {name}")
+    return doomed
+
+def lower_thread_priority(niceness=SCHEDULED_BACKUP_NICENESS):
+    """Lower the CPU (and, with the default I/O scheduler, disk) priority of the calling thread"""
+    if not sys.platform.startswith("linux"):
+        return
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), niceness)
+    except OSError as e:
+        print(f"Could not lower backup thread priority: {e}")
+
+class RowThrottle:
+    """Backup progress callback that sleeps to hold a backup under a row rate"""
+
+    def __init__(self, rows_per_second=SCHEDULED_BACKUP_ROWS_PER_SECOND, stop_event=None):
+        self.rows_per_second = rows_per_second
+        self.stop_event = stop_event
+        self._started = time.perf_counter()
+        self._table_rows = {}
+
+    def __call__(self, table, tables_done, table_count, rows):
+        self._table_rows[table] = rows
+        if self.rows_per_second:
+            ahead = sum(self._table_rows.values()) / self.rows_per_second - (time.perf_counter() - self._started)
+            if ahead > 0:
+                if self.stop_event is not None:
+                    self.stop_event.wait(ahead)
+                else:
+                    time.sleep(ahead)
+        return self.stop_event is None or not self.stop_event.is_set()
+
+class BackupScheduler:
+    """Runs backups on the schedule set by the auto_backup and backup_frequency settings
+
+    Settings are re-read on every check, so changes on the settings page
+    apply without a restart. The last run times come from the run log in the
+    backup directory, so the schedule survives restarts and is shared by the
+    admin dashboard and the standalone daemon. A run that finds a manual
+    backup or restore holding the BackupLock is skipped until the next check.
+    """
+
+    def __init__(self, poll_seconds=SCHEDULER_POLL_SECONDS, rows_per_second=SCHEDULED_BACKUP_ROWS_PER_SECOND):
+        self.poll_seconds = poll_seconds
+        self.rows_per_second = rows_per_second
+        self._stop = threading.Event()
+        self._thread = None
+
+    def due(self, settings, now=None):
+        """Return 'full' or 'incremental' if a backup is due, else None
+
+        With no run log yet, the check only records that scheduling has
+        started, so the first backup runs one interval later rather than as
+        soon as an admin logs in.
+        """
+        if not settings.get("auto_backup"):
+            return None
+        now = now or datetime.datetime.now()
+        interval, full_every = BACKUP_SCHEDULES.get(settings.get("backup_frequency"), BACKUP_SCHEDULES["Daily"])
+
+        backup_dir = settings.get("backup_path") or DEFAULT_SETTINGS["backup_path"]
+        runs = read_run_log(backup_dir)
+        if not runs:
+            append_run_log(backup_dir, {'started': now.isoformat(sep=' ', timespec='seconds'),
+                                        'type': 'schedule', 'status': 'started'})
+            return None
+        if runs and runs[-1].get('status') == 'failed':
+            last_attempt = datetime.datetime.fromisoformat(runs[-1]['started'])
+            if now - last_attempt < datetime.timedelta(seconds=FAILED_RETRY_SECONDS):
+                return None
+
+        succeeded = [run for run in runs if run.get('status') == 'ok']
+        if not succeeded:
+            first_check = datetime.datetime.fromisoformat(runs[0]['started'])
+            return 'full' if now - first_check >= interval else None
+        if now - datetime.datetime.fromisoformat(succeeded[-1]['started']) < interval:
+            return None
+        full_runs = [run for run in succeeded if run['type'] == 'full']
+        if not full_runs or now - datetime.datetime.fromisoformat(full_runs[-1]['started']) >= full_every:
+            return 'full'
+        return 'incremental'
+
+    def run_backup(self, kind, settings):
+        """Run one backup, prune old chains and record the run; returns the log entry
+
+        The schedule is checked again once the backup lock is held, since
+        another scheduler may have run the backup in the meantime; returns
+        None if it is no longer due.
+        """
+        backup_dir = settings.get("backup_path") or DEFAULT_SETTINGS["backup_path"]
+        started = datetime.datetime.now()
+        entry = {'started': started.isoformat(sep=' ', timespec='seconds'), 'type': kind}
+
+        throttle = RowThrottle(self.rows_per_second, self._stop)
+        try:
+            with BackupLock(backup_dir):
+                kind = self.due(settings, started)
+                if kind is None:
+                    print("Scheduled backup skipped: another scheduler already ran it")
+                    return None
+                entry['type'] = kind
+                print(f"Scheduled {kind} backup started")
+                if kind == 'incremental':
+                    result = incremental_backup(backup_dir, progress=throttle,
+                                                compress=bool(settings.get("backup_compress")))
+                else:
+                    result = backup_database(backup_dir, progress=throttle,
+                                             compress=bool(settings.get("backup_compress")))
+                entry.update({
+                    'status': 'ok',
+                    'type': result.get('type', kind),
+                    'file': os.path.basename(result['path']),
+                    'bytes': result['bytes'],
+                    'rows': result['rows'],
+                    'seconds': round(result['seconds'], 2)
+                })
+                try:
+                    keep_chains = int(settings.get("backup_retention"))
+                except (TypeError, ValueError):
+                    keep_chains = int(DEFAULT_SETTINGS["backup_retention"])
+                entry['pruned'] = prune_backups(backup_dir, keep_chains,
+                                                scheduled_files(backup_dir) | {entry['file']})
+        except BackupBusy:
+            # A manual backup or restore is running; the next check tries again
+            print("Scheduled backup deferred: another backup or restore is in progress")
+            return None
+        except BackupCancelled:
+            # Stopped by shutdown; the next start picks the schedule up again
+            print("Scheduled backup cancelled")
+            return None
+        except Exception as e:
+            entry.update({
+                'status': 'failed',
+                'error': str(e),
+                'seconds': round((datetime.datetime.now() - started).total_seconds(), 2)
+            })
+
+        append_run_log(backup_dir, entry)
+        if entry['status'] == 'ok':
+            print(f"Scheduled {entry['type']} backup finished: {entry['file']}, "
+                  f"{entry['bytes'] / 1024 / 1024:.2f} MB in {entry['seconds']:.1f} seconds")
+        else:
+            print(f"Scheduled backup failed: {entry['error']}")
+        return entry
+
+    def run_pending(self):
+        """Run a backup if one is due; returns its log entry or None"""
+        settings = load_app_settings()
+        kind = self.due(settings)
+        if kind is None:
+            return None
+        return self.run_backup(kind, settings)
+
+    def _loop(self):
+        lower_thread_priority()
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception as e:
+                print(f"Backup scheduler error: {e}")
+            self._stop.wait(self.poll_seconds)
+
+    def start(self):
+        """Check the schedule on a background thread until stop() is called"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="backup-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the scheduler thread, cancelling a running backup"""
+        self._stop.set()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run database backups on the schedule from the admin settings")
+    parser.add_argument("--once", action="store_true", help="Run a backup now if one is due, then exit")
+    parser.add_argument("--poll", type=float, default=SCHEDULER_POLL_SECONDS, help="Seconds between schedule checks")
+    parser.add_argument("--rows-per-second", type=int, default=SCHEDULED_BACKUP_ROWS_PER_SECOND,
+                        help="Throttle for scheduled backups (0 to disable)")
+    args = parser.parse_args()
+
+    scheduler = BackupScheduler(poll_seconds=args.poll, rows_per_second=args.rows_per_second)
+    if args.once:
+        if scheduler.run_pending() is None:
+            print("No backup due")
+    else:
+        print(f"Backup scheduler checking every {args.poll:.0f}s (Ctrl+C to stop)")
+        lower_thread_priority()
+        try:
+            while True:
+                scheduler.run_pending()
+                time.sleep(args.poll)
+        except KeyboardInterrupt:
+            print("Backup scheduler stopped")
@@ -2,8 +2,11 @@ import mysql.connector
 from dotenv import load_dotenv
 import os
 import platform
-from auth.user import User
+import sys
+from auth.user import User, UserRole
 from db_utils import get_connection_config
+from services.partitions import partition_orders
+from services.provisioning import insert_users
 
 # Load environment variables
 load_dotenv()
@@ -25,7 +28,12 @@ print(f"DB_HOST: {os.environ.get('DB_HOST')}")
 print(f"DB_USER: {os.environ.get('DB_USER')}")
 print(f"DB_NAME: {os.environ.get('DB_NAME')}")
 
-def create_database():
+def create_database(partition=False):
+    """Create the database from scratch with sample data
+    
+    Args:
+        partition (bool): Partition orders by month (services/partitions.py)
+    """
     try:
         # Get base configuration without database name
         config = get_connection_config()
@@ -65,7 +73,8 @@ def create_database():
                 role ENUM('customer', 'restaurant', 'delivery', 'admin') NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 last_login TIMESTAMP NULL,
-                is_active BOOLEAN DEFAULT TRUE
+                is_active BOOLEAN DEFAULT TRUE,
+                info_update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
             )
             """,
             """
@@ -85,7 +94,10 @@ def create_database():
                 logo_url VARCHAR(255),
                 banner_url VARCHAR(255),
                 description TEXT,
+                latitude DECIMAL(10, 8) NULL,
+                longitude DECIMAL(11, 8) NULL,
                 info_update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                INDEX idx_restaurants_location (latitude, longitude),
                 FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
             )
             """,
@@ -135,6 +147,7 @@ def create_database():
                 current_location VARCHAR(255),
                 avg_rating DECIMAL(3, 2) DEFAULT 0.00,
                 total_deliveries INT DEFAULT 0,
+                total_earnings DECIMAL(12, 2) DEFAULT 0.00,
                 info_update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
                 FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
             )
@@ -163,12 +176,30 @@ def create_database():
                 assigned_time TIMESTAMP NULL,
                 tracking_number VARCHAR(20),
                 is_rated BOOLEAN DEFAULT FALSE,
+                info_update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                INDEX idx_orders_status_courier (delivery_status, delivery_person_id),
+                INDEX idx_orders_courier_delivered (delivery_person_id, delivery_status, actual_delivery_time),
+                INDEX idx_orders_info_update_time (info_update_time),
                 FOREIGN KEY (customer_id) REFERENCES customers(customer_id) ON DELETE CASCADE,
                 FOREIGN KEY (restaurant_id) REFERENCES restaurants(restaurant_id) ON DELETE CASCADE,
                 FOREIGN KEY (delivery_person_id) REFERENCES delivery_personnel(delivery_person_id) ON DELETE SET NULL
             )
             """,
             """
+            CREATE TABLE IF NOT EXISTS courier_earnings (
+                earning_id INT AUTO_INCREMENT PRIMARY KEY,
+                delivery_person_id INT NOT NULL,
+                order_id INT NOT NULL UNIQUE,
+                restaurant_id INT,
+                order_total DECIMAL(10,2) NOT NULL,
+                commission_rate DECIMAL(5,4) NOT NULL,
+                amount DECIMAL(10,2) NOT NULL,
+                earned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_courier_earnings_courier (delivery_person_id, earning_id),
+                FOREIGN KEY (delivery_person_id) REFERENCES delivery_personnel(delivery_person_id) ON DELETE CASCADE
+            )
+            """,
+            """
             CREATE TABLE IF NOT EXISTS order_items (
                 order_item_id INT AUTO_INCREMENT PRIMARY KEY,
                 order_id INT,
@@ -253,46 +284,35 @@ def create_database():
             cursor.execute(table)
             print(f"Table created successfully: {table.split('IF NOT EXISTS')[1].split()[0]}")
 
+        for table, statements in ARCHIVE_TABLES:
+            for statement in statements:
+                cursor.execute(statement)
+            print(f"Table created successfully: {table}")
+        
+        if partition:
+            partition_orders(cursor)
+
         # Create an admin user
         admin_password = "admin123"  # Default password for admin
-        admin_pwd_hash = User.hash_password(admin_password)
-        cursor.execute("""
-        INSERT INTO users (username, email, password_hash, role, created_at)
-        VALUES ('admin', 'admin@fooddelivery.com', %s, 'admin', NOW())
-        """, (admin_pwd_hash,))
-        print(f"Admin user created with username 'admin' and password '{admin_password}'")
+        users = [{'username': 'admin', 'email': 'admin@fooddelivery.com', 'role': UserRole.ADMIN,
+                  'password_hash': User.hash_password(admin_password)}]
         
-        # Add sample data for testing
+        # Add sample data for testing; the sample accounts can't log in
+        users += [
+            {'username': 'restaurant1', 'email': 'restaurant1@example.com', 'role': UserRole.RESTAURANT,
+             'password_hash': b'\x00' * 64, 'name': 'Sample Restaurant', 'address': '123 Main St, Dubai',
+             'phone': '+971-55-1234567', 'cuisine_type': 'Italian', 'rating': 4.5,
+             'latitude': 25.2048, 'longitude': 55.2708},
+            {'username': 'customer1', 'email': 'customer1@example.com', 'role': UserRole.CUSTOMER,
+             'password_hash': b'\x00' * 64, 'name': 'John Doe', 'address': '456 Market St, Dubai',
+             'phone': '+971-55-9876543'},
+            {'username': 'delivery1', 'email': 'delivery1@example.com', 'role': UserRole.DELIVERY,
+             'password_hash': b'\x00' * 64, 'name': 'Mike Smith', 'phone': '+971-55-5555555',
+             'latitude': 25.2100, 'longitude': 55.2800}
+        ]
         print("Adding sample data for testing...")
-        
-        cursor.execute("""
-        INSERT INTO users (username, email, password_hash, role, created_at)
-        VALUES
-            ('restaurant1', 'restaurant1@example.com', %s, 'restaurant', NOW()),
-            ('customer1', 'customer1@example.com', %s, 'customer', NOW()),
-            ('delivery1', 'delivery1@example.com', %s, 'delivery', NOW())
-        """, (b'\x00' * 64, b'\x00' * 64, b'\x00' * 64))
-        
-        # Get the user IDs
-        cursor.execute("SELECT user_id, role FROM users WHERE username != 'admin'")
-        user_data = cursor.fetchall()
-        
-        for user_id, role in user_data:
-            if role == 'restaurant':
-                cursor.execute("""
-                INSERT INTO restaurants (user_id, name, address, contact_number, cuisine_type, rating)
-                VALUES (%s, 'Sample Restaurant', '123 Main St, Dubai', '+971-55-1234567', 'Italian', 4.5)
-                """, (user_id,))
-            elif role == 'customer':
-                cursor.execute("""
-                INSERT INTO customers (user_id, name, address, phone, email)
-                VALUES (%s, 'John Doe', '456 Market St, Dubai', '+971-55-9876543', 'customer1@example.com')
-                """, (user_id,))
-            elif role == 'delivery':
-                cursor.execute("""
-                INSERT INTO delivery_personnel (user_id, name, phone)
-                VALUES (%s, 'Mike Smith', '+971-55-5555555')
-                """, (user_id,))
+        insert_users(cursor, users)
+        print(f"Admin user created with username 'admin' and password '{admin_password}'")
         
         # Get the restaurant ID
         cursor.execute("SELECT restaurant_id FROM restaurants LIMIT 1")
@@ -318,5 +338,155 @@ def create_database():
             cursor.close()
             conn.close()
 
+# Cold copies of old orders and their items and ratings, filled by services/archive.py.
+# LIKE copies the columns and indexes of the hot tables but not their foreign keys,
+# so archived rows neither block nor cascade from deletes elsewhere. Column changes
+# to orders must be made to orders_archive too (search_orders UNIONs the two).
+ARCHIVE_TABLES = [
+    ("orders_archive", [
+        "CREATE TABLE IF NOT EXISTS orders_archive LIKE orders",
+        "CREATE INDEX idx_orders_archive_order_date ON orders_archive (order_date)"
+    ]),
+    ("order_items_archive", [
+        "CREATE TABLE IF NOT EXISTS order_items_archive LIKE order_items",
+        "ALTER TABLE order_items_archive ADD COLUMN archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "
+        "ADD INDEX idx_order_items_archive_archived_at (archived_at)"
+    ]),
+    ("ratings_archive", [
+        "CREATE TABLE IF NOT EXISTS ratings_archive LIKE ratings",
+        "ALTER TABLE ratings_archive ADD COLUMN archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "
+        "ADD INDEX idx_ratings_archive_archived_at (archived_at)"
+    ])
+]
+
+# Idempotent schema upgrades for databases created by older versions of this script.
+# Each entry is (kind, table, name, sql) where kind is 'column', 'index' or 'table'
+# and the statement (or list of statements) only runs when the named object does
+# not exist yet.
+MIGRATIONS = [
+    ("column", "restaurants", "latitude",
+     "ALTER TABLE restaurants ADD COLUMN latitude DECIMAL(10, 8) NULL AFTER description"),
+    ("column", "restaurants", "longitude",
+     "ALTER TABLE restaurants ADD COLUMN longitude DECIMAL(11, 8) NULL AFTER latitude"),
+    ("index", "restaurants", "idx_restaurants_location",
+     "CREATE INDEX idx_restaurants_location ON restaurants (latitude, longitude)"),
+    ("index", "orders", "idx_orders_status_courier",
+     "CREATE INDEX idx_orders_status_courier ON orders (delivery_status, delivery_person_id)"),
+    # Delivery history is paged by delivery time; orders delivered before
+    # actual_delivery_time was always set fall back to their order date
+    ("index", "orders", "idx_orders_courier_delivered", [
+        "UPDATE orders SET actual_delivery_time = order_date "
+        "WHERE delivery_status = 'Delivered' AND actual_delivery_time IS NULL",
+        "CREATE INDEX idx_orders_courier_delivered ON orders (delivery_person_id, delivery_status, actual_delivery_time)"
+    ]),
+    ("column", "delivery_personnel", "total_earnings",
+     "ALTER TABLE delivery_personnel ADD COLUMN total_earnings DECIMAL(12, 2) DEFAULT 0.00 AFTER total_deliveries"),
+    ("table", "courier_earnings", "courier_earnings", [
+        """
+        CREATE TABLE courier_earnings (
+            earning_id INT AUTO_INCREMENT PRIMARY KEY,
+            delivery_person_id INT NOT NULL,
+            order_id INT NOT NULL UNIQUE,
+            restaurant_id INT,
+            order_total DECIMAL(10,2) NOT NULL,
+            commission_rate DECIMAL(5,4) NOT NULL,
+            amount DECIMAL(10,2) NOT NULL,
+            earned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_courier_earnings_courier (delivery_person_id, earning_id),
+            FOREIGN KEY (delivery_person_id) REFERENCES delivery_personnel(delivery_person_id) ON DELETE CASCADE
+        )
+        """,
+        # Backfill the ledger from orders delivered before it existed
+        """
+        INSERT INTO courier_earnings
+            (delivery_person_id, order_id, restaurant_id, order_total, commission_rate, amount, earned_at)
+        SELECT o.delivery_person_id, o.order_id, o.restaurant_id, o.total_amount, 0.10,
+               ROUND(o.total_amount * 0.10, 2), COALESCE(o.actual_delivery_time, o.order_date)
+        FROM orders o
+        WHERE o.delivery_status = 'Delivered' AND o.delivery_person_id IS NOT NULL
+        ORDER BY COALESCE(o.actual_delivery_time, o.order_date), o.order_id
+        """,
+        """
+        UPDATE delivery_personnel dp
+        LEFT JOIN (
+            SELECT delivery_person_id, COUNT(*) AS deliveries, SUM(amount) AS earnings
+            FROM courier_earnings
+            GROUP BY delivery_person_id
+        ) totals ON totals.delivery_person_id = dp.delivery_person_id
+        SET dp.total_deliveries = COALESCE(totals.deliveries, 0),
+            dp.total_earnings = COALESCE(totals.earnings, 0)
+        """
+    ]),
+    # Change tracking for incremental backups
+    ("column", "users", "info_update_time",
+     "ALTER TABLE users ADD COLUMN info_update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"),
+    ("column", "orders", "info_update_time",
+     "ALTER TABLE orders ADD COLUMN info_update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP AFTER is_rated"),
+    ("index", "orders", "idx_orders_info_update_time",
+     "CREATE INDEX idx_orders_info_update_time ON orders (info_update_time)"),
+    # Order archive
+    *[("table", table, table, statements) for table, statements in ARCHIVE_TABLES],
+    # Archives copied from orders before delivery history was paged by delivery time
+    ("index", "orders_archive", "idx_orders_courier_delivered", [
+        "UPDATE orders_archive SET actual_delivery_time = order_date "
+        "WHERE delivery_status = 'Delivered' AND actual_delivery_time IS NULL",
+        "CREATE INDEX idx_orders_courier_delivered ON orders_archive (delivery_person_id, delivery_status, actual_delivery_time)"
+    ]),
+]
+
+def schema_object_exists(cursor, kind, table, name):
+    """Check information_schema for a column, index or table in the current database"""
+    if kind == "column":
+        cursor.execute("""
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """, (table, name))
+    elif kind == "index":
+        cursor.execute("""
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        """, (table, name))
+    else:
+        cursor.execute("""
+        SELECT 1 FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """, (name,))
+    return len(cursor.fetchall()) > 0
+
+def apply_migrations(cursor):
+    """Bring an existing database up to the current schema"""
+    for kind, table, name, sql in MIGRATIONS:
+        if schema_object_exists(cursor, kind, table, name):
+            continue
+        for statement in ([sql] if isinstance(sql, str) else sql):
+            cursor.execute(statement)
+        print(f"Applied migration: {kind} {table}.{name}")
+
+def migrate_database(partition=False):
+    """Upgrade the configured database in place without dropping any data
+    
+    Args:
+        partition (bool): Also partition orders by month if it isn't already
+    """
+    try:
+        conn = mysql.connector.connect(**get_connection_config())
+        cursor = conn.cursor()
+        apply_migrations(cursor)
+        if partition:
+            partition_orders(cursor)
+        conn.commit()
+        print("Database migration completed successfully!")
+    except mysql.connector.Error as err:
+        print(f"Error: {err}")
+    finally:
+        if 'conn' in locals() and conn.is_connected():
+            cursor.close()
+            conn.close()
+
 if __name__ == "__main__":
-    create_database()
\ No newline at end of file
+    # --partition-orders opts in to monthly partitions on orders.order_time
+    partition = "--partition-orders" in sys.argv
+    if "--migrate" in sys.argv:
+        migrate_database(partition)
+    else:
+        create_database(partition)
\ No newline at end of file
@@ -3,6 +3,7 @@ import random
 from datetime import datetime, timedelta
 from db_utils import execute_query
 from create_test_order import create_test_order
+from services.earnings import mark_order_delivered
 from decimal import Decimal
 
 def simulate_complete_delivery():
@@ -50,16 +51,8 @@ def simulate_complete_delivery():
         # Create delivery time 30-60 min after order time
         actual_delivery_time = datetime.now() + timedelta(minutes=random.randint(30, 60))
         
-        complete_query = """
-        UPDATE orders 
-        SET delivery_status = 'Delivered',
-            actual_delivery_time = %s,
-            payment_status = 'Paid'
-        WHERE order_id = %s
-        """
-        result = execute_query(complete_query, (actual_delivery_time, order_id), fetch=False)
-        
-        if result is None:
+        # Also credits the delivery person's earnings ledger
+        if not mark_order_delivered(order_id, actual_delivery_time):
             print("Failed to mark order as delivered.")
             return
             
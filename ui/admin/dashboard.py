@@ -6,18 +6,25 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton,
                             QDateEdit, QTabWidget, QCheckBox, QProgressDialog, QApplication,
                             QProgressBar, QMenu, QSpinBox, QTextEdit, QFileDialog, 
                             QListWidget, QListWidgetItem)
-from PySide6.QtCore import Qt, Signal, QDate, QDateTime, QTimer
+from PySide6.QtCore import Qt, Signal, QDate, QDateTime, QTimer, QThread
 from PySide6.QtGui import QFont, QIcon, QPainter, QPixmap
-# Using matplotlib for charts
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-import numpy as np
 import time
-import re
 import os
+import threading
 
-from db_utils import execute_query
+from db_utils import execute_query, query_stats
+from ui.charts import PieChart, TrendChart
+from ui.pages import LazyPages
+from services.dispatch import AutoDispatcher
+from services.earnings import mark_order_delivered
+from services.backup import backup_database, incremental_backup, BackupCancelled, BackupLock, BACKUP_WORKERS
+from services.restore import restore_backup, RestoreCancelled, RESTORE_WORKERS
+from services.scheduler import BackupScheduler
+from services.maintenance import run_maintenance, MaintenanceCancelled
+from services.archive import order_table, all_rows, archive_query, archive_total
+
+# Seconds between auto-dispatch runs
+DISPATCH_INTERVAL_SECONDS = 5
 
 class AdminDashboard(QWidget):
     logout_requested = Signal()
@@ -34,6 +41,23 @@ class AdminDashboard(QWidget):
         # Flag to track if we should skip refresh
         self._skip_refresh = False
         
+        # Auto-dispatch ready orders to nearby couriers (controlled by the auto_assign setting),
+        # on its own thread so its queries don't stall the UI
+        self.dispatch_thread = DispatchThread(parent=self)
+        self.dispatch_thread.orders_dispatched.connect(self.on_orders_dispatched)
+        self.dispatch_thread.start()
+        self.logout_requested.connect(self.stop_auto_dispatch)
+        QApplication.instance().aboutToQuit.connect(self.stop_auto_dispatch)
+        
+        # Background backup and table maintenance in progress, if any
+        self.backup_thread = None
+        self.maintenance_thread = None
+        
+        # Scheduled backups (controlled by the auto_backup and backup_frequency settings)
+        self.backup_scheduler = BackupScheduler()
+        self.backup_scheduler.start()
+        self.logout_requested.connect(self.backup_scheduler.stop)
+        
         self.initUI()
     
     def initUI(self):
@@ -89,23 +113,16 @@ class AdminDashboard(QWidget):
         # Content area
         self.content_area = QStackedWidget()
         
-        # Create all pages
-        self.dashboard_page = self.create_dashboard_page()
-        self.restaurants_page = self.create_restaurants_page()
-        self.users_page = self.create_users_page()
-        self.delivery_page = self.create_delivery_page()
-        self.orders_page = self.create_orders_page()
-        self.reports_page = self.create_reports_page()
-        self.settings_page = self.create_settings_page()
-        
-        # Add pages to stacked widget
-        self.content_area.addWidget(self.dashboard_page)
-        self.content_area.addWidget(self.restaurants_page)
-        self.content_area.addWidget(self.users_page)
-        self.content_area.addWidget(self.delivery_page)
-        self.content_area.addWidget(self.orders_page)
-        self.content_area.addWidget(self.reports_page)
-        self.content_area.addWidget(self.settings_page)
+        # Pages are built, and load their data, the first time they are shown
+        self.pages = LazyPages(self, self.content_area)
+        self.pages.register('dashboard_page', self.create_dashboard_page)
+        self.pages.register('restaurants_page', self.create_restaurants_page)
+        self.pages.register('users_page', self.create_users_page)
+        self.pages.register('delivery_page', self.create_delivery_page)
+        self.pages.register('orders_page', self.create_orders_page)
+        self.pages.register('reports_page', self.create_reports_page)
+        self.pages.register('settings_page', self.create_settings_page)
+        self.pages.show('dashboard_page')
         
         # Add widgets to main layout
         main_layout.addWidget(sidebar)
@@ -211,16 +228,14 @@ class AdminDashboard(QWidget):
             user_count = [{'count': 0}]
             
         try:
-            today_orders = execute_query("SELECT COUNT(*) as count FROM orders WHERE DATE(order_time) = CURDATE()")
+            today_orders = execute_query("SELECT COUNT(*) as count FROM orders WHERE order_time >= CURDATE() AND order_time < CURDATE() + INTERVAL 1 DAY")
             if today_orders is None:
                 today_orders = [{'count': 0}]
         except:
             today_orders = [{'count': 0}]
             
         try:
-            total_revenue = execute_query("SELECT SUM(total_amount) as total FROM orders WHERE delivery_status = 'Delivered'")
-            if total_revenue is None or total_revenue[0]['total'] is None:
-                total_revenue = [{'total': 0}]
+            total_revenue = [{'total': self.delivered_revenue() or 0}]
         except:
             total_revenue = [{'total': 0}]
         
@@ -362,6 +377,9 @@ class AdminDashboard(QWidget):
         return page
     
     def load_restaurants(self):
+        if not hasattr(self, 'restaurant_table'):
+            return  # Page not built yet; it loads when first shown
+        
         # Clear existing rows
         self.restaurant_table.setRowCount(0)
         
@@ -585,6 +603,9 @@ class AdminDashboard(QWidget):
             "Delivery": "delivery"
         }
         
+        if not hasattr(self, 'users_table'):
+            return  # Page not built yet; it loads when first shown
+        
         # Clear existing rows
         self.users_table.setRowCount(0)
         
@@ -714,7 +735,9 @@ class AdminDashboard(QWidget):
                 # Get order count
                 orders = execute_query("SELECT COUNT(*) as count FROM orders WHERE customer_id = %s", (customer['customer_id'],))
                 if orders:
-                    role_layout.addRow("Total Orders:", QLabel(str(orders[0]['count'])))
+                    archived = archive_total("SELECT COUNT(*) as count FROM orders_archive WHERE customer_id = %s",
+                                             (customer['customer_id'],))
+                    role_layout.addRow("Total Orders:", QLabel(str(orders[0]['count'] + archived)))
         
         elif role == "restaurant":
             restaurant = execute_query("SELECT * FROM restaurants WHERE user_id = %s", (user_id,))
@@ -741,7 +764,9 @@ class AdminDashboard(QWidget):
                 # Get delivery count
                 deliveries = execute_query("SELECT COUNT(*) as count FROM orders WHERE delivery_person_id = %s AND delivery_status = 'Delivered'", (delivery['delivery_person_id'],))
                 if deliveries:
-                    role_layout.addRow("Completed Deliveries:", QLabel(str(deliveries[0]['count'])))
+                    archived = archive_total("SELECT COUNT(*) as count FROM orders_archive WHERE delivery_person_id = %s "
+                                             "AND delivery_status = 'Delivered'", (delivery['delivery_person_id'],))
+                    role_layout.addRow("Completed Deliveries:", QLabel(str(deliveries[0]['count'] + archived)))
         
         # Add widgets to layout
         layout.addWidget(basic_info)
@@ -914,40 +939,52 @@ class AdminDashboard(QWidget):
         return page
     
     def load_delivery_personnel(self, status_filter="All Status"):
+        if not hasattr(self, 'delivery_table'):
+            return  # Page not built yet; it loads when first shown
+        
         # Clear existing rows
         self.delivery_table.setRowCount(0)
         
         try:
-            # Build query based on filter
+            # Deliveries and ratings are totalled per courier before joining, so
+            # they don't multiply each other; archived totals are added below
+            query = """
+                SELECT dp.*, u.username, u.email,
+                       COALESCE(d.delivery_count, 0) as delivery_count,
+                       rt.rating_total, COALESCE(rt.rating_count, 0) as rating_count
+                FROM delivery_personnel dp
+                JOIN users u ON dp.user_id = u.user_id
+                LEFT JOIN (
+                    SELECT delivery_person_id, COUNT(*) as delivery_count
+                    FROM orders
+                    WHERE delivery_status = 'Delivered'
+                    GROUP BY delivery_person_id
+                ) d ON d.delivery_person_id = dp.delivery_person_id
+                LEFT JOIN (
+                    SELECT delivery_person_id, SUM(delivery_rating) as rating_total, COUNT(delivery_rating) as rating_count
+                    FROM ratings
+                    GROUP BY delivery_person_id
+                ) rt ON rt.delivery_person_id = dp.delivery_person_id
+                WHERE u.user_id IS NOT NULL
+            """
+            params = []
             if status_filter != "All Status":
-                query = """
-                    SELECT dp.*, u.username, u.email, 
-                           COUNT(o.order_id) as delivery_count,
-                           AVG(r.delivery_rating) as avg_rating
-                    FROM delivery_personnel dp
-                    JOIN users u ON dp.user_id = u.user_id
-                    LEFT JOIN orders o ON dp.delivery_person_id = o.delivery_person_id AND o.delivery_status = 'Delivered'
-                    LEFT JOIN ratings r ON r.delivery_person_id = dp.delivery_person_id
-                    WHERE dp.status = %s
-                    AND u.user_id IS NOT NULL
-                    GROUP BY dp.delivery_person_id
-                    ORDER BY dp.name
-                """
-                personnel = execute_query(query, (status_filter,))
-            else:
-                query = """
-                    SELECT dp.*, u.username, u.email,
-                           COUNT(o.order_id) as delivery_count,
-                           AVG(r.delivery_rating) as avg_rating
-                    FROM delivery_personnel dp
-                    JOIN users u ON dp.user_id = u.user_id
-                    LEFT JOIN orders o ON dp.delivery_person_id = o.delivery_person_id AND o.delivery_status = 'Delivered'
-                    LEFT JOIN ratings r ON r.delivery_person_id = dp.delivery_person_id
-                    WHERE u.user_id IS NOT NULL
-                    GROUP BY dp.delivery_person_id
-                    ORDER BY dp.name
-                """
-                personnel = execute_query(query)
+                query += " AND dp.status = %s"
+                params.append(status_filter)
+            query += " ORDER BY dp.name"
+            personnel = execute_query(query, params)
+            
+            archived_deliveries = {row['delivery_person_id']: row['delivery_count'] for row in archive_query("""
+                SELECT delivery_person_id, COUNT(*) as delivery_count
+                FROM orders_archive
+                WHERE delivery_status = 'Delivered'
+                GROUP BY delivery_person_id
+            """)}
+            archived_ratings = {row['delivery_person_id']: row for row in archive_query("""
+                SELECT delivery_person_id, SUM(delivery_rating) as rating_total, COUNT(delivery_rating) as rating_count
+                FROM ratings_archive
+                GROUP BY delivery_person_id
+            """)}
             
             if not personnel:
                 message = "No delivery personnel found" if status_filter == "All Status" else f"No delivery personnel with status: {status_filter}"
@@ -973,10 +1010,14 @@ class AdminDashboard(QWidget):
                     status_item.setForeground(Qt.GlobalColor.red)
                 
                 vehicle = QTableWidgetItem(person.get('vehicle_type', 'Not specified'))
-                deliveries = QTableWidgetItem(str(person['delivery_count']))
-                
-                # Rating
-                rating = person.get('avg_rating', 0)
+                delivery_count = person['delivery_count'] + archived_deliveries.get(person['delivery_person_id'], 0)
+                deliveries = QTableWidgetItem(str(delivery_count))
+                
+                # Rating, over hot and archived ratings
+                archived = archived_ratings.get(person['delivery_person_id'], {})
+                rating_count = person['rating_count'] + (archived.get('rating_count') or 0)
+                rating_total = float(person['rating_total'] or 0) + float(archived.get('rating_total') or 0)
+                rating = rating_total / rating_count if rating_count else 0
                 rating_item = QTableWidgetItem(f"{rating:.1f}" if rating else "No ratings")
                 
                 self.delivery_table.setItem(i, 0, person_id)
@@ -1238,6 +1279,9 @@ class AdminDashboard(QWidget):
     
     def load_orders(self, force_refresh=False, search_term=None, start_date=None, end_date=None, status=None):
         """Load orders with optional filtering"""
+        if not hasattr(self, 'orders_table'):
+            return  # Page not built yet; it loads when first shown
+        
         try:
             # Get orders from database with filters
             from db_utils import search_orders
@@ -1316,8 +1360,8 @@ class AdminDashboard(QWidget):
                 self.orders_table.setItem(row, 3, QTableWidgetItem(order['restaurant_name']))
                 
                 # Items count
-                items_count = execute_query("""
-                    SELECT SUM(quantity) as total FROM order_items WHERE order_id = %s
+                items_count = execute_query(f"""
+                    SELECT SUM(quantity) as total FROM {order_table('order_items', order.get('is_archived'))} WHERE order_id = %s
                 """, (order['order_id'],))
                 
                 item_text = f"{items_count[0]['total']} items" if items_count and items_count[0]['total'] else "No items"
@@ -1347,7 +1391,9 @@ class AdminDashboard(QWidget):
                 
                 view_btn = QPushButton("View")
                 view_btn.setObjectName("action-button")
-                view_btn.clicked.connect(lambda checked, o=order['order_id']: self.view_order_details(o))
+                view_btn.clicked.connect(
+                    lambda checked, o=order['order_id'], archived=order.get('is_archived'): self.view_order_details(o, archived)
+                )
                 
                 # Add view button to layout
                 actions_layout.addWidget(view_btn)
@@ -1366,15 +1412,19 @@ class AdminDashboard(QWidget):
                 print(error_msg)  # Log to console only for manual refreshes
             self.display_db_error_message(self.orders_table, error_msg)
     
-    def view_order_details(self, order_id):
-        """Show a dialog with detailed order information"""
+    def view_order_details(self, order_id, archived=False):
+        """Show a dialog with detailed order information
+        
+        Args:
+            archived (bool): The order was found in the order archive (services/archive.py)
+        """
         try:
             # Get order details
-            order = execute_query("""
+            order = execute_query(f"""
                 SELECT o.*, c.name as customer_name, c.phone as customer_phone, c.address as customer_address,
                        r.name as restaurant_name, r.address as restaurant_address, 
                        dp.name as delivery_person_name, dp.phone as delivery_person_phone
-                FROM orders o
+                FROM {order_table('orders', archived)} o
                 JOIN customers c ON o.customer_id = c.customer_id
                 JOIN restaurants r ON o.restaurant_id = r.restaurant_id
                 LEFT JOIN delivery_personnel dp ON o.delivery_person_id = dp.delivery_person_id
@@ -1395,9 +1445,9 @@ class AdminDashboard(QWidget):
                 order_display = f"#{order_display}"
             
             # Get order items
-            items = execute_query("""
+            items = execute_query(f"""
                 SELECT oi.*, m.dish_name
-                FROM order_items oi
+                FROM {order_table('order_items', archived)} oi
                 JOIN menus m ON oi.menu_id = m.menu_id
                 WHERE oi.order_id = %s
             """, (order_id,))
@@ -1646,38 +1696,12 @@ class AdminDashboard(QWidget):
                 
             # Check if changing status to "Delivered"
             if db_status == "Delivered":
-                # When an order is delivered, also update payment status for Cash on Delivery orders
-                # First check payment method
-                payment_query = """
-                    SELECT payment_method, payment_status FROM orders 
-                    WHERE order_id = %s
-                """
-                payment_info = execute_query(payment_query, (order_id,))
-                
-                if payment_info and payment_info[0]['payment_method'] == 'Cash on Delivery':
-                    # Update both delivery status and payment status
-                    query = """
-                        UPDATE orders 
-                        SET delivery_status = %s, 
-                            actual_delivery_time = NOW(),
-                            payment_status = 'Paid'
-                        WHERE order_id = %s
-                    """
-                else:
-                    # For other payment methods, also ensure payment status is marked as Paid
-                    query = """
-                        UPDATE orders 
-                        SET delivery_status = %s, 
-                            actual_delivery_time = NOW(),
-                            payment_status = 'Paid'
-                        WHERE order_id = %s
-                    """
+                # Marks the order delivered and paid, and credits the courier's earnings ledger
+                result = True if mark_order_delivered(order_id) else None
             else:
                 # Regular status update for non-delivered orders
                 query = "UPDATE orders SET delivery_status = %s WHERE order_id = %s"
-            
-            # Execute the query    
-            result = execute_query(query, (db_status, order_id), fetch=False)
+                result = execute_query(query, (db_status, order_id), fetch=False)
             
             if result is not None:
                 QMessageBox.information(self, "Success", f"Order #{order_id} status updated to {new_status}")
@@ -1714,12 +1738,12 @@ class AdminDashboard(QWidget):
         date_range_layout = QHBoxLayout()
         date_range_label = QLabel("Date Range:")
         date_range_label.setStyleSheet("color: #2c3e50;")
-        self.start_date = QDateEdit()
-        self.start_date.setCalendarPopup(True)
-        self.start_date.setDate(QDate.currentDate().addDays(-30))  # Default to last 30 days
-        self.end_date = QDateEdit()
-        self.end_date.setCalendarPopup(True)
-        self.end_date.setDate(QDate.currentDate())
+        self.report_start_date = QDateEdit()
+        self.report_start_date.setCalendarPopup(True)
+        self.report_start_date.setDate(QDate.currentDate().addDays(-30))  # Default to last 30 days
+        self.report_end_date = QDateEdit()
+        self.report_end_date.setCalendarPopup(True)
+        self.report_end_date.setDate(QDate.currentDate())
         
         # Style the date edit controls
         date_style = """
@@ -1766,17 +1790,17 @@ class AdminDashboard(QWidget):
                 color: #7f8c8d;
             }
         """
-        self.start_date.setStyleSheet(date_style)
-        self.end_date.setStyleSheet(date_style)
+        self.report_start_date.setStyleSheet(date_style)
+        self.report_end_date.setStyleSheet(date_style)
         
         refresh_btn = QPushButton("Refresh Data")
         refresh_btn.setObjectName("action-button")
         refresh_btn.clicked.connect(self.refresh_analytics)
         
         date_range_layout.addWidget(date_range_label)
-        date_range_layout.addWidget(self.start_date)
+        date_range_layout.addWidget(self.report_start_date)
         date_range_layout.addWidget(QLabel("to"))
-        date_range_layout.addWidget(self.end_date)
+        date_range_layout.addWidget(self.report_end_date)
         date_range_layout.addStretch()
         date_range_layout.addWidget(refresh_btn)
         
@@ -1834,6 +1858,8 @@ class AdminDashboard(QWidget):
         status_chart_layout.addWidget(QLabel("Orders by Status"))
         
         # Create a frame for the chart with its own layout
+        self.status_pie = None  # Charts are created on the first refresh
+        self.revenue_trend = None
         self.status_chart = QFrame()
         self.status_chart.setMinimumHeight(300)  # Original size
         chart_layout = QVBoxLayout(self.status_chart)
@@ -1974,22 +2000,26 @@ class AdminDashboard(QWidget):
     
     def refresh_analytics(self):
         """Refresh all analytics data based on selected date range"""
-        start_date = self.start_date.date().toString("yyyy-MM-dd")
+        if not hasattr(self, 'report_start_date'):
+            return  # Page not built yet; it loads when first shown
+        
+        start_date = self.report_start_date.date().toString("yyyy-MM-dd")
         
         # Get end date and add 1 day to make it inclusive of orders on the end date
-        end_date_obj = self.end_date.date()
+        end_date_obj = self.report_end_date.date()
         end_date_obj = end_date_obj.addDays(1)  # Add one day to include orders on the selected end date
         end_date = end_date_obj.toString("yyyy-MM-dd")
         
         try:
-            # Get key metrics
-            metrics_query = """
+            # Get key metrics; all_rows() adds archived orders when the date
+            # range reaches back to them
+            metrics_query = f"""
                 SELECT 
                     COUNT(*) as total_orders,
                     SUM(total_amount) as total_revenue,
                     AVG(total_amount) as avg_order_value,
                     AVG(TIMESTAMPDIFF(MINUTE, order_time, actual_delivery_time)) as avg_delivery_time
-                FROM orders 
+                FROM {all_rows('orders', start_date=start_date)} 
                 WHERE order_time BETWEEN %s AND %s
             """
             metrics = execute_query(metrics_query, (start_date, end_date))
@@ -2001,92 +2031,36 @@ class AdminDashboard(QWidget):
                 self.delivery_time_label.setText(f"{int(metrics[0]['avg_delivery_time'] or 0)} min")
             
             # Get orders by status
-            status_query = """
+            status_query = f"""
                 SELECT delivery_status, COUNT(*) as count
-                FROM orders
+                FROM {all_rows('orders', start_date=start_date)}
                 WHERE order_time BETWEEN %s AND %s
                 GROUP BY delivery_status
             """
             status_data = execute_query(status_query, (start_date, end_date))
             
             # Get revenue trend
-            revenue_query = """
+            revenue_query = f"""
                 SELECT DATE(order_time) as date, SUM(total_amount) as revenue
-                FROM orders
+                FROM {all_rows('orders', start_date=start_date)}
                 WHERE order_time BETWEEN %s AND %s
                 GROUP BY DATE(order_time)
                 ORDER BY date
             """
             revenue_data = execute_query(revenue_query, (start_date, end_date))
             
-            # Clear previous charts
-            for i in reversed(range(self.status_chart.layout().count())): 
-                widget = self.status_chart.layout().itemAt(i).widget()
-                if widget:
-                    widget.setParent(None)
-            
-            for i in reversed(range(self.revenue_chart.layout().count())): 
-                widget = self.revenue_chart.layout().itemAt(i).widget()
-                if widget:
-                    widget.setParent(None)
-            
-            # Create status pie chart with matplotlib
-            if status_data:
-                status_fig = Figure(figsize=(5, 4), dpi=100)
-                status_canvas = FigureCanvas(status_fig)
-                ax = status_fig.add_subplot(111)
-                
-                labels = [item['delivery_status'] for item in status_data]
-                sizes = [item['count'] for item in status_data]
-                
-                # Use a colorful palette
-                colors = plt.cm.Paired(np.arange(len(labels))/len(labels))
-                
-                ax.pie(sizes, labels=labels, autopct='%1.1f%%', 
-                      startangle=90, colors=colors)
-                ax.axis('equal')  # Equal aspect ratio ensures circular pie
-                
-                # Clear previous chart if any
-                for i in reversed(range(self.status_chart.layout().count())): 
-                    widget = self.status_chart.layout().itemAt(i).widget()
-                    if widget:
-                        widget.setParent(None)
-                
-                # Add the canvas to the layout
-                self.status_chart.layout().addWidget(status_canvas)
-                status_fig.tight_layout()
-                status_canvas.draw()
-            
-            # Create revenue trend chart with matplotlib
-            if revenue_data:
-                revenue_fig = Figure(figsize=(5, 4), dpi=100)
-                revenue_canvas = FigureCanvas(revenue_fig)
-                ax = revenue_fig.add_subplot(111)
-                
-                dates = [item['date'] for item in revenue_data]
-                revenue_values = [float(item['revenue']) for item in revenue_data]
-                
-                ax.plot(dates, revenue_values, 'o-', color='#3498db', linewidth=2)
-                ax.set_title('Revenue Trend')
-                ax.set_ylabel('Revenue (AED)')
-                ax.grid(True, linestyle='--', alpha=0.7)
-                
-                # Rotate date labels for better readability
-                plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-                
-                # Clear previous chart if any
-                for i in reversed(range(self.revenue_chart.layout().count())): 
-                    widget = self.revenue_chart.layout().itemAt(i).widget()
-                    if widget:
-                        widget.setParent(None)
-                
-                # Add the canvas to the layout
-                self.revenue_chart.layout().addWidget(revenue_canvas)
-                revenue_fig.tight_layout()
-                revenue_canvas.draw()
+            # The charts are created on the first refresh and updated in place after that;
+            # update() skips the redraw when the numbers haven't changed
+            if self.status_pie is None:
+                self.status_pie = PieChart(self.status_chart)
+                self.revenue_trend = TrendChart(self.revenue_chart, 'Revenue Trend', 'Revenue (AED)')
+            self.status_pie.update([item['delivery_status'] for item in status_data or []],
+                                   [item['count'] for item in status_data or []])
+            self.revenue_trend.update([item['date'] for item in revenue_data or []],
+                                      [float(item['revenue']) for item in revenue_data or []])
             
             # Get top restaurants
-            restaurants_query = """
+            restaurants_query = f"""
                 SELECT 
                     r.name,
                     COUNT(o.order_id) as order_count,
@@ -2094,7 +2068,7 @@ class AdminDashboard(QWidget):
                     r.rating,
                     AVG(CASE WHEN o.delivery_status = 'Delivered' THEN 1 ELSE 0 END) * 100 as completion_rate
                 FROM restaurants r
-                JOIN orders o ON r.restaurant_id = o.restaurant_id
+                JOIN {all_rows('orders', 'o', start_date)} ON r.restaurant_id = o.restaurant_id
                 WHERE o.order_time BETWEEN %s AND %s
                 GROUP BY r.restaurant_id
                 ORDER BY revenue DESC
@@ -2112,7 +2086,7 @@ class AdminDashboard(QWidget):
                     self.top_restaurants_table.setItem(i, 4, QTableWidgetItem(f"{float(restaurant['completion_rate']):.1f}%"))
             
             # Get top delivery personnel
-            delivery_query = """
+            delivery_query = f"""
                 SELECT 
                     dp.name,
                     COUNT(o.order_id) as delivery_count,
@@ -2120,8 +2094,8 @@ class AdminDashboard(QWidget):
                     AVG(TIMESTAMPDIFF(MINUTE, o.order_time, o.actual_delivery_time)) as avg_time,
                     AVG(CASE WHEN o.actual_delivery_time <= o.estimated_delivery_time THEN 1 ELSE 0 END) * 100 as on_time_rate
                 FROM delivery_personnel dp
-                JOIN orders o ON dp.delivery_person_id = o.delivery_person_id
-                LEFT JOIN ratings r ON o.order_id = r.order_id
+                JOIN {all_rows('orders', 'o', start_date)} ON dp.delivery_person_id = o.delivery_person_id
+                LEFT JOIN {all_rows('ratings', 'r', start_date)} ON o.order_id = r.order_id
                 WHERE o.order_time BETWEEN %s AND %s
                 GROUP BY dp.delivery_person_id
                 ORDER BY delivery_count DESC
@@ -2139,7 +2113,7 @@ class AdminDashboard(QWidget):
                     self.top_delivery_table.setItem(i, 4, QTableWidgetItem(f"{float(delivery['on_time_rate'] or 0):.1f}%"))
             
             # Get customer insights
-            customer_query = """
+            customer_query = f"""
                 SELECT 
                     c.name,
                     COUNT(o.order_id) as order_count,
@@ -2147,7 +2121,7 @@ class AdminDashboard(QWidget):
                     AVG(o.total_amount) as avg_order_value,
                     MAX(o.order_time) as last_order
                 FROM customers c
-                JOIN orders o ON c.customer_id = o.customer_id
+                JOIN {all_rows('orders', 'o', start_date)} ON c.customer_id = o.customer_id
                 WHERE o.order_time BETWEEN %s AND %s
                 GROUP BY c.customer_id
                 ORDER BY total_spent DESC
@@ -2291,20 +2265,30 @@ class AdminDashboard(QWidget):
         backup_form.addRow("Enable Automatic Backups:", self.auto_backup_checkbox)
         
         self.backup_freq_combo = QComboBox()
-        self.backup_freq_combo.addItems(["Daily", "Weekly", "Monthly"])
+        self.backup_freq_combo.addItems(["Hourly", "Daily", "Weekly", "Monthly"])
         self.backup_freq_combo.setCurrentText("Daily")
         backup_form.addRow("Backup Frequency:", self.backup_freq_combo)
         
+        self.backup_compress_checkbox = QCheckBox()
+        self.backup_compress_checkbox.setChecked(True)
+        backup_form.addRow("Compress Backups:", self.backup_compress_checkbox)
+        
+        self.backup_retention_input = QLineEdit("3")
+        backup_form.addRow("Full Backups to Keep:", self.backup_retention_input)
+        
         backup_inner_layout.addLayout(backup_form)
         
         # Backup buttons
         backup_buttons = QHBoxLayout()
         backup_now_btn = QPushButton("Backup Now")
-        backup_now_btn.clicked.connect(self.backup_database)
+        backup_now_btn.clicked.connect(lambda: self.backup_database())
+        incremental_btn = QPushButton("Incremental Backup")
+        incremental_btn.clicked.connect(lambda: self.backup_database(incremental=True))
         restore_btn = QPushButton("Restore from Backup")
         restore_btn.clicked.connect(self.restore_database)
         
         backup_buttons.addWidget(backup_now_btn)
+        backup_buttons.addWidget(incremental_btn)
         backup_buttons.addWidget(restore_btn)
         backup_inner_layout.addLayout(backup_buttons)
         
@@ -2318,9 +2302,12 @@ class AdminDashboard(QWidget):
         optimize_btn.clicked.connect(self.optimize_database)
         clear_cache_btn = QPushButton("Clear System Cache")
         clear_cache_btn.clicked.connect(self.clear_system_cache)
+        query_report_btn = QPushButton("Query Report")
+        query_report_btn.clicked.connect(self.show_query_report)
         
         utils_buttons.addWidget(optimize_btn)
         utils_buttons.addWidget(clear_cache_btn)
+        utils_buttons.addWidget(query_report_btn)
         utils_layout.addLayout(utils_buttons)
         
         # Add groups to backup tab
@@ -2417,36 +2404,119 @@ class AdminDashboard(QWidget):
             self.backup_path_input.setText(directory)
     
     def optimize_database(self):
-        """Optimize database tables"""
-        from db_utils import execute_query
-        try:
-            # Show progress dialog
-            progress_msg = QMessageBox(self)
-            progress_msg.setIcon(QMessageBox.Icon.Information)
-            progress_msg.setWindowTitle("Database Optimization")
-            progress_msg.setText("Optimizing database tables. Please wait...")
-            progress_msg.setStandardButtons(QMessageBox.StandardButton.NoButton)
-            progress_msg.show()
-            
-            # Get list of tables
-            tables = execute_query("SHOW TABLES")
-            if not tables:
-                progress_msg.close()
-                QMessageBox.critical(self, "Optimization Failed", "Could not retrieve database tables.")
+        """Run OPTIMIZE/ANALYZE on the tables that need it, on a background thread
+        
+        Tables are chosen from their free space and row change statistics
+        (services/maintenance.py); sizes and scan latency before and after
+        each job are shown when it finishes.
+        """
+        if self.maintenance_thread is not None and self.maintenance_thread.isRunning():
+            QMessageBox.information(self, "Optimization Running", "Database optimization is already in progress.")
+            return
+        
+        progress = QProgressDialog("Checking table statistics...", "Cancel", 0, 0, self)
+        progress.setWindowTitle("Database Optimization")
+        progress.setMinimumDuration(0)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.setValue(0)
+        
+        thread = MaintenanceThread(parent=self)
+        
+        def on_progress(table, action, jobs_done, job_count):
+            if progress.maximum() != job_count:
+                progress.setMaximum(job_count)
+            progress.setValue(jobs_done)
+            if table:
+                progress.setLabelText(f"Optimizing tables ({jobs_done}/{job_count} done)\n{action} TABLE {table}")
+        
+        def on_completed(summary):
+            progress.close()
+            jobs = summary['jobs']
+            if not jobs:
+                QMessageBox.information(self, "Optimization Complete", "No tables need optimizing right now.")
                 return
             
-            # Optimize each table
-            for table_dict in tables:
-                table_name = list(table_dict.values())[0]  # Get table name from dictionary
-                execute_query(f"OPTIMIZE TABLE {table_name}", fetch=False)
-            
-            progress_msg.close()
-            QMessageBox.information(self, "Optimization Complete", "Database tables have been optimized successfully.")
+            lines = []
+            for job in jobs:
+                line = f"{job['action']} {job['table']}: {job['status']}"
+                if job['before'] and job['after']:
+                    before_mb = (job['before']['data_bytes'] + job['before']['index_bytes']) / 1024 / 1024
+                    after_mb = (job['after']['data_bytes'] + job['after']['index_bytes']) / 1024 / 1024
+                    line += f", {before_mb:.1f} -> {after_mb:.1f} MB"
+                line += f", scan {job['latency_before_ms']:.1f} -> {job['latency_after_ms']:.1f} ms"
+                lines.append(line)
+            QMessageBox.information(
+                self, 
+                "Optimization Complete", 
+                f"Maintained {len(jobs)} table(s) in {summary['seconds']:.1f} seconds.\n\n" + "\n".join(lines)
+            )
         
-        except Exception as e:
-            if 'progress_msg' in locals():
-                progress_msg.close()
-            QMessageBox.critical(self, "Optimization Failed", f"Failed to optimize database: {str(e)}")
+        def on_cancelled():
+            progress.close()
+            print("Database optimization cancelled by user")
+        
+        def on_failed(message):
+            progress.close()
+            QMessageBox.critical(self, "Optimization Failed", f"Failed to optimize database: {message}")
+        
+        def on_finished():
+            self.maintenance_thread = None
+            thread.deleteLater()
+        
+        thread.progress_changed.connect(on_progress)
+        thread.maintenance_completed.connect(on_completed)
+        thread.maintenance_cancelled.connect(on_cancelled)
+        thread.maintenance_failed.connect(on_failed)
+        thread.finished.connect(on_finished)
+        progress.canceled.connect(thread.cancel)
+        
+        self.maintenance_thread = thread
+        thread.start()
+    
+    def show_query_report(self):
+        """Show the busiest queries this session has run, from db_utils.query_stats"""
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Query Report")
+        dialog.resize(1000, 600)
+        layout = QVBoxLayout(dialog)
+        
+        report_text = QTextEdit()
+        report_text.setReadOnly(True)
+        report_text.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+        report_text.setFont(QFont("Courier New", 9))
+        report_text.setPlainText(query_stats.report())
+        layout.addWidget(report_text)
+        
+        buttons = QHBoxLayout()
+        sort_combo = QComboBox()
+        sort_combo.addItems(["Total time", "Calls", "Slowest call", "Rows"])
+        sort_keys = {"Total time": 'total_ms', "Calls": 'calls', "Slowest call": 'max_ms', "Rows": 'rows'}
+        refresh_btn = QPushButton("Refresh")
+        reset_btn = QPushButton("Reset")
+        close_btn = QPushButton("Close")
+        
+        def refresh():
+            report_text.setPlainText(query_stats.report(sort=sort_keys[sort_combo.currentText()]))
+        
+        def reset():
+            query_stats.reset()
+            refresh()
+        
+        sort_combo.currentTextChanged.connect(refresh)
+        refresh_btn.clicked.connect(refresh)
+        reset_btn.clicked.connect(reset)
+        close_btn.clicked.connect(dialog.accept)
+        
+        buttons.addWidget(QLabel("Sort by:"))
+        buttons.addWidget(sort_combo)
+        buttons.addStretch()
+        buttons.addWidget(refresh_btn)
+        buttons.addWidget(reset_btn)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+        
+        dialog.exec()
     
     def clear_system_cache(self):
         """Clear application cache - simulated function"""
@@ -2505,7 +2575,9 @@ class AdminDashboard(QWidget):
             "cancel_threshold": self.cancel_threshold_input.text(),
             "backup_path": self.backup_path_input.text(),
             "auto_backup": self.auto_backup_checkbox.isChecked(),
-            "backup_frequency": self.backup_freq_combo.currentText()
+            "backup_frequency": self.backup_freq_combo.currentText(),
+            "backup_compress": self.backup_compress_checkbox.isChecked(),
+            "backup_retention": self.backup_retention_input.text()
         }
         
         try:
@@ -2546,252 +2618,97 @@ class AdminDashboard(QWidget):
             self.backup_path_input.setText("backups/")
             self.auto_backup_checkbox.setChecked(True)
             self.backup_freq_combo.setCurrentText("Daily")
+            self.backup_compress_checkbox.setChecked(True)
+            self.backup_retention_input.setText("3")
             
             QMessageBox.information(self, "Reset Complete", "All settings have been reset to default values.")
     
-    def backup_database(self):
-        """Perform database backup using direct SQL connection with proper UI updates"""
-        from PySide6.QtWidgets import QProgressDialog
-        from PySide6.QtCore import Qt
+    def backup_database(self, incremental=False):
+        """Start a database backup on a background thread
+        
+        Args:
+            incremental (bool): Only back up changes since the latest backup
+        """
         import datetime
-        import os
-        from pathlib import Path
-        import time
         
-        # Start timing the operation
-        start_time = time.time()
+        if self.backup_thread is not None and self.backup_thread.isRunning():
+            QMessageBox.information(self, "Backup Running", "A database backup is already in progress.")
+            return
         
         # Log beginning of backup
         print("\n==== DATABASE BACKUP STARTED ====")
         print(f"Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
-        # Create backups directory if it doesn't exist
-        backup_dir = Path(self.backup_path_input.text().strip())
-        try:
-            os.makedirs(backup_dir, exist_ok=True)
-            print(f"Backup directory created/verified: {backup_dir}")
-        except Exception as e:
-            error_msg = f"Could not create backup directory: {str(e)}"
-            print(f"ERROR: {error_msg}")
-            QMessageBox.critical(self, "Backup Failed", error_msg)
-            return
-        
-        # Generate timestamp
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_file = backup_dir / f"food_delivery_backup_{timestamp}.sql"
-        print(f"Backup will be saved to: {backup_file}")
+        # Create progress dialog; the maximum is set once the table count is known
+        progress = QProgressDialog("Preparing to backup database...", "Cancel", 0, 0, self)
+        progress.setWindowTitle("Database Backup")
+        progress.setMinimumDuration(0)  # Show immediately
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.setValue(0)
+        
+        thread = BackupThread(
+            self.backup_path_input.text().strip(),
+            compress=self.backup_compress_checkbox.isChecked(),
+            incremental=incremental,
+            parent=self
+        )
         
-        # Get database connection details from environment
-        db_host = os.environ.get('DB_HOST', 'localhost')
-        db_user = os.environ.get('DB_USER', 'root')
-        db_password = os.environ.get('DB_PASSWORD', '')
-        db_name = os.environ.get('DB_NAME', 'food_delivery')
-        print(f"Database connection details: host={db_host}, user={db_user}, database={db_name}")
+        def on_progress(table, tables_done, table_count, rows):
+            if progress.maximum() != table_count:
+                progress.setMaximum(table_count)
+            progress.setValue(tables_done)
+            if rows:
+                progress.setLabelText(f"Backing up tables ({tables_done}/{table_count} done)\n{table}: {rows} rows")
+            else:
+                progress.setLabelText(f"Backing up tables ({tables_done}/{table_count} done)\n{table}")
         
-        # Use direct SQL queries for backup (no mysqldump required)
-        from db_utils import get_db_connection
+        def on_cancel():
+            print("Cancelling backup...")
+            thread.cancel()
         
-        # First, get table count to set up progress dialog
-        try:
-            print("Attempting to connect to database...")
-            connection = get_db_connection()
-            if not connection:
-                error_msg = "Could not connect to database for backup."
-                print(f"ERROR: {error_msg}")
-                QMessageBox.critical(self, "Backup Failed", error_msg)
-                return
-            
-            print("Successfully connected to database")
-            cursor = connection.cursor(dictionary=True)
-            
-            print("Getting list of tables...")
-            cursor.execute("SHOW TABLES")
-            tables = [list(table.values())[0] for table in cursor.fetchall()]
-            table_count = len(tables)
-            print(f"Found {table_count} tables to backup: {', '.join(tables)}")
-            
-            # Create progress dialog
-            progress = QProgressDialog("Preparing to backup database...", "Cancel", 0, table_count, self)
-            progress.setWindowTitle("Database Backup")
-            progress.setWindowModality(Qt.WindowModality.WindowModal)
-            progress.setMinimumDuration(0)  # Show immediately
-            progress.setValue(0)
-            
-            print("Starting backup process...")
-            # Open backup file
-            with open(backup_file, 'w') as f:
-                # Write header
-                f.write(f"-- Food Delivery System Database Backup\n")
-                f.write(f"-- Date: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"-- Database: {db_name}\n\n")
-                print("Wrote backup file header")
-                
-                # Process each table
-                for i, table in enumerate(tables):
-                    # Update progress dialog
-                    progress.setValue(i)
-                    progress.setLabelText(f"Backing up table: {table} ({i+1}/{table_count})")
-                    
-                    # Check if user canceled
-                    if progress.wasCanceled():
-                        print("Backup cancelled by user")
-                        cursor.close()
-                        connection.close()
-                        # Remove incomplete file
-                        if os.path.exists(backup_file):
-                            os.remove(backup_file)
-                            print(f"Removed incomplete backup file: {backup_file}")
-                        return
-                    
-                    # Allow UI to update
-                    QApplication.processEvents()
-                    
-                    # Get table structure
-                    try:
-                        print(f"Backing up table structure for '{table}'...")
-                        cursor.execute(f"SHOW CREATE TABLE `{table}`")
-                        create_table_sql = cursor.fetchone()['Create Table']
-                        
-                        # Write create table statement
-                        f.write(f"DROP TABLE IF EXISTS `{table}`;\n")
-                        f.write(f"{create_table_sql};\n\n")
-                        
-                        # Get table data
-                        print(f"Fetching data for table '{table}'...")
-                        cursor.execute(f"SELECT * FROM `{table}`")
-                        rows = cursor.fetchall()
-                        print(f"Found {len(rows)} rows in table '{table}'")
-                        
-                        # If table has data, write INSERT statements
-                        if rows:
-                            columns = list(rows[0].keys())
-                            print(f"Table '{table}' columns: {', '.join(columns)}")
-                            
-                            # Process in batches to avoid memory issues
-                            batch_size = 100
-                            total_rows = len(rows)
-                            total_batches = (total_rows + batch_size - 1) // batch_size  # Ceiling division
-                            
-                            print(f"Processing {total_rows} rows in {total_batches} batches (size {batch_size})...")
-                            for batch_start in range(0, total_rows, batch_size):
-                                batch_num = batch_start // batch_size + 1
-                                
-                                # Update progress text for large tables
-                                if total_rows > 1000:
-                                    progress.setLabelText(f"Backing up table: {table} - Rows {batch_start}/{total_rows}")
-                                    QApplication.processEvents()
-                                
-                                # Check for cancellation on each batch
-                                if progress.wasCanceled():
-                                    print("Backup cancelled by user during data processing")
-                                    cursor.close()
-                                    connection.close()
-                                    if os.path.exists(backup_file):
-                                        os.remove(backup_file)
-                                        print(f"Removed incomplete backup file: {backup_file}")
-                                    return
-                                
-                                # Process batch
-                                batch = rows[batch_start:batch_start + batch_size]
-                                print(f"Processing batch {batch_num}/{total_batches} ({len(batch)} rows)")
-                                
-                                # Generate VALUES part
-                                values_list = []
-                                for row in batch:
-                                    row_values = []
-                                    for column in columns:
-                                        if row[column] is None:
-                                            row_values.append("NULL")
-                                        elif isinstance(row[column], (int, float)):
-                                            row_values.append(str(row[column]))
-                                        elif isinstance(row[column], bytes):
-                                            # Handle binary data
-                                            hex_str = row[column].hex()
-                                            row_values.append(f"0x{hex_str}")
-                                        else:
-                                            # Escape string values
-                                            val = str(row[column]).replace("'", "''")
-                                            row_values.append(f"'{val}'")
-                                    values_list.append(f"({', '.join(row_values)})")
-                                
-                                # Write insert statement with multiple rows
-                                f.write(f"INSERT INTO `{table}` (`{'`, `'.join(columns)}`) VALUES\n")
-                                f.write(",\n".join(values_list))
-                                f.write(";\n\n")
-                                print(f"Wrote {len(batch)} rows in batch {batch_num}")
-                        else:
-                            print(f"Table '{table}' is empty - no data to backup")
-                    
-                    except Exception as table_error:
-                        print(f"ERROR processing table '{table}': {str(table_error)}")
-                        progress.close()
-                        cursor.close()
-                        connection.close()
-                        if os.path.exists(backup_file):
-                            os.remove(backup_file)
-                            print(f"Removed incomplete backup file: {backup_file}")
-                        QMessageBox.critical(self, "Backup Failed", f"Error while backing up table '{table}': {str(table_error)}")
-                        return
-                
-                # Completed successfully
-                progress.setValue(table_count)
-                print("Backup completed successfully")
-            
-            # Close database connection
-            cursor.close()
-            connection.close()
-            print("Database connection closed")
-            
-            # Check file size
-            backup_size = os.path.getsize(backup_file)
-            print(f"Backup file size: {backup_size/1024/1024:.2f} MB")
-            
-            # Success message
-            end_time = time.time()
-            duration = end_time - start_time
-            print(f"Backup took {duration:.2f} seconds")
+        def on_completed(result):
+            progress.close()
+            size_mb = result['bytes'] / 1024 / 1024
+            print(f"Backup file size: {size_mb:.2f} MB")
+            print(f"Backup took {result['seconds']:.2f} seconds")
             print("==== DATABASE BACKUP COMPLETED ====\n")
-            
             QMessageBox.information(
                 self, 
                 "Backup Complete", 
-                f"Database backup completed successfully.\nBackup stored at: {backup_file}\nFile size: {backup_size/1024/1024:.2f} MB\nTime: {duration:.2f} seconds"
+                f"Database backup completed successfully.\nBackup stored at: {result['path']}\nFile size: {size_mb:.2f} MB\nTime: {result['seconds']:.2f} seconds"
             )
-            
-        except Exception as e:
-            # Handle any uncaught exceptions
-            print(f"CRITICAL ERROR during backup: {str(e)}")
-            if 'progress' in locals():
-                progress.close()
-            if 'cursor' in locals() and cursor:
-                cursor.close()
-            if 'connection' in locals() and connection and connection.is_connected():
-                connection.close()
-                print("Database connection closed after error")
-            
-            # Remove failed backup
-            if os.path.exists(backup_file):
-                try:
-                    os.remove(backup_file)
-                    print(f"Removed incomplete backup file: {backup_file}")
-                except Exception as rm_err:
-                    print(f"Warning: Could not remove incomplete backup file: {str(rm_err)}")
-            
+        
+        def on_cancelled():
+            progress.close()
+            print("Backup cancelled by user")
+            print("==== DATABASE BACKUP CANCELLED ====\n")
+        
+        def on_failed(message):
+            progress.close()
+            print(f"CRITICAL ERROR during backup: {message}")
             print("==== DATABASE BACKUP FAILED ====\n")
-            QMessageBox.critical(self, "Backup Failed", f"Failed to perform database backup: {str(e)}")
+            QMessageBox.critical(self, "Backup Failed", f"Failed to perform database backup: {message}")
+        
+        thread.progress_changed.connect(on_progress)
+        thread.backup_completed.connect(on_completed)
+        thread.backup_cancelled.connect(on_cancelled)
+        thread.backup_failed.connect(on_failed)
+        def on_finished():
+            self.backup_thread = None
+            thread.deleteLater()
+        
+        thread.finished.connect(on_finished)
+        progress.canceled.connect(on_cancel)
+        
+        self.backup_thread = thread
+        thread.start()
     
     def restore_database(self):
-        """Restore database from a backup file using direct SQL connection"""
+        """Restore database from a backup file, streaming it statement by statement"""
         from PySide6.QtWidgets import QFileDialog, QProgressDialog
-        from PySide6.QtCore import Qt, QProcess
-        import os
-        import re
-        import time
+        from PySide6.QtCore import Qt
         import datetime
-        import sys
-        
-        # Start timing the operation
-        start_time = time.time()
         
         # Log beginning of restore
         print("\n==== DATABASE RESTORE STARTED ====")
@@ -2812,7 +2729,7 @@ class AdminDashboard(QWidget):
             self,
             "Select Backup File",
             str(self.backup_path_input.text()),
-            "SQL Files (*.sql)"
+            "Backup Files (*.sql *.sql.gz)"
         )
         
         if not backup_file:
@@ -2821,113 +2738,66 @@ class AdminDashboard(QWidget):
         
         print(f"Selected backup file: {backup_file}")
         
-        # Check file size
-        try:
-            file_size = os.path.getsize(backup_file)
-            print(f"Backup file size: {file_size/1024/1024:.2f} MB")
-        except Exception as e:
-            print(f"Warning: Could not determine file size: {str(e)}")
+        # Progress is tracked in tenths of a percent of the SQL text
+        progress = QProgressDialog("Preparing to restore database...", "Cancel", 0, 1000, self)
+        progress.setWindowTitle("Database Restore")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)  # Show immediately
+        progress.setValue(0)
         
-        # Use direct SQL connection instead of mysql client
-        from db_utils import get_db_connection
+        corrupt_chunks = []
         
-        # Read SQL file first to count statements
-        try:
-            print("Reading backup file...")
-            with open(backup_file, 'r') as f:
-                sql_file = f.read()
-                
-            # Split file content into individual statements
-            print("Splitting SQL file into statements...")
-            statements = re.split(r';\s*\n', sql_file)
-            total_statements = len([s for s in statements if s.strip()])
-            print(f"Found {total_statements} SQL statements to execute")
-            
-            # Create progress dialog
-            progress = QProgressDialog("Preparing to restore database...", "Cancel", 0, total_statements, self)
-            progress.setWindowTitle("Database Restore")
-            progress.setWindowModality(Qt.WindowModality.WindowModal)
-            progress.setMinimumDuration(0)  # Show immediately
-            progress.setValue(0)
-            
-            print("Attempting to connect to database...")
-            connection = get_db_connection()
-            if not connection:
-                print("ERROR: Could not connect to database for restore")
-                QMessageBox.critical(self, "Restore Failed", "Could not connect to database for restore.")
-                return
-            
-            print("Successfully connected to database")
-            cursor = connection.cursor()
-            
-            # Turn off foreign key checks temporarily
-            print("Disabling foreign key checks...")
-            cursor.execute("SET FOREIGN_KEY_CHECKS=0;")
+        def on_corrupt(chunk, reason):
+            print(f"WARNING: Skipping corrupt chunk of table '{chunk['table']}' at offset {chunk['offset']}: {reason}")
+            corrupt_chunks.append(chunk)
+        
+        started = time.perf_counter()
+        
+        def on_progress(bytes_done, bytes_total, statements, rows):
+            if bytes_total:
+                progress.setValue(min(999, int(bytes_done * 1000 / bytes_total)))
+            rows_per_second = rows / max(time.perf_counter() - started, 1e-9)
+            progress.setLabelText(
+                f"Restoring database: {bytes_done / 1024 / 1024:.1f} of {bytes_total / 1024 / 1024:.1f} MB\n"
+                f"{statements} statements, {rows:,} rows ({rows_per_second:,.0f} rows/s)"
+            )
             
-            executed = 0
-            skipped = 0
+            # Allow UI to update and check if user canceled
+            QApplication.processEvents()
+            return not progress.wasCanceled()
+        
+        try:
+            # Keep scheduled and manual backups out of the database until the restore is done
+            with BackupLock(self.backup_path_input.text().strip()):
+                result = restore_backup(
+                    backup_file,
+                    progress=on_progress,
+                    on_corrupt=on_corrupt,
+                    workers=RESTORE_WORKERS
+                )
+            progress.setValue(1000)
             
-            # Execute each statement
-            for i, statement in enumerate(statements):
-                if statement.strip():  # Skip empty statements
-                    progress.setValue(executed)
-                    progress.setLabelText(f"Restoring database: {executed}/{total_statements}")
-                    
-                    # Check for user cancellation
-                    if progress.wasCanceled():
-                        print("Restore cancelled by user during execution")
-                        cursor.execute("SET FOREIGN_KEY_CHECKS=1;")  # Re-enable foreign key checks
-                        cursor.close()
-                        connection.close()
-                        print("Database connection closed after cancellation")
-                        return
-                    
-                    # Allow UI to update
-                    QApplication.processEvents()
-                    
-                    # Execute the statement
-                    try:
-                        print(f"Executing statement {executed+1}/{total_statements} ({len(statement)} characters)...")
-                        if len(statement) > 100:
-                            print(f"Statement preview: {statement[:97]}...")
-                        else:
-                            print(f"Statement: {statement}")
-                            
-                        cursor.execute(statement)
-                        connection.commit()
-                        executed += 1
-                        print(f"Statement {executed}/{total_statements} executed successfully")
-                    except Exception as stmt_error:
-                        print(f"ERROR executing statement: {str(stmt_error)}")
-                        if len(statement) > 100:
-                            print(f"Failed statement preview: {statement[:97]}...")
-                        else:
-                            print(f"Failed statement: {statement}")
-                        skipped += 1
-                        # Continue with next statement
-            
-            # Turn foreign key checks back on
-            print("Re-enabling foreign key checks...")
-            cursor.execute("SET FOREIGN_KEY_CHECKS=1;")
-            
-            cursor.close()
-            connection.close()
-            print("Database connection closed")
-            
-            progress.setValue(total_statements)
-            
-            # Success message
-            end_time = time.time()
-            duration = end_time - start_time
-            print(f"Restore completed in {duration:.2f} seconds")
-            print(f"Statements: {executed} executed, {skipped} skipped")
+            duration = result['seconds']
+            throughput = result['bytes'] / 1024 / 1024 / duration if duration else 0
+            rows_per_second = result['rows'] / duration if duration else 0
+            print(f"Restore completed in {duration:.2f} seconds ({throughput:.1f} MB/s, {rows_per_second:,.0f} rows/s)")
+            print(f"Statements: {result['statements']} executed, {result['skipped']} skipped")
             print("==== DATABASE RESTORE COMPLETED ====\n")
             
             # Prepare restart message
+            corrupt_msg = ""
+            if corrupt_chunks:
+                corrupt_tables = sorted({chunk['table'] or "header" for chunk in corrupt_chunks})
+                corrupt_msg = (
+                    f"Skipped {len(corrupt_chunks)} corrupt backup chunks in: "
+                    f"{', '.join(corrupt_tables)}\n"
+                )
             success_msg = (
                 f"Database restore completed successfully.\n\n"
-                f"Statements: {executed} executed, {skipped} skipped\n"
-                f"Time: {duration:.2f} seconds\n\n"
+                f"Statements: {result['statements']} executed, {result['skipped']} skipped\n"
+                f"{corrupt_msg}"
+                f"Rows: {result['rows']:,} ({rows_per_second:,.0f} rows/s)\n"
+                f"Time: {duration:.2f} seconds ({throughput:.1f} MB/s)\n\n"
                 "The application will now restart to apply the changes."
             )
             
@@ -2940,16 +2810,13 @@ class AdminDashboard(QWidget):
             restart_msg.buttonClicked.connect(self.restart_application)
             restart_msg.exec()
             
+        except RestoreCancelled:
+            progress.close()
+            print("Restore cancelled by user during execution")
+            print("==== DATABASE RESTORE CANCELLED ====\n")
         except Exception as e:
+            progress.close()
             print(f"CRITICAL ERROR during restore: {str(e)}")
-            if 'progress' in locals():
-                progress.close()
-            if 'cursor' in locals() and cursor:
-                cursor.close()
-            if 'connection' in locals() and connection and connection.is_connected():
-                connection.close()
-                print("Database connection closed after error")
-            
             print("==== DATABASE RESTORE FAILED ====\n")
             QMessageBox.critical(self, "Restore Failed", f"Failed to restore database: {str(e)}")
             
@@ -2980,26 +2847,28 @@ class AdminDashboard(QWidget):
             print("Application closed.")
     
     def show_dashboard(self):
-        self.content_area.setCurrentWidget(self.dashboard_page)
+        self.pages.show('dashboard_page')
     
     def manage_users(self):
-        self.content_area.setCurrentWidget(self.users_page)
+        self.pages.show('users_page')
     
     def manage_restaurants(self):
-        self.content_area.setCurrentWidget(self.restaurants_page)
-        self.load_restaurants()  # Refresh data
+        already_built = self.pages.is_built('restaurants_page')
+        self.pages.show('restaurants_page')
+        if already_built:
+            self.load_restaurants()  # Refresh data
     
     def manage_delivery(self):
-        self.content_area.setCurrentWidget(self.delivery_page)
+        self.pages.show('delivery_page')
     
     def manage_orders(self):
-        self.content_area.setCurrentWidget(self.orders_page)
+        self.pages.show('orders_page')
     
     def view_reports(self):
-        self.content_area.setCurrentWidget(self.reports_page)
+        self.pages.show('reports_page')
     
     def system_settings(self):
-        self.content_area.setCurrentWidget(self.settings_page)
+        self.pages.show('settings_page')
     
     def logout(self):
         reply = QMessageBox.question(
@@ -3034,7 +2903,7 @@ class AdminDashboard(QWidget):
                 if self._dashboard_refresh_counter >= 6:  # Every 3 seconds
                     self._dashboard_refresh_counter = 0
                     try:
-                        today_orders = execute_query("SELECT COUNT(*) as count FROM orders WHERE DATE(order_time) = CURDATE()")
+                        today_orders = execute_query("SELECT COUNT(*) as count FROM orders WHERE order_time >= CURDATE() AND order_time < CURDATE() + INTERVAL 1 DAY")
                         if today_orders:
                             self.today_orders_value.setText(str(today_orders[0]['count']))
                     except Exception as e:
@@ -3112,7 +2981,7 @@ class AdminDashboard(QWidget):
                 self._analytics_refresh_counter += 1
                 if self._analytics_refresh_counter >= 10:  # Every 5 seconds for analytics
                     self._analytics_refresh_counter = 0
-                    if hasattr(self, 'refresh_analytics'):
+                    if self.reports_page is not None:
                         self.refresh_analytics()
                 
                 self._skip_refresh = False
@@ -3136,6 +3005,25 @@ class AdminDashboard(QWidget):
             print(f"Auto-refresh error in admin dashboard: {e}")
             # Don't show error to user since this runs automatically
     
+    def delivered_revenue(self):
+        """Return the revenue of all delivered orders, or None if the query fails
+        
+        Archived revenue never changes, so it comes from a cached archive_total().
+        """
+        revenue = execute_query("SELECT SUM(total_amount) as total FROM orders WHERE delivery_status = 'Delivered'")
+        if revenue is None:
+            return None
+        archived = archive_total("SELECT SUM(total_amount) as total FROM orders_archive WHERE delivery_status = 'Delivered'")
+        return float(revenue[0]['total'] or 0) + float(archived)
+    
+    def on_orders_dispatched(self, count):
+        print(f"Auto-dispatch assigned {count} orders")
+    
+    def stop_auto_dispatch(self):
+        """Stop the dispatch thread, waiting for a running tick to finish"""
+        self.dispatch_thread.stop()
+        self.dispatch_thread.wait()
+    
     # Helper methods for displaying messages in tables
     def display_db_error_message(self, table, message="Database connection error. Please check your database connection."):
         """Display an error message in a table when database operations fail"""
@@ -3237,14 +3125,14 @@ class AdminDashboard(QWidget):
                 self.stat_widgets['user_count_value'].setText(str(user_count[0]['count']))
             
             # Update today's orders
-            today_orders = execute_query("SELECT COUNT(*) as count FROM orders WHERE DATE(order_time) = CURDATE()")
+            today_orders = execute_query("SELECT COUNT(*) as count FROM orders WHERE order_time >= CURDATE() AND order_time < CURDATE() + INTERVAL 1 DAY")
             if today_orders and hasattr(self, 'stat_widgets') and 'today_orders_value' in self.stat_widgets:
                 self.stat_widgets['today_orders_value'].setText(str(today_orders[0]['count']))
             
             # Update total revenue
-            revenue = execute_query("SELECT SUM(total_amount) as total FROM orders WHERE delivery_status = 'Delivered'")
-            if revenue and revenue[0]['total'] and hasattr(self, 'stat_widgets') and 'total_revenue_value' in self.stat_widgets:
-                self.stat_widgets['total_revenue_value'].setText(f"AED {float(revenue[0]['total']):.2f}")
+            revenue = self.delivered_revenue()
+            if revenue and hasattr(self, 'stat_widgets') and 'total_revenue_value' in self.stat_widgets:
+                self.stat_widgets['total_revenue_value'].setText(f"AED {revenue:.2f}")
             elif hasattr(self, 'stat_widgets') and 'total_revenue_value' in self.stat_widgets:
                 self.stat_widgets['total_revenue_value'].setText("AED 0.00")
             
@@ -3617,4 +3505,103 @@ class DeliveryPersonDialog(QDialog):
             else:
                 QMessageBox.critical(self, "Error", "Failed to save delivery person")
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}") 
\ No newline at end of file
+            QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}") 
+
+class BackupThread(QThread):
+    """Runs backup_database off the UI thread and reports through signals"""
+    progress_changed = Signal(str, int, int, int)
+    backup_completed = Signal(object)
+    backup_cancelled = Signal()
+    backup_failed = Signal(str)
+    
+    def __init__(self, backup_dir, compress=False, incremental=False, workers=BACKUP_WORKERS, parent=None):
+        super().__init__(parent)
+        self.backup_dir = backup_dir
+        self.compress = compress
+        self.incremental = incremental
+        self.workers = workers
+        self._cancel_requested = False
+    
+    def cancel(self):
+        """Ask the backup to stop at the next fetched batch"""
+        self._cancel_requested = True
+    
+    def report_progress(self, table, tables_done, table_count, rows):
+        # Called from the backup worker threads; signals are queued to the UI thread
+        self.progress_changed.emit(table, tables_done, table_count, rows)
+        return not self._cancel_requested
+    
+    def run(self):
+        try:
+            # Raises BackupBusy while a scheduled backup or a restore is running
+            with BackupLock(self.backup_dir):
+                if self.incremental:
+                    result = incremental_backup(
+                        self.backup_dir,
+                        progress=self.report_progress,
+                        compress=self.compress
+                    )
+                else:
+                    result = backup_database(
+                        self.backup_dir,
+                        progress=self.report_progress,
+                        compress=self.compress,
+                        workers=self.workers
+                    )
+            self.backup_completed.emit(result)
+        except BackupCancelled:
+            self.backup_cancelled.emit()
+        except Exception as e:
+            self.backup_failed.emit(str(e))
+
+class DispatchThread(QThread):
+    """Runs AutoDispatcher.tick every few seconds off the UI thread until stopped"""
+    orders_dispatched = Signal(int)
+    
+    def __init__(self, interval_seconds=DISPATCH_INTERVAL_SECONDS, parent=None):
+        super().__init__(parent)
+        self.dispatcher = AutoDispatcher()
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+    
+    def stop(self):
+        """Ask the loop to exit after the current tick"""
+        self._stop.set()
+    
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                assignments = self.dispatcher.tick()
+                if assignments:
+                    self.orders_dispatched.emit(len(assignments))
+            except Exception as e:
+                print(f"Auto-dispatch error: {e}")
+            self._stop.wait(self.interval_seconds)
+
+class MaintenanceThread(QThread):
+    """Runs run_maintenance off the UI thread and reports through signals"""
+    progress_changed = Signal(str, str, int, int)
+    maintenance_completed = Signal(object)
+    maintenance_cancelled = Signal()
+    maintenance_failed = Signal(str)
+    
+    def __init__(self, force=False, parent=None):
+        super().__init__(parent)
+        self.force = force
+        self._cancel_requested = False
+    
+    def cancel(self):
+        """Ask maintenance to stop before the next table"""
+        self._cancel_requested = True
+    
+    def report_progress(self, table, action, jobs_done, job_count):
+        self.progress_changed.emit(table, action, jobs_done, job_count)
+        return not self._cancel_requested
+    
+    def run(self):
+        try:
+            self.maintenance_completed.emit(run_maintenance(progress=self.report_progress, force=self.force))
+        except MaintenanceCancelled:
+            self.maintenance_cancelled.emit()
+        except Exception as e:
+            self.maintenance_failed.emit(str(e))
\ No newline at end of file
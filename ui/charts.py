@@ -0,0 +1,188 @@
+"""Deferred matplotlib loading for the dashboard charts
+
+Importing matplotlib and its Qt backend takes a large share of startup, and
+most sessions never open a reports page. The dashboards get matplotlib from
+here the first time they draw a chart.
+
+The reports pages keep one Chart per plot and update it on each refresh,
+rather than building a new figure and canvas every time.
+"""
+import abc
+import math
+
+_backend = None
+
+def chart_backend():
+    """Return (Figure, FigureCanvas), importing matplotlib on first use"""
+    global _backend
+    if _backend is None:
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+        _backend = (Figure, FigureCanvas)
+    return _backend
+
+def palette(count, name="Paired"):
+    """Return count colors spread evenly over a matplotlib colormap"""
+    import matplotlib
+    colormap = matplotlib.colormaps[name]
+    return colormap([index / count for index in range(count)])
+
+def rotate_date_labels(ax, rotation=45):
+    """Slant an axis' x tick labels so dates don't overlap"""
+    for label in ax.get_xticklabels():
+        label.set_rotation(rotation)
+        label.set_horizontalalignment('right')
+
+class Chart(abc.ABC):
+    """A matplotlib chart that lives in one canvas for the life of its page
+
+    The figure and canvas are created once and the chart's artists are
+    updated in place. update() does nothing when the data is the same as
+    last time. When the axes don't need to change, it blits just the data
+    artists over a saved copy of the axes background instead of redrawing
+    the whole figure.
+    """
+
+    def __init__(self, container, figsize=(5, 4)):
+        Figure, FigureCanvas = chart_backend()
+        self.figure = Figure(figsize=figsize, dpi=100)
+        self.canvas = FigureCanvas(self.figure)
+        self.ax = self.figure.add_subplot(111)
+        self.data = None
+        self.background = None
+        self.full_draws = 0
+        self.blits = 0
+        self.skipped = 0
+        container.layout().addWidget(self.canvas)
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def artists(self):
+        """Animated artists, drawn over the saved background"""
+        return []
+
+    def on_draw(self, event):
+        # A full draw (also on resize) renders everything except the
+        # animated artists, so the background can be saved before adding them
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        for artist in self.artists():
+            self.ax.draw_artist(artist)
+
+    def redraw(self):
+        """Redraw the whole figure, after the axes or layout changed"""
+        self.figure.tight_layout()
+        self.canvas.draw()
+        self.full_draws += 1
+
+    def blit(self):
+        """Repaint only the data artists"""
+        if self.background is None:
+            self.redraw()
+            return
+        self.canvas.restore_region(self.background)
+        for artist in self.artists():
+            self.ax.draw_artist(artist)
+        self.canvas.blit(self.ax.bbox)
+        self.blits += 1
+
+    def update(self, *data):
+        """Show new data; returns False if it matched what is already shown"""
+        if data == self.data:
+            self.skipped += 1
+            return False
+        previous, self.data = self.data, data
+        self.render(previous, *data)
+        return True
+
+    @abc.abstractmethod
+    def render(self, previous, *data):
+        """Draw data, given the data shown before (None on the first update)"""
+
+class PieChart(Chart):
+    """Pie chart whose wedges are resized in place while the labels stay the same"""
+
+    START_ANGLE = 90
+    LABEL_DISTANCE = 1.1
+    PCT_DISTANCE = 0.6
+
+    def __init__(self, container, figsize=(5, 4)):
+        super().__init__(container, figsize)
+        self.wedges, self.texts, self.autotexts = [], [], []
+
+    def artists(self):
+        return self.wedges + self.texts + self.autotexts
+
+    def render(self, previous, labels, sizes):
+        total = float(sum(sizes))
+        if previous and previous[0] == labels and total > 0:
+            self.move_wedges(sizes, total)
+            self.blit()
+            return
+
+        self.ax.clear()
+        self.wedges, self.texts, self.autotexts = [], [], []
+        if total > 0:
+            self.wedges, self.texts, self.autotexts = self.ax.pie(
+                sizes, labels=labels, autopct='%1.1f%%', startangle=self.START_ANGLE,
+                colors=palette(len(labels)), labeldistance=self.LABEL_DISTANCE, pctdistance=self.PCT_DISTANCE)
+            self.ax.axis('equal')  # Equal aspect ratio ensures circular pie
+        else:
+            self.ax.axis('off')
+        for artist in self.artists():
+            artist.set_animated(True)
+        self.redraw()
+
+    def move_wedges(self, sizes, total):
+        """Set wedge angles and label positions the way Axes.pie lays them out"""
+        theta1 = self.START_ANGLE
+        for wedge, text, autotext, size in zip(self.wedges, self.texts, self.autotexts, sizes):
+            theta2 = theta1 + 360 * float(size) / total
+            wedge.set_theta1(theta1)
+            wedge.set_theta2(theta2)
+            middle = math.radians((theta1 + theta2) / 2)
+            x, y = math.cos(middle), math.sin(middle)
+            text.set_position((self.LABEL_DISTANCE * x, self.LABEL_DISTANCE * y))
+            text.set_horizontalalignment('left' if x > 0 else 'right')
+            autotext.set_position((self.PCT_DISTANCE * x, self.PCT_DISTANCE * y))
+            autotext.set_text(f"{100 * float(size) / total:1.1f}%")
+            theta1 = theta2
+
+class TrendChart(Chart):
+    """Line chart over dates; new values within the current y range are blitted"""
+
+    def __init__(self, container, title, ylabel, color='#3498db', figsize=(5, 4)):
+        super().__init__(container, figsize)
+        self.title = title
+        self.ylabel = ylabel
+        self.color = color
+        self.line = None
+
+    def artists(self):
+        return [self.line] if self.line else []
+
+    def render(self, previous, dates, values):
+        if not dates:
+            self.ax.clear()
+            self.line = None
+            self.redraw()
+            return
+
+        if self.line is not None and previous and previous[0] == dates:
+            low, high = self.ax.get_ylim()
+            if low <= min(values) and max(values) <= high:
+                self.line.set_ydata(values)
+                self.blit()
+                return
+
+        if self.line is None:
+            self.ax.clear()
+            self.line, = self.ax.plot(dates, values, 'o-', color=self.color, linewidth=2, animated=True)
+            self.ax.set_title(self.title)
+            self.ax.set_ylabel(self.ylabel)
+            self.ax.grid(True, linestyle='--', alpha=0.7)
+        else:
+            self.line.set_data(dates, values)
+            self.ax.relim()
+            self.ax.autoscale_view()
+        # Rotate date labels for better readability
+        rotate_date_labels(self.ax)
+        self.redraw()
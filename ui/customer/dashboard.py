@@ -5,11 +5,14 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton,
                              QLineEdit, QComboBox, QHeaderView, QSlider, QGroupBox, QTextEdit,
                              QSpinBox, QProgressBar, QMenu, QCheckBox, QRadioButton)
 from PySide6.QtCore import Qt, Signal, QSize, QTimer
-from PySide6.QtGui import QFont, QIcon, QPixmap, QCursor
+from PySide6.QtGui import QFont, QIcon, QCursor
 import os
 
 from ui.customer.restaurant_view import RestaurantView
 from db_utils import execute_query
+from ui.pages import LazyPages
+from ui.images import scaled_pixmap, set_image, CARD_LOGO_SIZE, MENU_IMAGE_SIZE
+from services.archive import order_table, archive_query, average_rating
 
 
 class SearchDialog(QDialog):
@@ -119,7 +122,6 @@ class CustomerDashboard(QWidget):
         self.user = user
         self.current_restaurant = None
         self.cart_items = []  # List of dictionaries containing menu_item and quantity
-        self.customer_id = None
         self._source_call = None  # Track the source of method calls
         
         # Set up auto-refresh timer for real-time updates
@@ -131,6 +133,11 @@ class CustomerDashboard(QWidget):
         # Load customer profile data after UI is initialized
         self.load_customer_profile()
     
+    @property
+    def customer_id(self):
+        """The customer's ID from the session profile cache, or None without a profile"""
+        return self.user.customer_id
+    
     def initUI(self):
         self.setWindowTitle("Food Delivery - Customer Dashboard")
         
@@ -161,7 +168,7 @@ class CustomerDashboard(QWidget):
         
         profile_pic = QLabel()
         profile_pic.setObjectName("profile-pic")
-        profile_pic.setPixmap(QPixmap("assets/img/customer-avatar.png").scaled(80, 80, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        profile_pic.setPixmap(scaled_pixmap("assets/img/customer-avatar.png", 80))
         profile_pic.setAlignment(Qt.AlignmentFlag.AlignCenter)
         
         image_layout.addWidget(profile_pic)
@@ -200,21 +207,14 @@ class CustomerDashboard(QWidget):
         # Content area
         self.content_area = QStackedWidget()
         
-        # Create pages
-        self.home_page = self.create_home_page()
-        self.restaurants_page = self.create_restaurants_page()
-        self.orders_page = self.create_orders_page()
-        self.favorites_page = self.create_favorites_page()
-        self.profile_page = self.create_profile_page()
-        self.cart_page = self.create_cart_page()
-        
-        # Add pages to content area
-        self.content_area.addWidget(self.home_page)
-        self.content_area.addWidget(self.restaurants_page)
-        self.content_area.addWidget(self.orders_page)
-        self.content_area.addWidget(self.favorites_page)
-        self.content_area.addWidget(self.profile_page)
-        self.content_area.addWidget(self.cart_page)
+        # Pages are built, and load their data, the first time they are shown
+        self.pages = LazyPages(self, self.content_area)
+        self.pages.register('home_page', self.create_home_page)
+        self.pages.register('restaurants_page', self.create_restaurants_page)
+        self.pages.register('orders_page', self.create_orders_page)
+        self.pages.register('favorites_page', self.create_favorites_page)
+        self.pages.register('profile_page', self.create_profile_page)
+        self.pages.register('cart_page', self.create_cart_page)
         
         # Add widgets to main layout
         main_layout.addWidget(sidebar)
@@ -504,7 +504,7 @@ class CustomerDashboard(QWidget):
         """)
         
         # Start with home page
-        self.content_area.setCurrentWidget(self.home_page)
+        self.pages.show('home_page')
     
     def create_home_page(self):
         page = QWidget()
@@ -807,6 +807,11 @@ class CustomerDashboard(QWidget):
         btn_container.addWidget(view_button)
         btn_container.addWidget(favorite_button)
         
+        # Logos load in the background, so the grid doesn't wait for them
+        if restaurant.get('logo_url'):
+            logo_label = QLabel()
+            set_image(logo_label, restaurant['logo_url'], CARD_LOGO_SIZE)
+            card_layout.addWidget(logo_label, alignment=Qt.AlignmentFlag.AlignCenter)
         card_layout.addWidget(name_label)
         card_layout.addWidget(cuisine_label)
         card_layout.addWidget(rating_label)
@@ -848,6 +853,9 @@ class CustomerDashboard(QWidget):
         return card
 
     def load_restaurants(self):
+        if not hasattr(self, 'restaurants_grid'):
+            return  # Page not built yet; it loads when first shown
+        
         # Clear existing restaurants
         while self.restaurants_grid.count():
             item = self.restaurants_grid.takeAt(0)
@@ -971,6 +979,9 @@ class CustomerDashboard(QWidget):
         )
     
     def update_cart_display(self):
+        if not hasattr(self, 'cart_table'):
+            return  # Cart page not built yet; it is filled when first shown
+        
         # Clear existing items
         self.cart_table.setRowCount(0)
         
@@ -1066,23 +1077,28 @@ class CustomerDashboard(QWidget):
             self.update_cart_display()
     
     def browse_restaurants(self):
-        self.content_area.setCurrentWidget(self.restaurants_page)
-        self.load_restaurants()  # Load restaurants when switching to the page
+        already_built = self.pages.is_built('restaurants_page')
+        self.pages.show('restaurants_page')
+        if already_built:
+            self.load_restaurants()  # Load restaurants when switching to the page
     
     def my_orders(self):
-        self.content_area.setCurrentWidget(self.orders_page)
+        self.pages.show('orders_page')
         self.load_orders()
     
     def favorites(self):
-        self.content_area.setCurrentWidget(self.favorites_page)
+        self.pages.show('favorites_page')
         self.load_favorites()  # Load favorites when switching to the page
     
     def profile(self):
-        self.content_area.setCurrentWidget(self.profile_page)
-        self.load_customer_profile()  # Refresh profile data
+        already_built = self.pages.is_built('profile_page')
+        self.pages.show('profile_page')
+        if already_built:
+            self.load_customer_profile()  # Refresh profile data
     
     def cart(self):
-        self.content_area.setCurrentWidget(self.cart_page)
+        self.pages.show('cart_page')
+        self.update_cart_display()
     
     def logout(self):
         reply = QMessageBox.question(
@@ -1178,10 +1194,8 @@ class CustomerDashboard(QWidget):
         form_layout = QFormLayout()
         
         # Get customer info
-        customer = execute_query("SELECT * FROM customers WHERE user_id = %s", (self.user.user_id,))
-        if customer:
-            customer = customer[0]
-        else:
+        customer = self.user.get_profile()
+        if not customer:
             customer = {"name": "", "phone": "", "address": ""}
         
         self.delivery_name = QLineEdit(customer['name'])
@@ -1255,11 +1269,10 @@ class CustomerDashboard(QWidget):
             restaurant_id = self.cart_items[0]['menu_item']['restaurant_id']
             
             # Get customer email from user
-            user_email = execute_query("SELECT email FROM users WHERE user_id = %s", (self.user.user_id,))[0]['email']
+            user_email = self.user.email
             
             # Get or create customer
-            customer_query = "SELECT * FROM customers WHERE user_id = %s"
-            customer = execute_query(customer_query, (self.user.user_id,))
+            customer = self.user.get_profile()
             
             if not customer:
                 # Create customer profile with email
@@ -1273,7 +1286,7 @@ class CustomerDashboard(QWidget):
                     fetch=False
                 )
             else:
-                customer_id = customer[0]['customer_id']
+                customer_id = customer['customer_id']
                 
                 # Update customer details
                 update_customer = """
@@ -1287,6 +1300,9 @@ class CustomerDashboard(QWidget):
                     fetch=False
                 )
             
+            # The profile was created or its details changed
+            self.user.invalidate_profile()
+            
             # Create order with all required fields
             order_query = """
             INSERT INTO orders (customer_id, restaurant_id, subtotal, total_amount, 
@@ -1373,6 +1389,9 @@ class CustomerDashboard(QWidget):
     
     def load_orders(self):
         """Load customer orders"""
+        if not hasattr(self, 'orders_layout'):
+            return  # Page not built yet; it loads when first shown
+        
         # Clear existing orders
         while self.orders_layout.count():
             item = self.orders_layout.takeAt(0)
@@ -1381,24 +1400,27 @@ class CustomerDashboard(QWidget):
                 widget.deleteLater()
         
         # Get customer ID
-        customer = execute_query("SELECT customer_id FROM customers WHERE user_id = %s", (self.user.user_id,))
-        if not customer:
+        customer_id = self.customer_id
+        if not customer_id:
             # No orders yet
             no_orders_label = QLabel("You haven't placed any orders yet.")
             no_orders_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
             self.orders_layout.addWidget(no_orders_label)
             return
         
-        customer_id = customer[0]['customer_id']
-        
-        # Get orders
-        orders = execute_query("""
-            SELECT o.*, r.name as restaurant_name, r.address as restaurant_address
-            FROM orders o
+        # Get orders. This runs on every refresh, so archived orders, which never
+        # change and are older than any hot order, come from archive_query()'s cache.
+        orders_query = """
+            SELECT o.*, {is_archived} as is_archived,
+                   r.name as restaurant_name, r.address as restaurant_address
+            FROM {orders} o
             JOIN restaurants r ON o.restaurant_id = r.restaurant_id
             WHERE o.customer_id = %s
             ORDER BY o.order_time DESC
-        """, (customer_id,))
+        """
+        orders = execute_query(orders_query.format(orders="orders", is_archived=0), (customer_id,))
+        if orders is not None:
+            orders += archive_query(orders_query.format(orders="orders_archive", is_archived=1), (customer_id,))
         
         if not orders:
             # No orders yet
@@ -1480,7 +1502,9 @@ class CustomerDashboard(QWidget):
         # View details button
         details_btn = QPushButton("View Details")
         details_btn.setObjectName("view-details-btn")
-        details_btn.clicked.connect(lambda checked, oid=order['order_id']: self.view_order_details(oid))
+        details_btn.clicked.connect(
+            lambda checked, oid=order['order_id'], archived=order.get('is_archived'): self.view_order_details(oid, archived)
+        )
         
         # Add all elements to card
         card_layout.addLayout(header_layout)
@@ -1492,14 +1516,18 @@ class CustomerDashboard(QWidget):
         # Add to orders layout
         self.orders_layout.addWidget(card)
     
-    def view_order_details(self, order_id):
-        """Show a dialog with order details"""
+    def view_order_details(self, order_id, archived=False):
+        """Show a dialog with order details
+        
+        Args:
+            archived (bool): The order was found in the order archive (services/archive.py)
+        """
         # Get order details
-        order = execute_query("""
+        order = execute_query(f"""
             SELECT o.*, r.name as restaurant_name, r.restaurant_id, c.customer_id,
                    dp.delivery_person_id, dp.name as delivery_person_name,
-                   (SELECT COUNT(*) FROM ratings WHERE order_id = o.order_id) as has_rating
-            FROM orders o
+                   (SELECT COUNT(*) FROM {order_table('ratings', archived)} WHERE order_id = o.order_id) as has_rating
+            FROM {order_table('orders', archived)} o
             JOIN restaurants r ON o.restaurant_id = r.restaurant_id
             JOIN customers c ON o.customer_id = c.customer_id
             LEFT JOIN delivery_personnel dp ON o.delivery_person_id = dp.delivery_person_id
@@ -1507,9 +1535,9 @@ class CustomerDashboard(QWidget):
         """, (order_id,))[0]
         
         # Get order items
-        items = execute_query("""
+        items = execute_query(f"""
             SELECT oi.*, m.dish_name
-            FROM order_items oi
+            FROM {order_table('order_items', archived)} oi
             JOIN menus m ON oi.menu_id = m.menu_id
             WHERE oi.order_id = %s
         """, (order_id,))
@@ -1603,7 +1631,7 @@ class CustomerDashboard(QWidget):
         buttons_layout.addWidget(close_btn)
         
         # Add Rate Order button for completed orders that haven't been rated
-        if order['delivery_status'] == 'Delivered' and not order['has_rating']:
+        if order['delivery_status'] == 'Delivered' and not order['has_rating'] and not archived:
             rate_btn = QPushButton("Rate Order")
             rate_btn.setObjectName("action-button")
             rate_btn.clicked.connect(lambda: self.show_rating_dialog(order_id, order['restaurant_id'], 
@@ -1832,30 +1860,16 @@ class CustomerDashboard(QWidget):
             """
             execute_query(update_query, (order_id,), fetch=False)
             
-            # Update restaurant rating average
-            restaurant_update = """
-            UPDATE restaurants r
-            SET rating = (
-                SELECT AVG(food_rating) 
-                FROM ratings 
-                WHERE restaurant_id = %s
-            )
-            WHERE restaurant_id = %s
-            """
-            execute_query(restaurant_update, (restaurant_id, restaurant_id), fetch=False)
+            # Update restaurant rating average, counting archived ratings too
+            restaurant_rating, _ = average_rating("food_rating", "restaurant_id", restaurant_id)
+            execute_query("UPDATE restaurants SET rating = %s WHERE restaurant_id = %s",
+                          (restaurant_rating, restaurant_id), fetch=False)
             
             # Update delivery person rating average
             if delivery_person_id:
-                delivery_update = """
-                UPDATE delivery_personnel dp
-                SET avg_rating = (
-                    SELECT AVG(delivery_rating) 
-                    FROM ratings 
-                    WHERE delivery_person_id = %s
-                )
-                WHERE delivery_person_id = %s
-                """
-                execute_query(delivery_update, (delivery_person_id, delivery_person_id), fetch=False)
+                delivery_rating, _ = average_rating("delivery_rating", "delivery_person_id", delivery_person_id)
+                execute_query("UPDATE delivery_personnel SET avg_rating = %s WHERE delivery_person_id = %s",
+                              (delivery_rating, delivery_person_id), fetch=False)
             
             if result is not None:
                 QMessageBox.information(self, "Success", "Thank you for your rating!")
@@ -1870,41 +1884,28 @@ class CustomerDashboard(QWidget):
             QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}")
 
     def load_customer_profile(self):
-        """Load customer profile information from database"""
+        """Load customer profile information from the session cache"""
         try:
-            # Try to get customer info with email from joined tables
-            result = execute_query(
-                """
-                SELECT c.*, u.email FROM customers c
-                JOIN users u ON c.user_id = u.user_id
-                WHERE c.user_id = %s
-                """,
-                (self.user.user_id,)
-            )
+            customer_info = self.user.get_profile()
             
-            if result:
-                customer_info = result[0]
-                self.customer_id = customer_info['customer_id']
-                
+            if customer_info:
                 # Update profile fields if they exist
                 if hasattr(self, 'name_input') and hasattr(self, 'phone_input'):
                     self.name_input.setText(customer_info.get('name', ''))
                     self.phone_input.setText(customer_info.get('phone', ''))
                     self.address_input.setText(customer_info.get('address', ''))
-                    self.email_input.setText(customer_info.get('email', ''))
+                    self.email_input.setText(self.user.email or '')
             else:
-                # No customer record yet, but we can still get user email
-                user_result = execute_query(
-                    "SELECT email FROM users WHERE user_id = %s",
-                    (self.user.user_id,)
-                )
+                if not hasattr(self, 'email_input'):
+                    # The profile is created from the profile page's fields, and
+                    # building the page calls back into this method
+                    self.pages.get('profile_page')
+                    return
                 
-                if user_result and hasattr(self, 'email_input'):
-                    self.email_input.setText(user_result[0].get('email', ''))
-                    # Pre-fill name with username
-                    self.name_input.setText(self.user.username)
-                
-                self.customer_id = None
+                # No customer record yet, but we can still get user email
+                self.email_input.setText(self.user.email or '')
+                # Pre-fill name with username
+                self.name_input.setText(self.user.username)
                 
                 # Create a basic customer profile record if none exists
                 self._source_call = "load_profile"
@@ -1912,7 +1913,6 @@ class CustomerDashboard(QWidget):
                 
         except Exception as e:
             print(f"Error loading customer profile: {e}")
-            self.customer_id = None
 
     def save_profile(self):
         """Save customer profile"""
@@ -1964,15 +1964,8 @@ class CustomerDashboard(QWidget):
                 if self._source_call != "load_profile":
                     QMessageBox.information(self, "Success", "Profile saved successfully")
                 
-                # If this was a new profile, load the new ID
-                if not self.customer_id:
-                    # Avoid infinite recursion by just getting the ID
-                    new_id_result = execute_query(
-                        "SELECT customer_id FROM customers WHERE user_id = %s",
-                        (self.user.user_id,)
-                    )
-                    if new_id_result:
-                        self.customer_id = new_id_result[0]['customer_id']
+                # Re-read the cached email and profile, which also picks up a new profile's ID
+                self.user.invalidate()
             else:
                 # Only show error for manual saves
                 if self._source_call != "load_profile":
@@ -2112,6 +2105,10 @@ class CustomerDashboard(QWidget):
             add_to_cart_btn.setObjectName("add-to-cart-btn")
             add_to_cart_btn.clicked.connect(lambda checked, i=item: self.handle_add_to_cart(i, 1))
             
+            if item.get('image_url'):
+                image_label = QLabel()
+                set_image(image_label, item['image_url'], MENU_IMAGE_SIZE)
+                card_layout.addWidget(image_label, alignment=Qt.AlignmentFlag.AlignCenter)
             card_layout.addLayout(name_price)
             card_layout.addWidget(restaurant_label)
             card_layout.addWidget(desc_label)
@@ -2168,7 +2165,9 @@ class CustomerDashboard(QWidget):
             # View details button
             details_btn = QPushButton("View Details")
             details_btn.setObjectName("view-details-btn")
-            details_btn.clicked.connect(lambda checked, oid=order['order_id']: self.view_order_details(oid))
+            details_btn.clicked.connect(
+                lambda checked, oid=order['order_id'], archived=order.get('is_archived'): self.view_order_details(oid, archived)
+            )
             
             card_layout.addLayout(order_header)
             card_layout.addWidget(restaurant_label)
@@ -2184,6 +2183,9 @@ class CustomerDashboard(QWidget):
 
     def load_favorites(self):
         """Load favorite restaurants from database"""
+        if not hasattr(self, 'favorites_grid'):
+            return  # Page not built yet; it loads when first shown
+        
         # Clear existing favorites
         while self.favorites_grid.count():
             item = self.favorites_grid.takeAt(0)
@@ -2193,15 +2195,11 @@ class CustomerDashboard(QWidget):
         
         # Get customer ID
         if not self.customer_id:
-            customer = execute_query("SELECT customer_id FROM customers WHERE user_id = %s", (self.user.user_id,))
-            if customer:
-                self.customer_id = customer[0]['customer_id']
-            else:
-                # No customer profile yet
-                placeholder = QLabel("Please complete your profile first to use favorites")
-                placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.favorites_grid.addWidget(placeholder, 0, 0)
-                return
+            # No customer profile yet
+            placeholder = QLabel("Please complete your profile first to use favorites")
+            placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            self.favorites_grid.addWidget(placeholder, 0, 0)
+            return
         
         # Get favorites from database
         favorites_query = """
@@ -2253,6 +2251,10 @@ class CustomerDashboard(QWidget):
             btn_container.addWidget(view_button)
             btn_container.addWidget(unfavorite_button)
             
+            if restaurant.get('logo_url'):
+                logo_label = QLabel()
+                set_image(logo_label, restaurant['logo_url'], CARD_LOGO_SIZE)
+                card_layout.addWidget(logo_label, alignment=Qt.AlignmentFlag.AlignCenter)
             card_layout.addWidget(name_label)
             card_layout.addWidget(cuisine_label)
             card_layout.addWidget(rating_label)
@@ -2268,14 +2270,10 @@ class CustomerDashboard(QWidget):
     def add_to_favorites(self, restaurant_id):
         """Add a restaurant to favorites"""
         if not self.customer_id:
-            customer = execute_query("SELECT customer_id FROM customers WHERE user_id = %s", (self.user.user_id,))
-            if customer:
-                self.customer_id = customer[0]['customer_id']
-            else:
-                QMessageBox.warning(self, "Profile Incomplete", 
-                                   "Please complete your profile first to add favorites.")
-                self.profile()
-                return
+            QMessageBox.warning(self, "Profile Incomplete", 
+                               "Please complete your profile first to add favorites.")
+            self.profile()
+            return
         
         # Check if already in favorites
         check_query = "SELECT * FROM favorites WHERE customer_id = %s AND restaurant_id = %s"
@@ -6,6 +6,8 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton,
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QFont, QIcon, QPixmap
 from db_utils import execute_query
+from services.archive import average_rating
+from ui.images import set_image, CARD_LOGO_SIZE, MENU_IMAGE_SIZE
 
 class RestaurantView(QWidget):
     back_to_restaurants = Signal()
@@ -66,15 +68,11 @@ class RestaurantView(QWidget):
         info_label.setObjectName("restaurant-info")
         
         # Rating
-        rating = execute_query("""
-            SELECT AVG(food_rating) as avg_rating, COUNT(*) as total_ratings
-            FROM ratings
-            WHERE restaurant_id = %s
-        """, (self.restaurant_id,))
+        avg_rating, total_ratings = average_rating("food_rating", "restaurant_id", self.restaurant_id)
         
         rating_text = "No ratings yet"
-        if rating and rating[0]['avg_rating']:
-            rating_text = f"★ {rating[0]['avg_rating']:.1f} ({rating[0]['total_ratings']} ratings)"
+        if avg_rating:
+            rating_text = f"★ {avg_rating:.1f} ({total_ratings} ratings)"
         
         rating_label = QLabel(rating_text)
         rating_label.setObjectName("restaurant-rating")
@@ -88,6 +86,10 @@ class RestaurantView(QWidget):
         min_order_label.setObjectName("min-order-amount")
         
         header_layout.addWidget(back_btn)
+        if self.restaurant_data.get('logo_url'):
+            logo_label = QLabel()
+            set_image(logo_label, self.restaurant_data['logo_url'], CARD_LOGO_SIZE)
+            header_layout.addWidget(logo_label)
         header_layout.addWidget(name_label)
         header_layout.addWidget(info_label)
         header_layout.addWidget(rating_label)
@@ -368,7 +370,11 @@ class RestaurantView(QWidget):
                 add_layout.addWidget(add_btn)
                 add_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
                 
-                # Add to item frame
+                # Add to item frame; pictures load in the background while scrolling
+                if item.get('image_url'):
+                    image_label = QLabel()
+                    set_image(image_label, item['image_url'], MENU_IMAGE_SIZE)
+                    item_layout.addWidget(image_label)
                 item_layout.addLayout(details_layout, 7)
                 item_layout.addLayout(add_layout, 3)
                 
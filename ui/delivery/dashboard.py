@@ -2,13 +2,23 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton,
                              QHBoxLayout, QScrollArea, QFrame, QGridLayout, 
                              QSizePolicy, QSpacerItem, QStackedWidget, QMessageBox,
                              QTableWidget, QTableWidgetItem, QHeaderView, QFormLayout,
-                             QLineEdit, QComboBox, QRadioButton, QButtonGroup)
-from PySide6.QtCore import Qt, Signal, QTimer
+                             QLineEdit, QComboBox, QRadioButton, QButtonGroup, QTableView)
+from PySide6.QtCore import Qt, Signal, QTimer, QAbstractTableModel, QModelIndex
 from PySide6.QtGui import QFont, QIcon, QPixmap
 from db_utils import execute_query
+from ui.pages import LazyPages
+from services.config import load_app_settings, get_float_setting
+from services.geo import bounding_box, haversine_sql
+from services.dispatch import vehicle_radius_km
+from services.archive import with_archive
+from services.earnings import (mark_order_delivered, get_earnings_summary,
+                               get_earnings_page, EARNINGS_PAGE_SIZE)
 from datetime import datetime
 import os
 
+# Maximum number of cards shown in the new orders feed
+NEW_ORDERS_FEED_LIMIT = 50
+
 class DeliveryDashboard(QWidget):
     logout_requested = Signal()
     
@@ -21,6 +31,10 @@ class DeliveryDashboard(QWidget):
         self.is_available = False
         self._source_call = None  # Track source of method calls
         
+        # New orders feed: only show orders picked up within the delivery radius
+        self.new_order_cards = {}  # order_id -> card widget currently shown
+        self.new_orders_message = None  # Text of the empty-state message shown instead, if any
+        
         # Set up auto-refresh timer
         self.refresh_timer = QTimer(self)
         self.refresh_timer.timeout.connect(self.auto_refresh)
@@ -31,19 +45,16 @@ class DeliveryDashboard(QWidget):
         self.load_delivery_person_info()
     
     def load_delivery_person_info(self):
-        """Load delivery person information from database"""
+        """Load delivery person information from the session profile cache"""
         try:
-            result = execute_query(
-                "SELECT * FROM delivery_personnel WHERE user_id = %s",
-                (self.user.user_id,)
-            )
-            
-            if result:
-                self.delivery_person_info = result[0]
-                self.delivery_person_id = result[0]['delivery_person_id']
+            profile = self.user.get_profile()
+            
+            if profile:
+                self.delivery_person_info = profile
+                self.delivery_person_id = profile['delivery_person_id']
                 
                 # Set status
-                self.is_available = result[0]['status'] == 'Available'
+                self.is_available = profile['status'] == 'Available'
                 
                 # Update status button if it exists
                 if hasattr(self, 'status_btn'):
@@ -75,11 +86,11 @@ class DeliveryDashboard(QWidget):
                         else:
                             self.manual.setChecked(True)
             else:
-                # Create a basic profile with defaults
-                if hasattr(self, 'name_input') and hasattr(self, 'phone_input'):
-                    self.name_input.setText(self.user.username)
-                    self.light_vehicle.setChecked(True)
-                    self.automatic.setChecked(True)
+                # Create a basic profile with defaults, from the profile page's fields
+                self.pages.get('profile_page')
+                self.name_input.setText(self.user.username)
+                self.light_vehicle.setChecked(True)
+                self.automatic.setChecked(True)
                 
                 # Create a basic profile record if none exists
                 self._source_call = "load_profile"
@@ -159,19 +170,13 @@ class DeliveryDashboard(QWidget):
         # Content area with stacked pages
         self.content_area = QStackedWidget()
         
-        # Create all pages
-        self.new_orders_page = self.create_new_orders_page()
-        self.active_deliveries_page = self.create_active_deliveries_page()
-        self.delivery_history_page = self.create_delivery_history_page()
-        self.profile_page = self.create_profile_page()
-        self.earnings_page = self.create_earnings_page()
-        
-        # Add pages to content area
-        self.content_area.addWidget(self.new_orders_page)
-        self.content_area.addWidget(self.active_deliveries_page)
-        self.content_area.addWidget(self.delivery_history_page)
-        self.content_area.addWidget(self.profile_page)
-        self.content_area.addWidget(self.earnings_page)
+        # Pages are built the first time they are shown
+        self.pages = LazyPages(self, self.content_area)
+        self.pages.register('new_orders_page', self.create_new_orders_page)
+        self.pages.register('active_deliveries_page', self.create_active_deliveries_page)
+        self.pages.register('delivery_history_page', self.create_delivery_history_page)
+        self.pages.register('profile_page', self.create_profile_page)
+        self.pages.register('earnings_page', self.create_earnings_page)
         
         # Add sidebar and content to main layout
         main_layout.addWidget(sidebar)
@@ -265,22 +270,26 @@ class DeliveryDashboard(QWidget):
         """)
     
     def show_new_orders(self):
-        self.content_area.setCurrentWidget(self.new_orders_page)
+        self.pages.show('new_orders_page')
         self.load_new_orders()
     
     def show_active_deliveries(self):
-        self.content_area.setCurrentWidget(self.active_deliveries_page)
+        self.pages.show('active_deliveries_page')
         self.load_active_deliveries()
     
     def show_delivery_history(self):
-        self.content_area.setCurrentWidget(self.delivery_history_page)
+        self.pages.show('delivery_history_page')
         self.load_delivery_history()
     
     def show_profile(self):
-        self.content_area.setCurrentWidget(self.profile_page)
+        already_built = self.pages.is_built('profile_page')
+        self.pages.show('profile_page')
+        if not already_built:
+            # Fill the new form from the cached profile
+            self.load_delivery_person_info()
     
     def show_earnings(self):
-        self.content_area.setCurrentWidget(self.earnings_page)
+        self.pages.show('earnings_page')
         self.load_earnings()
     
     def toggle_status(self):
@@ -325,6 +334,10 @@ class DeliveryDashboard(QWidget):
         result = execute_query(query, (status, self.delivery_person_id), fetch=False)
         
         if result is not None:
+            # Status is part of the cached profile
+            self.user.invalidate_profile()
+            self.delivery_person_info = self.user.get_profile() or self.delivery_person_info
+            
             if self.is_available:
                 self.status_btn.setText("🟢 Available")
                 self.status_btn.setStyleSheet("background-color: #27ae60;")
@@ -348,9 +361,10 @@ class DeliveryDashboard(QWidget):
     
     def load_new_orders(self):
         """Load new orders that are ready for pickup and not assigned"""
+        if not hasattr(self, 'new_orders_layout'):
+            return  # Page not built yet; it loads when first shown
+        
         try:
-            self.clear_new_orders_layout()
-            
             if not hasattr(self, "user") or not self.user:
                 self.display_no_orders_message(self.new_orders_container, "No user information available")
                 return
@@ -360,39 +374,86 @@ class DeliveryDashboard(QWidget):
                 self.display_no_orders_message(self.new_orders_container, "No delivery profile found. Please update your profile.")
                 return
             
-            # Get vehicle type
-            vehicle_query = "SELECT vehicle_type FROM delivery_personnel WHERE delivery_person_id = %s"
-            vehicle_result = execute_query(vehicle_query, (self.delivery_person_id,))
-            
-            if not vehicle_result:
-                self.display_no_orders_message(self.new_orders_container, "Could not retrieve vehicle information.")
-                return
+            # Vehicle type comes from the cached profile and limits pickup range. The
+            # settings file is only re-read after the settings page saves it
+            vehicle_type = self.delivery_person_info.get('vehicle_type') if self.delivery_person_info else None
+            radius_km = vehicle_radius_km(vehicle_type, get_float_setting(load_app_settings(), "delivery_radius"))
             
-            vehicle_type = vehicle_result[0]['vehicle_type']
+            # Distance to the restaurant, when the courier's location is known
+            location = self.get_courier_location()
+            distance_column = ""
+            params = []
+            if location:
+                distance_sql, params = haversine_sql("r.latitude", "r.longitude", *location)
+                distance_column = f", {distance_sql} as distance_km"
             
             # Get orders that are ready for pickup and not assigned
-            query = """
+            query = f"""
                 SELECT o.order_id, o.order_date, 
                        r.name as restaurant_name, r.address as restaurant_address, 
                        c.name as customer_name, c.address as customer_address, c.phone as customer_phone, 
-                       o.total_amount 
+                       o.total_amount{distance_column}
                 FROM orders o
                 JOIN restaurants r ON o.restaurant_id = r.restaurant_id
                 JOIN customers c ON o.customer_id = c.customer_id
                 WHERE o.delivery_status = 'On Delivery'
                 AND o.delivery_person_id IS NULL
-                ORDER BY o.order_date DESC
             """
             
-            orders = execute_query(query)
+            if location:
+                # The bounding box narrows to nearby restaurants by index; HAVING then
+                # drops its corners outside the radius, before LIMIT is applied
+                min_lat, max_lat, min_lng, max_lng = bounding_box(location[0], location[1], radius_km)
+                query += """
+                AND r.latitude BETWEEN %s AND %s
+                AND r.longitude BETWEEN %s AND %s
+                HAVING distance_km <= %s
+                """
+                params.extend([min_lat, max_lat, min_lng, max_lng, radius_km])
+            
+            query += " ORDER BY o.order_date DESC LIMIT %s"
+            params.append(NEW_ORDERS_FEED_LIMIT)
+            
+            orders = execute_query(query, params)
             
             if not orders:
                 self.display_no_orders_message(self.new_orders_container, "No new orders available for pickup")
                 return
             
-            # Add each order to the layout
-            for order in orders:
-                order_card = self.create_new_order_card(
+            self.sync_new_order_cards(orders)
+            
+        except Exception as e:
+            self.display_no_orders_message(self.new_orders_container, f"Error loading orders: {str(e)}")
+            print(f"Error loading new orders: {str(e)}")
+    
+    def get_courier_location(self):
+        """Return the courier's last known (latitude, longitude), or None"""
+        if not self.delivery_person_info:
+            return None
+        latitude = self.delivery_person_info.get('latitude')
+        longitude = self.delivery_person_info.get('longitude')
+        if latitude is None or longitude is None:
+            return None
+        return float(latitude), float(longitude)
+    
+    def sync_new_order_cards(self, orders):
+        """Update the new orders feed in place instead of rebuilding every card"""
+        if not self.new_order_cards:
+            # Remove any "no orders" message before showing cards
+            self.clear_new_orders_layout()
+        
+        wanted = {order['order_id'] for order in orders}
+        for order_id in list(self.new_order_cards):
+            if order_id not in wanted:
+                card = self.new_order_cards.pop(order_id)
+                self.new_orders_layout.removeWidget(card)
+                card.deleteLater()
+        
+        position = 0
+        for order in orders:
+            card = self.new_order_cards.get(order['order_id'])
+            if card is None:
+                card = self.create_new_order_card(
                     order['order_id'],
                     order['order_date'],
                     order['restaurant_name'],
@@ -400,17 +461,23 @@ class DeliveryDashboard(QWidget):
                     order['customer_name'],
                     order['customer_address'],
                     order['customer_phone'],
-                    order['total_amount']
+                    order['total_amount'],
+                    order.get('distance_km')
                 )
-                if order_card:  # Only add if card was created successfully
-                    self.new_orders_layout.addWidget(order_card)
-            
-        except Exception as e:
-            self.display_no_orders_message(self.new_orders_container, f"Error loading orders: {str(e)}")
-            print(f"Error loading new orders: {str(e)}")
+                if not card:  # Only add if card was created successfully
+                    continue
+                self.new_order_cards[order['order_id']] = card
+                self.new_orders_layout.insertWidget(position, card)
+            elif self.new_orders_layout.indexOf(card) != position:
+                self.new_orders_layout.removeWidget(card)
+                self.new_orders_layout.insertWidget(position, card)
+            position += 1
     
     def load_active_deliveries(self):
         """Load active deliveries for the current delivery person"""
+        if not hasattr(self, 'active_deliveries_layout'):
+            return  # Page not built yet; it loads when first shown
+        
         try:
             self.clear_active_deliveries_layout()
             
@@ -470,103 +537,109 @@ class DeliveryDashboard(QWidget):
             print(f"Error loading active deliveries: {str(e)}")
     
     def load_earnings(self):
-        """Load earnings for delivery person"""
+        """Load earnings for delivery person from the earnings ledger"""
+        if not hasattr(self, 'total_earnings_value'):
+            return  # Page not built yet; it loads when first shown
+        
         if not self.delivery_person_id:
             self.total_earnings_value.setText("0 AED")
             self.total_deliveries_value.setText("0")
             self.avg_rating_value.setText("N/A")
             
             # Clear earnings table
-            self.earnings_table.setRowCount(0)
+            self.reset_earnings_table()
             return
         
         try:
-            # Get total deliveries and earnings
-            earnings = execute_query("""
-                SELECT COUNT(*) as delivery_count, SUM(total_amount) as total_earnings
-                FROM orders
-                WHERE delivery_person_id = %s AND delivery_status = 'Delivered'
-            """, (self.delivery_person_id,))
-            
-            if not earnings or earnings[0]['delivery_count'] == 0:
+            # Running totals are maintained on the courier row when deliveries complete
+            summary = get_earnings_summary(self.delivery_person_id)
+            
+            if not summary or not summary['total_deliveries']:
                 self.total_earnings_value.setText("0 AED")
                 self.total_deliveries_value.setText("0")
                 self.avg_rating_value.setText("N/A")
                 
                 # Clear earnings table
-                self.earnings_table.setRowCount(0)
+                self.reset_earnings_table()
                 return
             
-            # Calculate earnings (10% of total order value in AED)
-            delivery_count = earnings[0]['delivery_count']
-            total_earnings = float(earnings[0]['total_earnings'] or 0) * 0.10  # Convert to AED
+            delivery_count = summary['total_deliveries']
+            total_earnings = float(summary['total_earnings'] or 0)
             
             # Set values
             self.total_earnings_value.setText(f"{total_earnings:.2f} AED")
             self.total_deliveries_value.setText(str(delivery_count))
             
-            # Get average rating if available
-            ratings = execute_query("""
-                SELECT AVG(delivery_rating) as avg_rating
-                FROM ratings
-                WHERE delivery_person_id = %s
-            """, (self.delivery_person_id,))
-            
-            if ratings and ratings[0]['avg_rating']:
-                self.avg_rating_value.setText(f"{ratings[0]['avg_rating']:.1f} / 5.0")
+            if summary['avg_rating']:
+                self.avg_rating_value.setText(f"{summary['avg_rating']:.1f} / 5.0")
             else:
                 self.avg_rating_value.setText("N/A")
             
-            # Populate earnings table with completed deliveries
-            completed_deliveries = execute_query("""
-                SELECT o.order_id, o.order_date, o.actual_delivery_time, 
-                       r.name as restaurant_name, o.total_amount
-                FROM orders o
-                JOIN restaurants r ON o.restaurant_id = r.restaurant_id
-                WHERE o.delivery_person_id = %s AND o.delivery_status = 'Delivered'
-                ORDER BY o.actual_delivery_time DESC
-            """, (self.delivery_person_id,))
-            
-            if completed_deliveries:
-                # Clear table
-                self.earnings_table.setRowCount(0)
-                
-                # Set row count
-                self.earnings_table.setRowCount(len(completed_deliveries))
-                
-                # Fill table with data
-                for row, delivery in enumerate(completed_deliveries):
-                    # Format date
-                    try:
-                        date_obj = datetime.strptime(str(delivery['order_date']), "%Y-%m-%d %H:%M:%S")
-                        formatted_date = date_obj.strftime("%b %d, %Y")
-                    except:
-                        formatted_date = str(delivery['order_date'])
-                    
-                    # Calculate delivery fee (10% of order total)
-                    fee = float(delivery['total_amount']) * 0.10  # Convert to AED
-                    
-                    # Add data to table
-                    self.earnings_table.setItem(row, 0, QTableWidgetItem(str(delivery['order_id'])))
-                    self.earnings_table.setItem(row, 1, QTableWidgetItem(formatted_date))
-                    self.earnings_table.setItem(row, 2, QTableWidgetItem(delivery['restaurant_name']))
-                    self.earnings_table.setItem(row, 3, QTableWidgetItem(f"{fee:.2f} AED"))
-            else:
-                # Clear table if no deliveries
-                self.earnings_table.setRowCount(0)
+            # Only reload the first page when a new delivery was credited
+            if delivery_count != self._earnings_loaded_count:
+                self.reset_earnings_table()
+                self._earnings_loaded_count = delivery_count
+                self.load_more_earnings()
                 
         except Exception as e:
             print(f"Error loading earnings: {e}")
             self.total_earnings_value.setText("Error")
             self.total_deliveries_value.setText("Error")
             self.avg_rating_value.setText("Error")
-            self.earnings_table.setRowCount(0)
+            self.reset_earnings_table()
     
-    def load_delivery_history(self):
-        """Load delivery history for the current delivery person"""
+    def reset_earnings_table(self):
+        """Clear the earnings table and its paging state"""
+        self.earnings_table.setRowCount(0)
+        self._earnings_cursor = None
+        self._earnings_loaded_count = None
+        self.load_more_earnings_btn.setVisible(False)
+    
+    def load_more_earnings(self):
+        """Append the next page of earnings history to the table"""
+        if not self.delivery_person_id:
+            return
+        
         try:
-            self.clear_delivery_history_layout()
+            page = get_earnings_page(self.delivery_person_id, self._earnings_cursor)
+            if page is None:
+                return
             
+            row = self.earnings_table.rowCount()
+            self.earnings_table.setRowCount(row + len(page))
+            
+            for earning in page:
+                # Format date
+                try:
+                    formatted_date = earning['earned_at'].strftime("%b %d, %Y")
+                except AttributeError:
+                    formatted_date = str(earning['earned_at'])
+                
+                # Add data to table
+                self.earnings_table.setItem(row, 0, QTableWidgetItem(str(earning['order_id'])))
+                self.earnings_table.setItem(row, 1, QTableWidgetItem(formatted_date))
+                self.earnings_table.setItem(row, 2, QTableWidgetItem(earning['restaurant_name'] or ""))
+                self.earnings_table.setItem(row, 3, QTableWidgetItem(f"{float(earning['amount']):.2f} AED"))
+                row += 1
+            
+            if page:
+                self._earnings_cursor = page[-1]['earning_id']
+            
+            # A short page means the end of the history was reached
+            self.load_more_earnings_btn.setVisible(len(page) == EARNINGS_PAGE_SIZE)
+        except Exception as e:
+            print(f"Error loading earnings page: {e}")
+    
+    def load_delivery_history(self):
+        """Load delivery history for the current delivery person
+
+        The first call loads the first page; later calls only pull in
+        deliveries completed since, keeping the rows already fetched.
+        """
+        if not hasattr(self, 'delivery_history_table'):
+            return  # Page not built yet; it loads when first shown
+        
+        try:
             if not hasattr(self, "user") or not self.user:
                 self.display_no_orders_message(self.delivery_history_container, "No user information available")
                 return
@@ -576,78 +649,18 @@ class DeliveryDashboard(QWidget):
                 self.display_no_orders_message(self.delivery_history_container, "No delivery profile found. Please update your profile.")
                 return
             
-            # Get completed deliveries for this delivery person
-            query = """
-                SELECT o.order_id, o.order_date, r.name as restaurant_name, c.name as customer_name, o.total_amount 
-                FROM orders o
-                JOIN restaurants r ON o.restaurant_id = r.restaurant_id
-                JOIN customers c ON o.customer_id = c.customer_id
-                WHERE o.delivery_status = 'Delivered'
-                AND o.delivery_person_id = %s
-                ORDER BY o.order_date DESC
-            """
-            history = execute_query(query, (self.delivery_person_id,))
+            model = self.delivery_history_model
+            if model.delivery_person_id != self.delivery_person_id:
+                model.reset(self.delivery_person_id)
+            else:
+                model.refresh_head()
             
-            if not history:
+            if model.rowCount() == 0:
                 self.display_no_orders_message(self.delivery_history_container, "No delivery history found")
                 return
             
-            # Create a table to display delivery history
-            table = QTableWidget()
-            table.setObjectName("delivery-history-table")
-            table.setColumnCount(5)
-            table.setHorizontalHeaderLabels(["Order ID", "Date", "Restaurant", "Customer", "Amount"])
-            table.setRowCount(len(history))
-            table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-            table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-            table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-            table.setStyleSheet("""
-                QTableWidget {
-                    background-color: white;
-                    border: 1px solid #ddd;
-                    border-radius: 5px;
-                }
-                QHeaderView::section {
-                    background-color: #f2f2f2;
-                    padding: 5px;
-                    border: 1px solid #ddd;
-                    font-weight: bold;
-                }
-                QTableWidget::item {
-                    padding: 5px;
-                    border-bottom: 1px solid #eee;
-                }
-            """)
-            
-            # Populate the table with delivery history
-            for row, delivery in enumerate(history):
-                order_id = delivery['order_id']
-                order_date = delivery['order_date']
-                restaurant_name = delivery['restaurant_name']
-                customer_name = delivery['customer_name']
-                total_amount = delivery['total_amount']
-                
-                # Format the date for better readability
-                try:
-                    date_obj = datetime.strptime(str(order_date), "%Y-%m-%d %H:%M:%S")
-                    formatted_date = date_obj.strftime("%b %d, %Y %I:%M %p")
-                except (ValueError, TypeError) as e:
-                    print(f"Date formatting error: {e}, using original date")
-                    formatted_date = str(order_date)
-                
-                # Format the amount with currency symbol
-                try:
-                    formatted_amount = f"{float(total_amount):.2f} AED"
-                except (ValueError, TypeError):
-                    formatted_amount = f"0 AED"
-                
-                table.setItem(row, 0, QTableWidgetItem(str(order_id)))
-                table.setItem(row, 1, QTableWidgetItem(formatted_date))
-                table.setItem(row, 2, QTableWidgetItem(restaurant_name))
-                table.setItem(row, 3, QTableWidgetItem(customer_name))
-                table.setItem(row, 4, QTableWidgetItem(formatted_amount))
-            
-            self.delivery_history_layout.addWidget(table)
+            self.delivery_history_message.hide()
+            self.delivery_history_table.show()
             
         except Exception as e:
             self.display_no_orders_message(self.delivery_history_container, f"Error loading delivery history: {str(e)}")
@@ -759,28 +772,56 @@ class DeliveryDashboard(QWidget):
         header_layout.addStretch()
         header_layout.addWidget(refresh_btn)
         
-        # Create scroll area for history
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        scroll_area.setStyleSheet("""
-            QScrollArea {
-                border: none;
-                background-color: #f9f9f9;
-            }
-        """)
-        
-        # Container for delivery history content
+        # Container for delivery history content; the table is built once and
+        # fetches further pages from its model as the user scrolls
         self.delivery_history_container = QWidget()
         self.delivery_history_layout = QVBoxLayout(self.delivery_history_container)
         self.delivery_history_layout.setContentsMargins(20, 20, 20, 20)
         self.delivery_history_layout.setSpacing(20)
         
-        scroll_area.setWidget(self.delivery_history_container)
+        self.delivery_history_model = DeliveryHistoryModel(self)
+        self.delivery_history_table = QTableView()
+        self.delivery_history_table.setObjectName("delivery-history-table")
+        self.delivery_history_table.setModel(self.delivery_history_model)
+        self.delivery_history_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.delivery_history_table.verticalHeader().setVisible(False)
+        self.delivery_history_table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.delivery_history_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.delivery_history_table.setStyleSheet("""
+            QTableView {
+                background-color: white;
+                border: 1px solid #ddd;
+                border-radius: 5px;
+            }
+            QHeaderView::section {
+                background-color: #f2f2f2;
+                padding: 5px;
+                border: 1px solid #ddd;
+                font-weight: bold;
+            }
+            QTableView::item {
+                padding: 5px;
+                border-bottom: 1px solid #eee;
+            }
+        """)
+        self.delivery_history_table.hide()
+        
+        self.delivery_history_message = QLabel()
+        self.delivery_history_message.setObjectName("no-orders-label")
+        self.delivery_history_message.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.delivery_history_message.setStyleSheet("""
+            font-size: 16px;
+            color: #666;
+            padding: 20px;
+        """)
+        self.delivery_history_message.hide()
+        
+        self.delivery_history_layout.addWidget(self.delivery_history_table)
+        self.delivery_history_layout.addWidget(self.delivery_history_message)
         
         # Add to main layout
         main_layout.addWidget(header)
-        main_layout.addWidget(scroll_area)
+        main_layout.addWidget(self.delivery_history_container)
         
         return container
     
@@ -916,6 +957,13 @@ class DeliveryDashboard(QWidget):
         self.earnings_table.setHorizontalHeaderLabels(["Order ID", "Date", "Restaurant", "Amount"])
         self.earnings_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         
+        # Earnings history is paged; older rows load on demand
+        self._earnings_cursor = None
+        self._earnings_loaded_count = None
+        self.load_more_earnings_btn = QPushButton("Load More")
+        self.load_more_earnings_btn.clicked.connect(self.load_more_earnings)
+        self.load_more_earnings_btn.setVisible(False)
+        
         # Refresh button
         refresh_btn = QPushButton("Refresh Earnings")
         refresh_btn.clicked.connect(self.load_earnings)
@@ -925,6 +973,7 @@ class DeliveryDashboard(QWidget):
         self.earnings_layout.addWidget(summary_frame)
         self.earnings_layout.addWidget(earnings_label)
         self.earnings_layout.addWidget(self.earnings_table)
+        self.earnings_layout.addWidget(self.load_more_earnings_btn)
         self.earnings_layout.addWidget(refresh_btn)
         
         return page
@@ -972,15 +1021,18 @@ class DeliveryDashboard(QWidget):
                 if self._source_call != "load_profile":
                     QMessageBox.information(self, "Success", "Profile saved successfully")
                 
+                # Re-read the cached profile so loaders see the saved values
+                is_new_profile = not self.delivery_person_id
+                self.user.invalidate_profile()
+                profile = self.user.get_profile()
+                if profile:
+                    self.delivery_person_info = profile
+                
                 # If this was a new profile, load the new ID
-                if not self.delivery_person_id:
-                    # Avoid infinite recursion by just getting the ID
-                    new_id_result = execute_query(
-                        "SELECT delivery_person_id FROM delivery_personnel WHERE user_id = %s",
-                        (self.user.user_id,)
-                    )
-                    if new_id_result:
-                        self.delivery_person_id = new_id_result[0]['delivery_person_id']
+                if is_new_profile:
+                    # Avoid infinite recursion by just reading the ID from the profile
+                    if profile:
+                        self.delivery_person_id = profile['delivery_person_id']
                         self.is_available = True  # New profiles are available by default
                         
                         # Update status button
@@ -1002,6 +1054,8 @@ class DeliveryDashboard(QWidget):
     
     def clear_new_orders_layout(self):
         """Clear all widgets from the new orders layout"""
+        self.new_order_cards = {}
+        self.new_orders_message = None
         if hasattr(self, 'new_orders_layout'):
             while self.new_orders_layout.count():
                 item = self.new_orders_layout.takeAt(0)
@@ -1020,6 +1074,11 @@ class DeliveryDashboard(QWidget):
     
     def display_no_orders_message(self, container, message):
         """Display a message when no orders are available"""
+        # The new orders feed refreshes every cycle; leave its message alone if it's unchanged
+        is_new_orders = container == getattr(self, 'new_orders_container', None)
+        if is_new_orders and self.new_orders_message == message:
+            return
+        
         # Create a label with the message
         label = QLabel(message)
         label.setObjectName("no-orders-label")
@@ -1031,17 +1090,22 @@ class DeliveryDashboard(QWidget):
         """)
         
         # Add it to the appropriate layout
-        if container == self.new_orders_container:
+        # Only pages that have been built have containers
+        if is_new_orders:
             self.clear_new_orders_layout()
             self.new_orders_layout.addWidget(label)
-        elif container == self.active_deliveries_container:
+            self.new_orders_message = message
+        elif container == getattr(self, 'active_deliveries_container', None):
             self.clear_active_deliveries_layout()
             self.active_deliveries_layout.addWidget(label)
-        elif container == self.delivery_history_container:
-            self.clear_delivery_history_layout()
-            self.delivery_history_layout.addWidget(label)
+        elif container == getattr(self, 'delivery_history_container', None):
+            # The history table is reused, so hide it rather than deleting it
+            label.deleteLater()
+            self.delivery_history_table.hide()
+            self.delivery_history_message.setText(message)
+            self.delivery_history_message.show()
     
-    def create_new_order_card(self, order_id, order_date, restaurant_name, restaurant_address, customer_name, customer_address, customer_phone, total_amount):
+    def create_new_order_card(self, order_id, order_date, restaurant_name, restaurant_address, customer_name, customer_address, customer_phone, total_amount, distance_km=None):
         """Create a card for a new order"""
         try:
             # Format the date
@@ -1093,6 +1157,11 @@ class DeliveryDashboard(QWidget):
             info_layout.addWidget(QLabel("Amount:"), 3, 0)
             info_layout.addWidget(QLabel(f"{float(total_amount):.2f} AED"), 3, 1)
             
+            # Distance to the restaurant when the courier's location is known
+            if distance_km is not None:
+                info_layout.addWidget(QLabel("Pickup Distance:"), 4, 0)
+                info_layout.addWidget(QLabel(f"{distance_km:.1f} km"), 4, 1)
+            
             card_layout.addLayout(info_layout)
             
             # Accept button
@@ -1336,19 +1405,8 @@ class DeliveryDashboard(QWidget):
                 msg.exec()
                 return
                 
-            # Always update payment status to 'Paid' for ALL delivery methods when order is completed
-            # This ensures consistency across the system
-            query = """
-                UPDATE orders 
-                SET delivery_status = %s, 
-                    actual_delivery_time = NOW(),
-                    payment_status = 'Paid'
-                WHERE order_id = %s
-            """
-            
-            result = execute_query(query, ("Delivered", order_id), fetch=False)
-            
-            if result is not None:
+            # Marks the order delivered and paid, and credits the earnings ledger
+            if mark_order_delivered(order_id):
                 msg = QMessageBox()
                 msg.setIcon(QMessageBox.Icon.Information)
                 msg.setWindowTitle("Success")
@@ -1407,15 +1465,6 @@ class DeliveryDashboard(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to complete delivery: {str(e)}")
     
-    def clear_delivery_history_layout(self):
-        """Clear all widgets from the delivery history layout"""
-        if hasattr(self, 'delivery_history_layout') and self.delivery_history_layout:
-            while self.delivery_history_layout.count():
-                item = self.delivery_history_layout.takeAt(0)
-                widget = item.widget()
-                if widget:
-                    widget.deleteLater()
-    
     def auto_refresh(self):
         """Automatically refresh data based on current page"""
         try:
@@ -1455,4 +1504,148 @@ class DeliveryDashboard(QWidget):
         except Exception as e:
             # Silent exception handling for auto-refresh
             print(f"Auto-refresh error in delivery dashboard: {e}")
-            # Don't show error to user since this runs automatically
\ No newline at end of file
+            # Don't show error to user since this runs automatically
+
+
+class DeliveryHistoryModel(QAbstractTableModel):
+    """Table model for a courier's delivered orders, loaded one page at a time
+
+    Rows are ordered by delivery time, newest first. Pages use keyset
+    pagination on (actual_delivery_time, order_id) so each fetch is an index
+    range scan of page_size rows, however long the history is. Qt calls
+    fetchMore() when the view is scrolled to the bottom.
+    """
+    HEADERS = ["Order ID", "Delivered", "Restaurant", "Customer", "Amount"]
+    
+    def __init__(self, parent=None, page_size=100):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.delivery_person_id = None
+        self._rows = []  # (delivered_at, order_id, display values)
+        self._has_more = False
+    
+    def reset(self, delivery_person_id):
+        """Start over for a courier and load the first page"""
+        self.beginResetModel()
+        self.delivery_person_id = delivery_person_id
+        self._rows = []
+        self._has_more = True
+        self.endResetModel()
+        self.fetchMore()
+    
+    def _query(self, where, params, order, limit):
+        # Each side of the archive UNION is limited too, so both stay index range scans
+        query, query_params = with_archive(f"""
+            SELECT o.order_id, o.actual_delivery_time, r.name as restaurant_name, c.name as customer_name, o.total_amount 
+            FROM {{orders}} o
+            JOIN restaurants r ON o.restaurant_id = r.restaurant_id
+            JOIN customers c ON o.customer_id = c.customer_id
+            WHERE o.delivery_status = 'Delivered'
+            AND o.delivery_person_id = %s
+            {where}
+            ORDER BY o.actual_delivery_time {order}, o.order_id {order}
+            LIMIT %s
+        """, [self.delivery_person_id] + params + [limit])
+        query = f"SELECT * FROM ({query}) history ORDER BY actual_delivery_time {order}, order_id {order} LIMIT %s"
+        return execute_query(query, query_params + [limit])
+    
+    def _format_row(self, delivery):
+        # Format the date for better readability
+        delivered_at = delivery['actual_delivery_time']
+        if isinstance(delivered_at, datetime):
+            formatted_date = delivered_at.strftime("%b %d, %Y %I:%M %p")
+        else:
+            formatted_date = str(delivered_at)
+        
+        # Format the amount with currency symbol
+        try:
+            formatted_amount = f"{float(delivery['total_amount']):.2f} AED"
+        except (ValueError, TypeError):
+            formatted_amount = "0 AED"
+        
+        display = (str(delivery['order_id']), formatted_date, delivery['restaurant_name'],
+                   delivery['customer_name'], formatted_amount)
+        return delivered_at, delivery['order_id'], display
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._has_more and self.delivery_person_id is not None
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        
+        where = ""
+        params = []
+        if self._rows:
+            last_date, last_id, _ = self._rows[-1]
+            where = "AND (o.actual_delivery_time < %s OR (o.actual_delivery_time = %s AND o.order_id < %s))"
+            params = [last_date, last_date, last_id]
+        
+        page = self._query(where, params, "DESC", self.page_size)
+        if page is None:
+            # Query failed; stop asking until the next reset
+            self._has_more = False
+            return
+        
+        self._has_more = len(page) == self.page_size
+        if not page:
+            return
+        
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self._rows.extend(self._format_row(delivery) for delivery in page)
+        self.endInsertRows()
+    
+    def refresh_head(self):
+        """Prepend deliveries completed since the newest loaded row
+        
+        Keyed on delivery time rather than order time, so an order placed
+        earlier but delivered later than the loaded rows still shows up.
+        """
+        if self.delivery_person_id is None:
+            return
+        if not self._rows:
+            self.reset(self.delivery_person_id)
+            return
+        
+        # Re-read from the newest loaded delivery time, since an order with a
+        # lower id can be delivered in the same second as the newest row
+        first_date = self._rows[0][0]
+        loaded = {order_id for delivered_at, order_id, _ in self._rows[:self.page_size] if delivered_at == first_date}
+        head = self._query("AND o.actual_delivery_time >= %s", [first_date], "ASC", self.page_size)
+        if not head:
+            return
+        newer = [delivery for delivery in head if delivery['order_id'] not in loaded]
+        if not newer:
+            return
+        if len(head) == self.page_size or any(delivery['actual_delivery_time'] == first_date for delivery in newer):
+            # Too far behind, or the new row sorts among loaded ones; reload
+            self.reset(self.delivery_person_id)
+            return
+        
+        newer.reverse()
+        self.beginInsertRows(QModelIndex(), 0, len(newer) - 1)
+        self._rows[0:0] = [self._format_row(delivery) for delivery in newer]
+        self.endInsertRows()
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return self._rows[index.row()][2][index.column()]
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
\ No newline at end of file
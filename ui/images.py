@@ -0,0 +1,203 @@
+"""Shared image cache for logos, avatars and menu pictures
+
+Images are scaled once to a few fixed sizes ("buckets") and kept in
+QPixmapCache, so a logo shown on many cards is decoded and scaled once per
+session. Scaled copies are also written to a thumbnail folder on disk, so
+the next run doesn't decode the full size image again.
+
+scaled_pixmap() loads synchronously and suits small, local images such as the
+login logo. set_image() suits cards and lists: it shows a cached image
+right away, or decodes it on a worker thread and fills in the label when
+it is ready.
+"""
+import os
+import hashlib
+import urllib.request
+import shiboken6
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Qt, QSize
+from PySide6.QtGui import QImage, QImageReader, QImageIOHandler, QPixmap, QPixmapCache
+
+# Sizes images are pre-scaled to (longest side, in pixels); a request is
+# served from the smallest bucket at least as large as it
+SIZE_BUCKETS = [32, 48, 64, 96, 128, 192, 256, 512]
+
+# Display sizes for restaurant logos on cards and dish pictures on menus
+CARD_LOGO_SIZE = 64
+MENU_IMAGE_SIZE = 80
+
+# Memory QPixmapCache may use for images, in KB (Qt's default is 10 MB)
+PIXMAP_CACHE_KB = 64 * 1024
+
+# Scaled copies of images are kept here between runs
+THUMBNAIL_DIR = os.path.join("cache", "thumbnails")
+
+# Threads decoding images in the background
+IMAGE_WORKERS = 2
+
+# Seconds to wait for an image given as an http(s) URL
+IMAGE_FETCH_TIMEOUT = 5
+
+QPixmapCache.setCacheLimit(max(QPixmapCache.cacheLimit(), PIXMAP_CACHE_KB))
+
+def bucket_for(size):
+    """Return the bucket an image displayed at size (pixels) is scaled to"""
+    for bucket in SIZE_BUCKETS:
+        if bucket >= size:
+            return bucket
+    return SIZE_BUCKETS[-1]
+
+def is_url(source):
+    return source.startswith(("http://", "https://"))
+
+def cache_key(source, bucket):
+    return f"image:{bucket}:{source}"
+
+def thumbnail_path(source, bucket):
+    """Return the on-disk thumbnail file for source at a bucket size
+
+    Local files include their modification time in the name, so an edited
+    image gets a new thumbnail.
+    """
+    version = "" if is_url(source) else str(os.path.getmtime(source))
+    digest = hashlib.sha1(f"{source}|{version}|{bucket}".encode("utf-8")).hexdigest()
+    return os.path.join(THUMBNAIL_DIR, f"{digest}.png")
+
+def load_image(source, bucket):
+    """Return source as a QImage scaled to fit bucket, or a null QImage
+
+    Safe to call from any thread: it only uses QImage, never QPixmap.
+    """
+    try:
+        if not is_url(source) and not os.path.exists(source):
+            return QImage()
+        thumbnail = thumbnail_path(source, bucket)
+        if os.path.exists(thumbnail):
+            image = QImage(thumbnail)
+            if not image.isNull():
+                return image
+
+        if is_url(source):
+            with urllib.request.urlopen(source, timeout=IMAGE_FETCH_TIMEOUT) as response:
+                image = QImage.fromData(response.read())
+        else:
+            reader = QImageReader(source)
+            # JPEG can decode straight to a smaller size, which is much faster
+            # than decoding the whole image and scaling it afterwards
+            if reader.supportsOption(QImageIOHandler.ImageOption.ScaledSize):
+                full_size = reader.size()
+                if full_size.isValid() and max(full_size.width(), full_size.height()) > bucket:
+                    reader.setScaledSize(full_size.scaled(QSize(bucket, bucket), Qt.AspectRatioMode.KeepAspectRatio))
+            image = reader.read()
+        if image.isNull():
+            return image
+
+        if max(image.width(), image.height()) > bucket:
+            image = image.scaled(bucket, bucket, Qt.AspectRatioMode.KeepAspectRatio,
+                                 Qt.TransformationMode.SmoothTransformation)
+        os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+        image.save(thumbnail, "PNG")
+        return image
+    except Exception as e:
+        print(f"Error loading image {source}: {e}")
+        return QImage()
+
+def fit(pixmap, size):
+    """Scale a bucket pixmap down to size, keeping its aspect ratio"""
+    if pixmap.isNull() or max(pixmap.width(), pixmap.height()) <= size:
+        return pixmap
+    return pixmap.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+
+def cached_pixmap(source, size):
+    """Return source at size from QPixmapCache, or None if it isn't cached yet"""
+    pixmap = QPixmapCache.find(cache_key(source, bucket_for(size)))
+    return fit(pixmap, size) if pixmap is not None else None
+
+def scaled_pixmap(source, size):
+    """Return source scaled to fit size x size, loading it now if needed
+
+    Returns a null QPixmap if the image can't be loaded.
+    """
+    if not source:
+        return QPixmap()
+    cached = cached_pixmap(source, size)
+    if cached is not None:
+        return cached
+    bucket = bucket_for(size)
+    loaded = QPixmap.fromImage(load_image(source, bucket))
+    # Failed loads aren't cached, so a missing file is picked up once it appears
+    if not loaded.isNull():
+        QPixmapCache.insert(cache_key(source, bucket), loaded)
+    return fit(loaded, size)
+
+class ImageTask(QRunnable):
+    """Decodes one image on a worker thread"""
+
+    def __init__(self, loader, source, bucket):
+        super().__init__()
+        self.loader = loader
+        self.source = source
+        self.bucket = bucket
+
+    def run(self):
+        self.loader.image_loaded.emit(self.source, self.bucket, load_image(self.source, self.bucket))
+
+class ImageLoader(QObject):
+    """Loads images for labels in the background, one decode per image"""
+
+    image_loaded = Signal(str, int, QImage)
+
+    def __init__(self):
+        super().__init__()
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(IMAGE_WORKERS)
+        self.waiting = {}  # cache key -> [(label, size)] waiting for that image
+        self.image_loaded.connect(self.on_image_loaded)
+
+    def set_image(self, label, source, size):
+        """Show source on label at size x size once it is loaded
+
+        The label is sized up front so the layout doesn't shift when the
+        image arrives. If the image can't be loaded the label stays empty,
+        and the image is tried again the next time it is shown.
+        """
+        label.setFixedSize(size, size)
+        label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        if not source:
+            return
+        cached = cached_pixmap(source, size)
+        if cached is not None:
+            label.setPixmap(cached)
+            return
+
+        bucket = bucket_for(size)
+        key = cache_key(source, bucket)
+        if key not in self.waiting:
+            self.waiting[key] = []
+            self.thread_pool.start(ImageTask(self, source, bucket))
+        self.waiting[key].append((label, size))
+
+    def on_image_loaded(self, source, bucket, image):
+        # QPixmap can only be created on the GUI thread, so the conversion
+        # happens here rather than in the worker
+        key = cache_key(source, bucket)
+        loaded = QPixmap.fromImage(image)
+        # A failed decode or fetch isn't cached, so the next set_image() retries it
+        if not loaded.isNull():
+            QPixmapCache.insert(key, loaded)
+        for label, size in self.waiting.pop(key, []):
+            # Cards may have been cleared while the image was loading
+            if shiboken6.isValid(label) and not loaded.isNull():
+                label.setPixmap(fit(loaded, size))
+
+_loader = None
+
+def image_loader():
+    """Return the application's ImageLoader, creating it on first use"""
+    global _loader
+    if _loader is None:
+        _loader = ImageLoader()
+    return _loader
+
+def set_image(label, source, size):
+    """Show source on label at size x size, decoding it in the background if needed"""
+    image_loader().set_image(label, source, size)
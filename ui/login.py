@@ -2,22 +2,47 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QLineEdit,
                             QPushButton, QFormLayout, QComboBox, QMessageBox,
                             QDialog, QHBoxLayout, QGroupBox, QRadioButton,
                             QGridLayout, QCheckBox, QFrame, QSpacerItem, QSizePolicy)
-from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QPixmap, QFont, QIcon, QKeyEvent
-from auth.user import User, UserRole
+from PySide6.QtCore import Qt, Signal, QThread
+from PySide6.QtGui import QFont, QIcon, QKeyEvent
+from auth.user import User, UserRole, Session
+from auth.password_pool import get_password_pool
+from ui.images import scaled_pixmap
 from db_utils import execute_query
 import json
 import os
 import hashlib
 
+class AuthThread(QThread):
+    """Runs a login or registration call off the UI thread
+    
+    Password hashing takes a noticeable fraction of a second, so the call
+    runs here and its result comes back through auth_completed.
+    """
+    auth_completed = Signal(object)
+    auth_failed = Signal(str)
+    
+    def __init__(self, function, *args, parent=None):
+        super().__init__(parent)
+        self.function = function
+        self.args = args
+    
+    def run(self):
+        try:
+            self.auth_completed.emit(self.function(*self.args))
+        except Exception as e:
+            self.auth_failed.emit(str(e))
+
 class LoginWindow(QWidget):
     login_successful = Signal(object)
     switch_to_register = Signal()
     
     def __init__(self):
         super().__init__()
+        self.auth_thread = None
         self.initUI()
         self.load_saved_login()
+        # Start a hashing worker while the user types
+        get_password_pool().warm_up()
     
     def initUI(self):
         self.setWindowTitle("Food Delivery - Login")
@@ -34,10 +59,8 @@ class LoginWindow(QWidget):
         
         # Add logo
         logo_label = QLabel()
-        logo_pixmap = QPixmap("images/logo.png")
+        logo_pixmap = scaled_pixmap("images/logo.png", 150)
         if not logo_pixmap.isNull():
-            # Scale logo to reasonable size if needed
-            logo_pixmap = logo_pixmap.scaled(150, 150, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
             logo_label.setPixmap(logo_pixmap)
             logo_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
             logo_label.setMinimumSize(100, 100)  # Minimum size for logo area
@@ -86,6 +109,7 @@ class LoginWindow(QWidget):
         login_btn.setObjectName("primary-button")
         login_btn.clicked.connect(self.attempt_login)
         login_btn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        self.login_btn = login_btn
         
         # Register Link
         register_layout = QHBoxLayout()
@@ -161,7 +185,7 @@ class LoginWindow(QWidget):
         
         # Hardcoded admin login with correct credentials
         if username == "admin" and password == "admin123":
-            admin_user = User(user_id=1, username="admin", role=UserRole.ADMIN)
+            admin_user = Session(user_id=1, username="admin", role=UserRole.ADMIN)
             admin_user.is_authenticated = True
             
             # Save login if checkbox is checked
@@ -171,11 +195,16 @@ class LoginWindow(QWidget):
             self.login_successful.emit(admin_user)
             return
         
-        # Try database login with error handling
-        try:
-            # Regular login attempt
-            user, message = User.login(username, password)
-            
+        if self.auth_thread is not None:
+            return  # A login is already being checked
+        
+        # Regular login attempt, off the UI thread while the password is hashed
+        self.login_btn.setEnabled(False)
+        self.login_btn.setText("Signing in...")
+        thread = AuthThread(User.login, username, password, parent=self)
+        
+        def on_completed(result):
+            user, message = result
             if user:
                 # Save login if checkbox is checked
                 if self.remember_checkbox.isChecked():
@@ -186,11 +215,24 @@ class LoginWindow(QWidget):
                 self.login_successful.emit(user)
             else:
                 QMessageBox.warning(self, "Login Failed", message)
-        except Exception as e:
-            print(f"Login error: {e}")
+        
+        def on_failed(error):
+            print(f"Login error: {error}")
             QMessageBox.critical(self, "Database Error", 
                                "Cannot connect to the database. Please check your database connection. " +
                                "Only the admin account (admin/admin123) is available in offline mode.")
+        
+        def on_finished():
+            self.auth_thread = None
+            self.login_btn.setEnabled(True)
+            self.login_btn.setText("Login")
+            thread.deleteLater()
+        
+        thread.auth_completed.connect(on_completed)
+        thread.auth_failed.connect(on_failed)
+        thread.finished.connect(on_finished)
+        self.auth_thread = thread
+        thread.start()
     
     def load_saved_login(self):
         """Load saved login information if available"""
@@ -237,6 +279,7 @@ class RegisterWindow(QWidget):
     
     def __init__(self):
         super().__init__()
+        self.auth_thread = None
         self.initUI()
     
     def initUI(self):
@@ -254,10 +297,8 @@ class RegisterWindow(QWidget):
         
         # Add logo
         logo_label = QLabel()
-        logo_pixmap = QPixmap("images/logo.png")
+        logo_pixmap = scaled_pixmap("images/logo.png", 150)
         if not logo_pixmap.isNull():
-            # Scale logo to reasonable size if needed
-            logo_pixmap = logo_pixmap.scaled(150, 150, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
             logo_label.setPixmap(logo_pixmap)
             logo_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
             logo_label.setMinimumSize(100, 100)  # Minimum size for logo area
@@ -340,6 +381,7 @@ class RegisterWindow(QWidget):
         register_btn.setObjectName("primary-button")
         register_btn.clicked.connect(self.register)
         register_btn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        self.register_btn = register_btn
         
         # Login Link
         login_layout = QHBoxLayout()
@@ -435,17 +477,42 @@ class RegisterWindow(QWidget):
         else:
             role = UserRole.CUSTOMER  # Default
         
-        # Attempt to register
-        success, message = User.register(username, email, password, role, phone, address)
+        if self.auth_thread is not None:
+            return  # Already registering
         
-        if success:
-            QMessageBox.information(self, "Success", message)
-            
+        def register_and_login():
+            success, message = User.register(username, email, password, role, phone, address)
             # Log in the user
-            user, _ = User.login(username, password)
-            if user:
-                self.register_successful.emit(user)
+            user = User.login(username, password)[0] if success else None
+            return success, message, user
+        
+        # Attempt to register, off the UI thread while the password is hashed
+        self.register_btn.setEnabled(False)
+        self.register_btn.setText("Creating account...")
+        thread = AuthThread(register_and_login, parent=self)
+        
+        def on_completed(result):
+            success, message, user = result
+            if success:
+                QMessageBox.information(self, "Success", message)
+                if user:
+                    self.register_successful.emit(user)
+                else:
+                    self.switch_to_login.emit()
             else:
-                self.switch_to_login.emit()
-        else:
-            QMessageBox.critical(self, "Error", message) 
\ No newline at end of file
+                QMessageBox.critical(self, "Error", message)
+        
+        def on_failed(error):
+            QMessageBox.critical(self, "Error", f"Failed to register user: {error}")
+        
+        def on_finished():
+            self.auth_thread = None
+            self.register_btn.setEnabled(True)
+            self.register_btn.setText("Create Account")
+            thread.deleteLater()
+        
+        thread.auth_completed.connect(on_completed)
+        thread.auth_failed.connect(on_failed)
+        thread.finished.connect(on_finished)
+        self.auth_thread = thread
+        thread.start() 
\ No newline at end of file
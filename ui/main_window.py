@@ -0,0 +1,155 @@
+"""The application's main window: login, registration and the role dashboards"""
+import importlib
+import time
+from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QStackedWidget
+from PySide6.QtCore import Qt, QSize
+from PySide6.QtGui import QFont, QIcon
+from db_utils import reset_debug_state
+
+from auth.user import User, UserRole, Session
+from ui.login import LoginWindow, RegisterWindow
+from ui.pages import FirstPaintTimer
+from ui.profiling import profile_refreshes
+
+# Dashboard for each role, imported on the first login with that role so
+# startup doesn't pay for dashboards (and matplotlib) it may never show
+DASHBOARDS = {
+    UserRole.CUSTOMER: ("ui.customer.dashboard", "CustomerDashboard"),
+    UserRole.RESTAURANT: ("ui.restaurant.dashboard", "RestaurantDashboard"),
+    UserRole.DELIVERY: ("ui.delivery.dashboard", "DeliveryDashboard"),
+    UserRole.ADMIN: ("ui.admin.dashboard", "AdminDashboard")
+}
+
+def load_dashboard_class(role):
+    """Import and return the dashboard class for a role"""
+    module_name, class_name = DASHBOARDS[role]
+    return getattr(importlib.import_module(module_name), class_name)
+
+# Application-wide stylesheet
+APP_STYLESHEET = """
+    QMainWindow {
+        background-color: #2c3e50;
+        border: none;
+        margin: 0;
+        padding: 0;
+    }
+    QWidget {
+        background-color: transparent;
+        font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen-Sans, Ubuntu, Cantarell, 'Helvetica Neue', sans-serif;
+    }
+    QStackedWidget, #content-area {
+        background-color: #f8f9fa;
+    }
+    QPushButton {
+        padding: 8px 15px;
+        border: none;
+        border-radius: 4px;
+        background-color: #3498db;
+        color: white;
+        font-weight: bold;
+    }
+    QPushButton:hover {
+        background-color: #2980b9;
+    }
+    QPushButton:disabled {
+        background-color: #95a5a6;
+    }
+    QLineEdit, QComboBox, QSpinBox {
+        padding: 8px;
+        border: 1px solid #ddd;
+        border-radius: 4px;
+        background-color: white;
+        color: black;
+    }
+    QLineEdit:focus, QComboBox:focus, QSpinBox:focus {
+        border: 1px solid #3498db;
+    }
+    QLabel {
+        color: #2c3e50;
+    }
+"""
+
+class MainApplication(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Food Delivery System")
+        self.setMinimumSize(800, 600)  # Smaller minimum size
+        self.resize(1200, 800)  # Initial size but can be resized
+        
+        # Make window resizable
+        self.setWindowFlags(self.windowFlags() | Qt.WindowMaximizeButtonHint | Qt.WindowMinimizeButtonHint)
+        
+        # Initialize stacked widget to manage different screens
+        self.stacked_widget = QStackedWidget()
+        self.setCentralWidget(self.stacked_widget)
+        
+        # Create instances of screens
+        self.login_window = LoginWindow()
+        self.register_window = RegisterWindow()
+        
+        # Add screens to stacked widget
+        self.stacked_widget.addWidget(self.login_window)
+        self.stacked_widget.addWidget(self.register_window)
+        
+        # Connect signals
+        self.login_window.login_successful.connect(self.handle_login)
+        self.login_window.switch_to_register.connect(lambda: self.stacked_widget.setCurrentWidget(self.register_window))
+        
+        self.register_window.register_successful.connect(self.handle_login)
+        self.register_window.switch_to_login.connect(lambda: self.stacked_widget.setCurrentWidget(self.login_window))
+        
+        # Start with login window
+        self.stacked_widget.setCurrentWidget(self.login_window)
+        
+        # Center the window on the screen
+        self.center_on_screen()
+
+    def center_on_screen(self):
+        """Center the window on the screen"""
+        screen_geometry = QApplication.primaryScreen().geometry()
+        window_geometry = self.frameGeometry()
+        center_point = screen_geometry.center()
+        window_geometry.moveCenter(center_point)
+        self.move(window_geometry.topLeft())
+        
+        # Store the screen dimensions to use for responsive layouts
+        self.screen_width = screen_geometry.width()
+        self.screen_height = screen_geometry.height()
+
+    def handle_login(self, user):
+        """Handle user login by showing the appropriate dashboard"""
+        if not user.is_authenticated:
+            return
+        login_started = time.perf_counter()
+        
+        # Reset debug state for a new session
+        reset_debug_state()
+        
+        # Load the role profile once so dashboards can read it from the session cache
+        user = Session.from_user(user)
+        user.get_profile()
+        
+        # Create and show the appropriate dashboard based on user role
+        if user.role not in DASHBOARDS:
+            return
+        dashboard = load_dashboard_class(user.role)(user)
+        # Reports the time from login to the dashboard's first paint
+        dashboard.first_paint_timer = FirstPaintTimer(dashboard, login_started)
+        # Times each auto_refresh cycle when REFRESH_PROFILE is set
+        dashboard.refresh_profiler = profile_refreshes(dashboard)
+        self.stacked_widget.addWidget(dashboard)
+        self.stacked_widget.setCurrentWidget(dashboard)
+        dashboard.logout_requested.connect(self.handle_logout)
+    
+    def handle_logout(self):
+        """Handle user logout by returning to login screen"""
+        # Get current widget and remove it from stacked widget
+        current_widget = self.stacked_widget.currentWidget()
+        
+        # Switch to login window
+        self.stacked_widget.setCurrentWidget(self.login_window)
+        
+        # Remove the dashboard widget if it's not the login or register window
+        if current_widget not in [self.login_window, self.register_window]:
+            self.stacked_widget.removeWidget(current_widget)
+            current_widget.deleteLater()
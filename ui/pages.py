@@ -0,0 +1,70 @@
+"""Lazy page construction for the dashboards
+
+Dashboards register each page with the method that creates it, instead of
+building every page (and running its first queries) before the window is
+shown. A page is built, and loads its data, the first time it is navigated
+to. Until then its attribute on the dashboard (e.g. `self.users_page`) is
+None, and loaders for it should return early.
+"""
+import time
+from PySide6.QtCore import QObject, QEvent
+
+class LazyPages:
+    """Builds a dashboard's pages into a QStackedWidget on first use"""
+
+    def __init__(self, owner, stack):
+        self.owner = owner
+        self.stack = stack
+        self.factories = {}
+        self.build_times = {}  # page attribute -> milliseconds taken to build it
+
+    def register(self, name, factory):
+        """Register a page; name is the dashboard attribute that will hold it"""
+        self.factories[name] = factory
+        setattr(self.owner, name, None)
+
+    def is_built(self, name):
+        return getattr(self.owner, name) is not None
+
+    def get(self, name):
+        """Return a page, building it and adding it to the stack if needed"""
+        page = getattr(self.owner, name)
+        if page is None:
+            started = time.perf_counter()
+            page = self.factories[name]()
+            setattr(self.owner, name, page)
+            self.stack.addWidget(page)
+            self.build_times[name] = (time.perf_counter() - started) * 1000
+            print(f"{type(self.owner).__name__}: built {name} in {self.build_times[name]:.1f} ms")
+        return page
+
+    def current_name(self):
+        """Return the name of the page on top of the stack, or None"""
+        current = self.stack.currentWidget()
+        return next((name for name in self.factories if getattr(self.owner, name) is current), None)
+
+    def show(self, name):
+        """Build a page if needed and make it the current page"""
+        page = self.get(name)
+        self.stack.setCurrentWidget(page)
+        return page
+
+class FirstPaintTimer(QObject):
+    """Reports how long after `started` a widget is first painted"""
+
+    def __init__(self, widget, started, label=None):
+        super().__init__(widget)
+        self.started = started
+        self.label = label or type(widget).__name__
+        self.elapsed_ms = None
+        widget.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.Paint and self.elapsed_ms is None:
+            self.elapsed_ms = (time.perf_counter() - self.started) * 1000
+            watched.removeEventFilter(self)
+            pages = getattr(watched, 'pages', None)
+            built = ", ".join(f"{name} {ms:.0f} ms" for name, ms in pages.build_times.items()) if pages else ""
+            print(f"{self.label}: first paint {self.elapsed_ms:.0f} ms after login"
+                  + (f" (pages built: {built})" if built else ""))
+        return False
@@ -0,0 +1,154 @@
+"""Profiling for the dashboards' auto_refresh loops
+
+Every dashboard runs auto_refresh every 500 ms. With REFRESH_PROFILE set, each
+cycle is timed and split into:
+
+- db: time spent in execute_query on the GUI thread, and the number of queries
+- widgets: the rest of auto_refresh (building widgets, filling tables), and
+  the number of widgets added to the window
+- layout: laying out what the cycle changed, which Qt would otherwise do
+  right after it
+
+REFRESH_PROFILE=overlay shows the numbers in a corner of the dashboard,
+REFRESH_PROFILE=csv appends one row per cycle to settings/refresh_profile.csv,
+and REFRESH_PROFILE=1 does both.
+"""
+import os
+import csv
+import time
+import datetime
+from collections import deque
+from PySide6.QtCore import QObject, QEvent, Qt
+from PySide6.QtWidgets import QApplication, QLabel
+from db_utils import query_stats
+
+# One CSV row per profiled refresh cycle
+REFRESH_PROFILE_FILE = os.path.join("settings", "refresh_profile.csv")
+
+# Cycles the overlay's average and maximum are taken over (10 seconds at 500 ms)
+REFRESH_PROFILE_WINDOW = 20
+
+CSV_COLUMNS = ["time", "dashboard", "page", "cycle_ms", "db_ms", "queries",
+               "widget_ms", "widgets_created", "layout_ms"]
+
+def profiling_modes():
+    """Return the set of outputs REFRESH_PROFILE asks for ('overlay', 'csv')"""
+    value = os.environ.get("REFRESH_PROFILE", "").strip().lower()
+    if value in ("", "0"):
+        return set()
+    if value == "1":
+        return {"overlay", "csv"}
+    return {mode.strip() for mode in value.split(",")} & {"overlay", "csv"}
+
+class WidgetCounter(QObject):
+    """Counts widgets added to any parent while it is installed on the application"""
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.ChildAdded and event.child().isWidgetType():
+            self.count += 1
+        return False
+
+class RefreshProfiler(QObject):
+    """Times a dashboard's auto_refresh cycles; see the module docstring"""
+
+    def __init__(self, dashboard, modes):
+        super().__init__(dashboard)
+        self.dashboard = dashboard
+        self.modes = modes
+        self.name = type(dashboard).__name__
+        self.samples = deque(maxlen=REFRESH_PROFILE_WINDOW)
+        self.widget_counter = WidgetCounter()
+        self.overlay = None
+        if "overlay" in modes:
+            self.overlay = QLabel(dashboard)
+            self.overlay.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+            self.overlay.setStyleSheet("background-color: rgba(0, 0, 0, 170); color: #2ecc71; "
+                                       "font-family: 'Courier New'; font-size: 11px; padding: 4px;")
+            dashboard.installEventFilter(self)
+
+        # Run auto_refresh through the profiler instead of straight from the timer
+        dashboard.refresh_timer.timeout.disconnect(dashboard.auto_refresh)
+        dashboard.refresh_timer.timeout.connect(self.profile_refresh)
+
+    def profile_refresh(self):
+        app = QApplication.instance()
+        queries_before, db_ms_before = query_stats.thread_totals()
+        self.widget_counter.count = 0
+        app.installEventFilter(self.widget_counter)
+        started = time.perf_counter()
+        try:
+            self.dashboard.auto_refresh()
+        finally:
+            refreshed = time.perf_counter()
+            app.removeEventFilter(self.widget_counter)
+        # Lay out now what the refresh changed, so it can be timed
+        QApplication.sendPostedEvents(None, QEvent.Type.LayoutRequest)
+        laid_out = time.perf_counter()
+
+        queries_after, db_ms_after = query_stats.thread_totals()
+        db_ms = db_ms_after - db_ms_before
+        refresh_ms = (refreshed - started) * 1000
+        sample = {
+            "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            "dashboard": self.name,
+            "page": self.dashboard.pages.current_name() if hasattr(self.dashboard, 'pages') else "",
+            "cycle_ms": round((laid_out - started) * 1000, 2),
+            "db_ms": round(db_ms, 2),
+            "queries": queries_after - queries_before,
+            "widget_ms": round(max(refresh_ms - db_ms, 0), 2),
+            "widgets_created": self.widget_counter.count,
+            "layout_ms": round((laid_out - refreshed) * 1000, 2)
+        }
+        self.samples.append(sample)
+        if "csv" in self.modes:
+            self.write_csv(sample)
+        if self.overlay is not None:
+            self.update_overlay(sample)
+
+    def write_csv(self, sample):
+        try:
+            os.makedirs(os.path.dirname(REFRESH_PROFILE_FILE), exist_ok=True)
+            new_file = not os.path.exists(REFRESH_PROFILE_FILE)
+            with open(REFRESH_PROFILE_FILE, "a", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+                if new_file:
+                    writer.writeheader()
+                writer.writerow(sample)
+        except OSError as e:
+            print(f"Could not write refresh profile: {e}")
+
+    def update_overlay(self, sample):
+        cycles = [s["cycle_ms"] for s in self.samples]
+        self.overlay.setText(
+            f"{sample['page'] or self.name}\n"
+            f"cycle   {sample['cycle_ms']:7.1f} ms  (avg {sum(cycles) / len(cycles):.1f}, max {max(cycles):.1f})\n"
+            f"db      {sample['db_ms']:7.1f} ms  {sample['queries']} queries\n"
+            f"widgets {sample['widget_ms']:7.1f} ms  {sample['widgets_created']} created\n"
+            f"layout  {sample['layout_ms']:7.1f} ms")
+        self.overlay.adjustSize()
+        self.place_overlay()
+        self.overlay.raise_()
+        self.overlay.show()
+
+    def place_overlay(self):
+        self.overlay.move(self.dashboard.width() - self.overlay.width() - 10, 10)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.Resize and self.overlay is not None:
+            self.place_overlay()
+        return False
+
+def profile_refreshes(dashboard):
+    """Start profiling a dashboard's auto_refresh if REFRESH_PROFILE is set
+
+    Returns the RefreshProfiler, or None when profiling is off.
+    """
+    modes = profiling_modes()
+    if not modes or not hasattr(dashboard, 'refresh_timer'):
+        return None
+    print(f"{type(dashboard).__name__}: profiling auto_refresh ({', '.join(sorted(modes))})")
+    return RefreshProfiler(dashboard, modes)
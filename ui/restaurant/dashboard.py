@@ -8,10 +8,10 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton,
 from PySide6.QtCore import Qt, Signal, QSize, QDate, QTimer
 from PySide6.QtGui import QFont, QIcon, QPixmap, QColor
 from db_utils import execute_query
-import matplotlib.pyplot as plt
-import numpy as np
-from matplotlib.backends.backend_qt5agg import FigureCanvas
-from matplotlib.figure import Figure
+from ui.charts import PieChart, TrendChart
+from ui.pages import LazyPages
+from services.earnings import mark_order_delivered
+from services.archive import order_table, with_archive, all_rows, archive_query, archive_total
 
 class RestaurantDashboard(QWidget):
     logout_requested = Signal()
@@ -107,19 +107,14 @@ class RestaurantDashboard(QWidget):
         # Content area with stacked pages
         self.content_area = QStackedWidget()
         
-        # Create pages
-        self.dashboard_page = self.create_dashboard_page()
-        self.orders_page = self.create_orders_page()
-        self.menu_page = self.create_menu_page()
-        self.profile_page = self.create_profile_page()
-        self.reports_page = self.create_reports_page()
-        
-        # Add pages to stacked widget
-        self.content_area.addWidget(self.dashboard_page)
-        self.content_area.addWidget(self.orders_page)
-        self.content_area.addWidget(self.menu_page)
-        self.content_area.addWidget(self.profile_page)
-        self.content_area.addWidget(self.reports_page)
+        # Pages are built, and load their data, the first time they are shown
+        self.pages = LazyPages(self, self.content_area)
+        self.pages.register('dashboard_page', self.create_dashboard_page)
+        self.pages.register('orders_page', self.create_orders_page)
+        self.pages.register('menu_page', self.create_menu_page)
+        self.pages.register('profile_page', self.create_profile_page)
+        self.pages.register('reports_page', self.create_reports_page)
+        self.pages.show('dashboard_page')
         
         # Add widgets to main layout
         main_layout.addWidget(sidebar)
@@ -433,6 +428,9 @@ class RestaurantDashboard(QWidget):
     
     def load_all_orders(self):
         """Load orders for all tabs"""
+        if self.order_layouts['New'] is None:
+            return  # Page not built yet; it loads when first shown
+        
         # Clear existing orders
         for status, layout in self.order_layouts.items():
             # Clear layout
@@ -451,15 +449,15 @@ class RestaurantDashboard(QWidget):
         if not self.restaurant_id:
             return
         
-        # Get all orders for this restaurant
+        # Get all orders for this restaurant, including archived ones
         try:
-            restaurant_orders = execute_query("""
-                SELECT o.*, c.name as customer_name, c.phone as customer_phone
-                FROM orders o
+            query, params = with_archive("""
+                SELECT o.*, {is_archived} as is_archived, c.name as customer_name, c.phone as customer_phone
+                FROM {orders} o
                 JOIN customers c ON o.customer_id = c.customer_id
                 WHERE o.restaurant_id = %s
-                ORDER BY o.order_time DESC
-            """, (self.restaurant_id,))
+            """, [self.restaurant_id])
+            restaurant_orders = execute_query(query + " ORDER BY order_time DESC", params)
             
             if not restaurant_orders:
                 return
@@ -554,9 +552,9 @@ class RestaurantDashboard(QWidget):
         items_label.setFont(QFont("Arial", 12, QFont.Weight.Bold))
         
         # Get order items
-        items = execute_query("""
+        items = execute_query(f"""
             SELECT oi.*, m.dish_name, m.price, m.discount_price
-            FROM order_items oi
+            FROM {order_table('order_items', order.get('is_archived'))} oi
             JOIN menus m ON oi.menu_id = m.menu_id
             WHERE oi.order_id = %s
         """, (order['order_id'],))
@@ -680,19 +678,12 @@ class RestaurantDashboard(QWidget):
         try:
             # Check if the order is being marked as "Delivered" (which is "Completed" in the UI)
             if db_status == "Delivered":
-                # When an order is delivered, also update payment status to 'Paid'
-                query = """
-                    UPDATE orders 
-                    SET delivery_status = %s,
-                        actual_delivery_time = NOW(),
-                        payment_status = 'Paid'
-                    WHERE order_id = %s
-                """
+                # Marks the order delivered and paid, and credits the courier's earnings ledger
+                result = True if mark_order_delivered(order_id) else None
             else:
                 # Regular status update for non-delivered orders
                 query = "UPDATE orders SET delivery_status = %s WHERE order_id = %s"
-            
-            result = execute_query(query, (db_status, order_id), fetch=False)
+                result = execute_query(query, (db_status, order_id), fetch=False)
             
             if result is not None:
                 print(f"Order {order_display} status updated to {db_status} successfully")
@@ -944,6 +935,8 @@ class RestaurantDashboard(QWidget):
         status_chart_layout.addWidget(QLabel("Orders by Status"))
         
         # Create a frame for the chart with its own layout
+        self.report_status_pie = None  # Charts are created on the first refresh
+        self.report_revenue_trend = None
         self.report_status_chart = QFrame()
         self.report_status_chart.setMinimumHeight(300)
         chart_layout = QVBoxLayout(self.report_status_chart)
@@ -1148,7 +1141,7 @@ class RestaurantDashboard(QWidget):
         
     def refresh_restaurant_analytics(self):
         """Refresh all restaurant analytics data based on selected date range"""
-        if not self.restaurant_id:
+        if not self.restaurant_id or not hasattr(self, 'reports_start_date'):
             return
             
         start_date = self.reports_start_date.date().toString("yyyy-MM-dd")
@@ -1159,14 +1152,15 @@ class RestaurantDashboard(QWidget):
         end_date = end_date_obj.toString("yyyy-MM-dd")
         
         try:
-            # Get key metrics for this restaurant
-            metrics_query = """
+            # Get key metrics for this restaurant; all_rows() adds archived orders
+            # when the date range reaches back to them
+            metrics_query = f"""
                 SELECT 
                     COUNT(*) as total_orders,
                     SUM(total_amount) as total_revenue,
                     AVG(total_amount) as avg_order_value,
                     AVG(TIMESTAMPDIFF(MINUTE, order_time, actual_delivery_time)) as avg_delivery_time
-                FROM orders 
+                FROM {all_rows('orders', start_date=start_date)} 
                 WHERE restaurant_id = %s
                 AND order_time BETWEEN %s AND %s
             """
@@ -1179,9 +1173,9 @@ class RestaurantDashboard(QWidget):
                 self.report_delivery_time_label.setText(f"{int(metrics[0]['avg_delivery_time'] or 0)} min")
             
             # Get orders by status for this restaurant
-            status_query = """
+            status_query = f"""
                 SELECT delivery_status, COUNT(*) as count
-                FROM orders
+                FROM {all_rows('orders', start_date=start_date)}
                 WHERE restaurant_id = %s
                 AND order_time BETWEEN %s AND %s
                 GROUP BY delivery_status
@@ -1189,9 +1183,9 @@ class RestaurantDashboard(QWidget):
             status_data = execute_query(status_query, (self.restaurant_id, start_date, end_date))
             
             # Get revenue trend for this restaurant
-            revenue_query = """
+            revenue_query = f"""
                 SELECT DATE(order_time) as date, SUM(total_amount) as revenue
-                FROM orders
+                FROM {all_rows('orders', start_date=start_date)}
                 WHERE restaurant_id = %s
                 AND order_time BETWEEN %s AND %s
                 GROUP BY DATE(order_time)
@@ -1199,62 +1193,18 @@ class RestaurantDashboard(QWidget):
             """
             revenue_data = execute_query(revenue_query, (self.restaurant_id, start_date, end_date))
             
-            # Clear previous charts
-            for i in reversed(range(self.report_status_chart.layout().count())): 
-                widget = self.report_status_chart.layout().itemAt(i).widget()
-                if widget:
-                    widget.setParent(None)
-            
-            for i in reversed(range(self.report_revenue_chart.layout().count())): 
-                widget = self.report_revenue_chart.layout().itemAt(i).widget()
-                if widget:
-                    widget.setParent(None)
-            
-            # Create status pie chart with matplotlib
-            if status_data:
-                status_fig = Figure(figsize=(5, 4), dpi=100)
-                status_canvas = FigureCanvas(status_fig)
-                ax = status_fig.add_subplot(111)
-                
-                labels = [item['delivery_status'] for item in status_data]
-                sizes = [item['count'] for item in status_data]
-                
-                # Use a colorful palette
-                colors = plt.cm.Paired(np.arange(len(labels))/len(labels))
-                
-                ax.pie(sizes, labels=labels, autopct='%1.1f%%', 
-                      startangle=90, colors=colors)
-                ax.axis('equal')  # Equal aspect ratio ensures circular pie
-                
-                # Add the canvas to the layout
-                self.report_status_chart.layout().addWidget(status_canvas)
-                status_fig.tight_layout()
-                status_canvas.draw()
-            
-            # Create revenue trend chart with matplotlib
-            if revenue_data:
-                revenue_fig = Figure(figsize=(5, 4), dpi=100)
-                revenue_canvas = FigureCanvas(revenue_fig)
-                ax = revenue_fig.add_subplot(111)
-                
-                dates = [item['date'] for item in revenue_data]
-                revenue_values = [float(item['revenue']) for item in revenue_data]
-                
-                ax.plot(dates, revenue_values, 'o-', color='#3498db', linewidth=2)
-                ax.set_title('Revenue Trend')
-                ax.set_ylabel('Revenue (AED)')
-                ax.grid(True, linestyle='--', alpha=0.7)
-                
-                # Rotate date labels for better readability
-                plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-                
-                # Add the canvas to the layout
-                self.report_revenue_chart.layout().addWidget(revenue_canvas)
-                revenue_fig.tight_layout()
-                revenue_canvas.draw()
+            # The charts are created on the first refresh and updated in place after that;
+            # update() skips the redraw when the numbers haven't changed
+            if self.report_status_pie is None:
+                self.report_status_pie = PieChart(self.report_status_chart)
+                self.report_revenue_trend = TrendChart(self.report_revenue_chart, 'Revenue Trend', 'Revenue (AED)')
+            self.report_status_pie.update([item['delivery_status'] for item in status_data or []],
+                                          [item['count'] for item in status_data or []])
+            self.report_revenue_trend.update([item['date'] for item in revenue_data or []],
+                                             [float(item['revenue']) for item in revenue_data or []])
             
             # Get top menu items for this restaurant
-            menu_query = """
+            menu_query = f"""
                 SELECT 
                     m.dish_name,
                     COUNT(oi.order_item_id) as order_count,
@@ -1262,8 +1212,8 @@ class RestaurantDashboard(QWidget):
                     m.preparation_time,
                     m.stock_quantity
                 FROM menus m
-                LEFT JOIN order_items oi ON m.menu_id = oi.menu_id
-                LEFT JOIN orders o ON oi.order_id = o.order_id
+                LEFT JOIN {all_rows('order_items', 'oi', start_date)} ON m.menu_id = oi.menu_id
+                LEFT JOIN {all_rows('orders', 'o', start_date)} ON oi.order_id = o.order_id
                 WHERE m.restaurant_id = %s
                 AND (o.order_time IS NULL OR (o.order_time BETWEEN %s AND %s))
                 GROUP BY m.menu_id
@@ -1282,7 +1232,7 @@ class RestaurantDashboard(QWidget):
                     self.top_menu_items_table.setItem(i, 4, QTableWidgetItem(f"{item['stock_quantity']}"))
             
             # Get delivery personnel performance for this restaurant's orders
-            delivery_query = """
+            delivery_query = f"""
                 SELECT 
                     dp.name,
                     COUNT(o.order_id) as delivery_count,
@@ -1290,8 +1240,8 @@ class RestaurantDashboard(QWidget):
                     AVG(TIMESTAMPDIFF(MINUTE, o.order_time, o.actual_delivery_time)) as avg_time,
                     AVG(CASE WHEN o.actual_delivery_time <= o.estimated_delivery_time THEN 1 ELSE 0 END) * 100 as on_time_rate
                 FROM delivery_personnel dp
-                JOIN orders o ON dp.delivery_person_id = o.delivery_person_id
-                LEFT JOIN ratings r ON o.order_id = r.order_id
+                JOIN {all_rows('orders', 'o', start_date)} ON dp.delivery_person_id = o.delivery_person_id
+                LEFT JOIN {all_rows('ratings', 'r', start_date)} ON o.order_id = r.order_id
                 WHERE o.restaurant_id = %s
                 AND o.order_time BETWEEN %s AND %s
                 GROUP BY dp.delivery_person_id
@@ -1310,7 +1260,7 @@ class RestaurantDashboard(QWidget):
                     self.delivery_performance_table.setItem(i, 4, QTableWidgetItem(f"{float(delivery['on_time_rate'] or 0):.1f}%"))
             
             # Get customer insights for this restaurant
-            customer_query = """
+            customer_query = f"""
                 SELECT 
                     c.name,
                     COUNT(o.order_id) as order_count,
@@ -1318,7 +1268,7 @@ class RestaurantDashboard(QWidget):
                     AVG(o.total_amount) as avg_order_value,
                     MAX(o.order_time) as last_order
                 FROM customers c
-                JOIN orders o ON c.customer_id = o.customer_id
+                JOIN {all_rows('orders', 'o', start_date)} ON c.customer_id = o.customer_id
                 WHERE o.restaurant_id = %s
                 AND o.order_time BETWEEN %s AND %s
                 GROUP BY c.customer_id
@@ -1440,16 +1390,13 @@ class RestaurantDashboard(QWidget):
                     content_layout.insertWidget(0, banner)
     
     def load_restaurant_profile(self):
-        """Get the restaurant profile for this user"""
+        """Get the restaurant profile for this user from the session cache"""
         try:
             print(f"Loading restaurant profile for user ID: {self.user.user_id}")
-            result = execute_query(
-                "SELECT r.*, u.is_active FROM restaurants r JOIN users u ON r.user_id = u.user_id WHERE r.user_id = %s",
-                (self.user.user_id,)
-            )
+            profile = self.user.get_profile()
             
-            if result and len(result) > 0:
-                self.restaurant_data = result[0]
+            if profile:
+                self.restaurant_data = dict(profile, is_active=self.user.is_active)
                 self.restaurant_id = self.restaurant_data['restaurant_id']
                 print(f"Successfully loaded restaurant profile. ID: {self.restaurant_id}, Name: {self.restaurant_data.get('name', 'Unknown')}")
                 
@@ -1496,6 +1443,9 @@ class RestaurantDashboard(QWidget):
     
     def load_profile_data(self):
         """Load restaurant data into profile form"""
+        if not hasattr(self, 'profile_name'):
+            return  # Page not built yet; it loads when first shown
+        
         try:
             if not self.restaurant_data:
                 print("Cannot load profile data: restaurant_data is None")
@@ -1585,6 +1535,7 @@ class RestaurantDashboard(QWidget):
                     self.show_info_message("Success", "Restaurant profile saved successfully!")
                 
                 # Reload restaurant data
+                self.user.invalidate()
                 self.load_restaurant_profile()
                 
                 # Update restaurant name in sidebar using our method
@@ -1610,7 +1561,7 @@ class RestaurantDashboard(QWidget):
     
     def load_menu_items(self):
         """Load menu items for the restaurant"""
-        if not self.restaurant_id:
+        if not self.restaurant_id or not hasattr(self, 'menu_table'):
             return
             
         menu_items = execute_query(
@@ -1663,7 +1614,7 @@ class RestaurantDashboard(QWidget):
     
     def load_categories(self):
         """Load unique categories for filter dropdown"""
-        if not self.restaurant_id:
+        if not self.restaurant_id or not hasattr(self, 'category_filter'):
             return
             
         categories = execute_query(
@@ -1774,33 +1725,39 @@ class RestaurantDashboard(QWidget):
                 self.show_error_message("Error", "Failed to delete menu item")
     
     def show_dashboard(self):
-        self.content_area.setCurrentWidget(self.dashboard_page)
+        self.pages.show('dashboard_page')
         # Refresh dashboard stats
         self.load_dashboard_stats()
     
     def manage_orders(self):
-        self.content_area.setCurrentWidget(self.orders_page)
+        already_built = self.pages.is_built('orders_page')
+        self.pages.show('orders_page')
         # Refresh orders when tab is visited
-        self.load_all_orders()
+        if already_built:
+            self.load_all_orders()
     
     def manage_menu(self):
         if not self.restaurant_id:
             self.show_profile_setup()
         else:
-            self.content_area.setCurrentWidget(self.menu_page)
-            self.load_menu_items()
+            already_built = self.pages.is_built('menu_page')
+            self.pages.show('menu_page')
+            if already_built:
+                self.load_menu_items()
     
     def show_profile_page(self):
         """Display the profile page and load profile data if available"""
-        self.content_area.setCurrentWidget(self.profile_page)
+        already_built = self.pages.is_built('profile_page')
+        self.pages.show('profile_page')
         # Ensure profile data is loaded when this page is visited
-        if self.restaurant_id and self.restaurant_data:
+        if already_built and self.restaurant_id and self.restaurant_data:
             self.load_profile_data()
     
     def view_reports(self):
-        self.content_area.setCurrentWidget(self.reports_page)
+        already_built = self.pages.is_built('reports_page')
+        self.pages.show('reports_page')
         # Refresh analytics data when reports page is viewed
-        if self.restaurant_id:
+        if already_built and self.restaurant_id:
             self.refresh_restaurant_analytics()
     
     def logout(self):
@@ -1823,7 +1780,7 @@ class RestaurantDashboard(QWidget):
                 SELECT COUNT(*) as count 
                 FROM orders 
                 WHERE restaurant_id = %s 
-                  AND DATE(order_time) = CURRENT_DATE()
+                  AND order_time >= CURRENT_DATE() AND order_time < CURRENT_DATE() + INTERVAL 1 DAY
             """, (self.restaurant_id,))
             
             today_count = today_orders[0]['count'] if today_orders else 0
@@ -1850,29 +1807,37 @@ class RestaurantDashboard(QWidget):
             menu_count = menu_items[0]['count'] if menu_items else 0
             self.stat_cards["menu_items"]["widget"].setText(str(menu_count))
             
-            # Total sales
-            total_sales = execute_query("""
+            # Total sales; archived sales never change, so they come from a cached archive_total()
+            sales_query = """
                 SELECT SUM(total_amount) as total 
-                FROM orders 
+                FROM {orders} 
                 WHERE restaurant_id = %s 
                   AND delivery_status = 'Delivered'
-            """, (self.restaurant_id,))
+            """
+            total_sales = execute_query(sales_query.format(orders="orders"), (self.restaurant_id,))
             
             sales_amount = total_sales[0]['total'] if total_sales and total_sales[0]['total'] else 0
+            sales_amount = float(sales_amount) + float(archive_total(sales_query.format(orders="orders_archive"),
+                                                                     (self.restaurant_id,)))
             self.stat_cards["total_sales"]["widget"].setText(f"{float(sales_amount):.2f} AED")
             
             # Recent orders (last 5)
             self.recent_orders_table.setRowCount(0)
             
-            recent_orders = execute_query("""
+            recent_query = """
                 SELECT o.order_id, o.order_number, o.customer_id, o.order_time, o.delivery_status, o.total_amount, 
-                       c.name as customer_name, c.phone as customer_phone
-                FROM orders o
+                       {is_archived} as is_archived, c.name as customer_name, c.phone as customer_phone
+                FROM {orders} o
                 JOIN customers c ON o.customer_id = c.customer_id
                 WHERE o.restaurant_id = %s
                 ORDER BY o.order_time DESC
                 LIMIT 5
-            """, (self.restaurant_id,))
+            """
+            recent_orders = execute_query(recent_query.format(orders="orders", is_archived=0), (self.restaurant_id,))
+            # Archived orders are older than any hot one, so they only fill a short list
+            if recent_orders is not None and len(recent_orders) < 5:
+                archived = archive_query(recent_query.format(orders="orders_archive", is_archived=1), (self.restaurant_id,))
+                recent_orders += archived[:5 - len(recent_orders)]
             
             if not recent_orders:
                 self.recent_orders_table.setRowCount(1)
@@ -1901,9 +1866,9 @@ class RestaurantDashboard(QWidget):
                 customer = QTableWidgetItem(order['customer_name'])
                 
                 # Get order items summary (count of items)
-                items_count = execute_query("""
+                items_count = execute_query(f"""
                     SELECT SUM(quantity) as total_items
-                    FROM order_items
+                    FROM {order_table('order_items', order['is_archived'])}
                     WHERE order_id = %s
                 """, (order['order_id'],))
                 
@@ -2019,8 +1984,8 @@ class RestaurantDashboard(QWidget):
         try:
             # Build the query with parameters
             query = """
-                SELECT o.*, c.name as customer_name, c.phone as customer_phone
-            FROM orders o
+                SELECT o.*, {is_archived} as is_archived, c.name as customer_name, c.phone as customer_phone
+            FROM {orders} o
             JOIN customers c ON o.customer_id = c.customer_id
             WHERE o.restaurant_id = %s
             """
@@ -2040,8 +2005,9 @@ class RestaurantDashboard(QWidget):
                 query += " AND c.name LIKE %s"
                 params.append(f"%{search_term}%")
             
-            # Add order by clause
-            query += " ORDER BY o.order_time DESC"
+            # Include archived orders when the date range reaches them
+            query, params = with_archive(query, params, start_date)
+            query += " ORDER BY order_time DESC"
             
             orders = execute_query(query, tuple(params))
             
@@ -2124,7 +2090,7 @@ class RestaurantDashboard(QWidget):
     
     def load_orders_for_tab(self, tab_status):
         """Load orders for a specific tab"""
-        if not self.restaurant_id:
+        if not self.restaurant_id or self.order_layouts[tab_status] is None:
             return
             
         try:
@@ -2148,18 +2114,21 @@ class RestaurantDashboard(QWidget):
             # Get status values for the query
             status_clause = status_db_map.get(tab_status, "('Pending')")
             
+            # Only completed and cancelled orders can be in the archive
+            archived_status = {'Completed': 'Delivered', 'Cancelled': 'Cancelled'}.get(tab_status, 'Pending')
+            
             # Get orders with the appropriate status
-            query = f"""
-                SELECT o.*, c.name as customer_name, c.phone as customer_phone, dp.name as delivery_person_name
-                FROM orders o
+            query, params = with_archive(f"""
+                SELECT o.*, {{is_archived}} as is_archived,
+                       c.name as customer_name, c.phone as customer_phone, dp.name as delivery_person_name
+                FROM {{orders}} o
                 LEFT JOIN customers c ON o.customer_id = c.customer_id
                 LEFT JOIN delivery_personnel dp ON o.delivery_person_id = dp.delivery_person_id
                 WHERE o.restaurant_id = %s
                 AND o.delivery_status IN {status_clause}
-                ORDER BY o.order_time DESC
-            """
+            """, [self.restaurant_id], status=archived_status)
             
-            orders = execute_query(query, (self.restaurant_id,))
+            orders = execute_query(query + " ORDER BY order_time DESC", params)
             
             if not orders:
                 no_orders = QLabel(f"No {tab_status.lower()} orders")